@@ -0,0 +1,33 @@
+# scripts/archive_paths.py
+# judge_baekjoon.py / programmers_harness.py 가 같이 쓰는 아카이브 폴더 탐색
+
+import os
+from typing import List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+
+
+def is_solution_file(name: str) -> bool:
+    """
+    채점/측정할 풀이 파일인지. classify_and_push.py 의 기본 라우팅 규칙과 같게
+    문제 폴더의 CodeReview.py(리뷰 버전)와 *-CodeReview.py(모아 보기 노트)는 풀이로 보지 않음
+    """
+    low = name.lower()
+    return low.endswith(".py") and low != "codereview.py" and not low.endswith("-codereview.py")
+
+
+def solution_files(folder: str) -> List[str]:
+    """folder 안의 풀이 파일 이름들 (정렬)"""
+    return sorted(n for n in os.listdir(folder) if is_solution_file(n))
+
+
+def problem_folders(roots: List[str], pattern: str = "") -> List[str]:
+    """풀이 파일이 있는 폴더들 (정렬). pattern 이 있으면 경로에 그 문자열이 들어간 것만"""
+    folders = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(REPO_ROOT, root)):
+            dirnames.sort()
+            if any(is_solution_file(n) for n in filenames) and pattern in dirpath:
+                folders.append(dirpath)
+    return folders
@@ -0,0 +1,93 @@
+# scripts/bench_http_pool.py
+# classify_and_push.http_request(호스트별 keep-alive 세션)가 연결(=TCP/TLS 핸드셰이크)을
+# 얼마나 줄이는지 로컬 대체 서버로 확인하는 스크립트입니다.
+#
+# 사용법: python scripts/bench_http_pool.py [요청 수]
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import classify_and_push as cap  # noqa: E402
+
+
+class _CountingServer(ThreadingHTTPServer):
+    """accept 된 연결 수를 세는 서버 (연결 수 = 실제 환경의 핸드셰이크 수)"""
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+        self.requests = 0
+        self.throttle_next = 0
+        self._lock = threading.Lock()
+
+    def get_request(self):
+        conn = super().get_request()
+        with self._lock:
+            self.connections += 1
+        return conn
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive 허용
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        srv = self.server
+        with srv._lock:
+            srv.requests += 1
+            throttle = srv.throttle_next > 0
+            if throttle:
+                srv.throttle_next -= 1
+        if throttle:
+            body = b'{"message":"rate limited"}'
+            self.send_response(429)
+            self.send_header("Retry-After", "0.05")
+        else:
+            body = b'{"ok":true}'
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(label: str, server: _CountingServer, fn, n: int):
+    server.connections = 0
+    server.requests = 0
+    t0 = time.perf_counter()
+    for _ in range(n):
+        r = fn()
+        assert r.status_code == 200, r.status_code
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<22} requests: {server.requests:>4}  connections: {server.connections:>4}  elapsed: {elapsed:.3f}s")
+    return server.connections
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    server = _CountingServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/ping"
+
+    bare = _run("bare requests.get", server, lambda: requests.get(url, timeout=5), n)
+    pooled = _run("http_request (pooled)", server, lambda: cap.http_request("GET", url, timeout=5), n)
+    print(f"handshakes saved: {bare - pooled} / {bare}")
+
+    # 429 + Retry-After 에 대해 재시도하는지 확인
+    server.throttle_next = 2
+    _run("http_request (429 x2)", server, lambda: cap.http_request("GET", url, timeout=5), 1)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# scripts/bench_pipeline.py
+# 실제 GitHub/OpenAI/Notion 자격증명 없이 classify_and_push.main 의 성능을 재는 벤치마크.
+# mock_apis.py 의 로컬 대체 서버를 띄우고, 합성 push 이벤트(변경 파일 1/10/100/500개)를 흘려 보내서
+# 전체 소요 시간, 호스트별 요청 수, 단계별 p50/p95 지연을 출력합니다.
+#
+# 사용법: python scripts/bench_pipeline.py [--sizes 1 10 100 500] [--latency 0.05] [--openai-latency 0.5]
+#                                         [--error-rate 0.0] [--notion-rate 3] [--openai-wander 0.0]
+#                                         [--github-quota 0] [--openai-quota 0] [--quota-window 60]
+#                                         [--json 결과.json]
+# CLASSIFY_CONCURRENCY, OPENAI_BATCH_SIZE, OPENAI_STRUCTURED, LOCAL_CLASSIFY_MAX_SCORE 같은 설정은 환경변수로 넘기면 그대로 적용됩니다.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+import mock_apis  # noqa: E402
+
+STAGES = ["fetch", "readme", "classify", "publish"]
+
+
+def synthetic_files(n: int) -> dict:
+    """백준 형식의 문제 폴더 n 개 (풀이 + README)"""
+    files = {}
+    for i in range(n):
+        num = 10000 + i
+        folder = f"백준/Bronze/{num}. 합성 문제 {i}"
+        files[f"{folder}/합성 문제 {i}.py"] = (
+            "import sys\n"
+            "input = sys.stdin.readline\n"
+            f"n = int(input())\n"
+            f"arr = sorted(map(int, input().split()))\n"
+            f"print(sum(arr[:n]) + {i})\n"
+        )
+        files[f"{folder}/README.md"] = (
+            f"# [Bronze V] 합성 문제 {i} - {num} \n\n"
+            f"[문제 링크](https://www.acmicpc.net/problem/{num}) \n\n"
+            "### 성능 요약\n\n메모리: 31120 KB, 시간: 36 ms\n\n"
+            "### 분류\n\n구현, 정렬\n\n"
+            "### 문제 설명\n\n<p>정수 N개가 주어질 때 정렬한 뒤 합을 출력하시오.</p>\n"
+        )
+    return files
+
+
+def synthetic_event(files: dict, n: int) -> dict:
+    """풀이 n 개를 커밋 여러 개로 나눠 담은 push 이벤트 (README 는 절반만 같은 push 에 포함)"""
+    sources = sorted(p for p in files if p.endswith(".py"))[:n]
+    commits = []
+    for start in range(0, len(sources), 20):
+        chunk = sources[start:start + 20]
+        added = []
+        for j, p in enumerate(chunk):
+            added.append(p)
+            if (start + j) % 2 == 0:
+                added.append(os.path.dirname(p) + "/README.md")
+        commits.append({"id": f"c{start}", "added": added, "modified": [], "removed": []})
+    return {
+        "ref": "refs/heads/main",
+        "before": "0" * 40,
+        "after": "f" * 40,
+        "repository": {"full_name": "bench/archive"},
+        "commits": commits,
+    }
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(q * (len(values) - 1)))))
+    return values[idx]
+
+
+# -------------------
+# 자식 프로세스: classify_and_push 를 한 번 실행하고 단계별 시간을 JSON 으로 기록
+# -------------------
+def run_child(event_path: str, out_path: str):
+    import classify_and_push as cap
+
+    durations = {name: [] for name in STAGES}
+
+    def _timed(name, fn):
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                durations[name].append(time.perf_counter() - t0)
+        return wrapper
+
+    cap.GITHUB_EVENT_PATH = event_path
+    cap.fetch_content = _timed("fetch", cap.fetch_content)
+    cap.ReadmeResolver.get = _timed("readme", cap.ReadmeResolver.get)
+    cap.classify_cached = _timed("classify", cap.classify_cached)
+    cap.classify_batch = _timed("classify", cap.classify_batch)
+    cap.publish_notion_page = _timed("publish", cap.publish_notion_page)
+
+    t0 = time.perf_counter()
+    cap.main([])
+    wall = time.perf_counter() - t0
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"wall": wall, "durations": durations}, f)
+
+
+# -------------------
+# 부모 프로세스: 대체 서버를 띄우고 크기별로 자식을 실행
+# -------------------
+def run_scenario(n: int, servers: dict, files: dict, workdir: str) -> dict:
+    event_path = os.path.join(workdir, f"event_{n}.json")
+    out_path = os.path.join(workdir, f"result_{n}.json")
+    with open(event_path, "w", encoding="utf-8") as f:
+        json.dump(synthetic_event(files, n), f, ensure_ascii=False)
+    for srv in servers.values():
+        srv.reset_stats()
+        srv.quota_reset_at = 0.0  # 크기마다 새 예산으로 시작
+    servers["notion"].state.update(pages={}, children={}, blocks={})
+
+    env = dict(os.environ)
+    env.update(mock_apis.env_for(servers))
+    env.update({
+        "CLASSIFY_SOURCE": "api",  # 로컬 체크아웃이 아니라 API 경로를 잰다
+        "CLASSIFY_CACHE_DIR": env.get("CLASSIFY_CACHE_DIR", ""),
+        # 합성 풀이는 모두 짧아서 로컬 분류로 끝나므로, 따로 주지 않으면 끄고 OpenAI 경로를 잰다
+        "LOCAL_CLASSIFY_MAX_SCORE": env.get("LOCAL_CLASSIFY_MAX_SCORE", "0"),
+        "NOTION_INDEX_PATH": os.path.join(workdir, f"notion_index_{n}.json"),
+        "NOTION_SCHEMA_CACHE_PATH": os.path.join(workdir, f"notion_schema_{n}.json"),
+        "STATE_DB_PATH": os.path.join(workdir, f"sync_state_{n}.sqlite"),
+        "GITHUB_EVENT_PATH": event_path,
+    })
+    log_path = os.path.join(workdir, f"log_{n}.txt")
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", event_path, out_path],
+                              env=env, stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0:
+        with open(log_path, "r", encoding="utf-8") as log:
+            print("".join(log.readlines()[-40:]))
+        raise SystemExit(f"child run failed for n={n}")
+    with open(out_path, "r", encoding="utf-8") as f:
+        res = json.load(f)
+
+    row = {"files": n, "wall": res["wall"]}
+    for name, srv in servers.items():
+        row[f"{name}_requests"] = srv.stats["requests"]
+        row[f"{name}_connections"] = srv.stats["connections"]
+        row[f"{name}_throttled"] = srv.stats["throttled"]
+    for stage in STAGES:
+        vals = res["durations"].get(stage, [])
+        row[f"{stage}_p50"] = _percentile(vals, 0.50)
+        row[f"{stage}_p95"] = _percentile(vals, 0.95)
+    return row
+
+
+def print_table(rows: list):
+    header = f"{'files':>5} {'wall(s)':>8} {'github':>7} {'openai':>7} {'notion':>7} {'429s':>5}"
+    for stage in STAGES:
+        header += f" {stage + ' p50/p95(ms)':>22}"
+    print(header)
+    for r in rows:
+        throttled = r["github_throttled"] + r["openai_throttled"] + r["notion_throttled"]
+        line = (f"{r['files']:>5} {r['wall']:>8.2f} {r['github_requests']:>7} {r['openai_requests']:>7} "
+                f"{r['notion_requests']:>7} {throttled:>5}")
+        for stage in STAGES:
+            cell = f"{r[stage + '_p50'] * 1000:.0f}/{r[stage + '_p95'] * 1000:.0f}"
+            line += f" {cell:>22}"
+        print(line)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3])
+        return
+
+    parser = argparse.ArgumentParser(description="classify_and_push 오프라인 종단 간 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--latency", type=float, default=0.05, help="GitHub/Notion 평균 응답 지연(초)")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="OpenAI 평균 응답 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 을 돌려줄 확률")
+    parser.add_argument("--notion-rate", type=float, default=3.0, help="Notion 초당 요청 한도 (0 = 무제한)")
+    parser.add_argument("--openai-wander", type=float, default=0.0,
+                        help="OpenAI 가 JSON 밖으로 새는 응답을 줄 확률 (response_format 요청에는 적용 안 됨)")
+    parser.add_argument("--github-quota", type=int, default=0,
+                        help="GitHub 창(window)당 요청 예산, X-RateLimit-* 헤더로 알림 (0 = 무제한)")
+    parser.add_argument("--openai-quota", type=int, default=0,
+                        help="OpenAI 창당 요청 예산, x-ratelimit-* 헤더로 알림 (0 = 무제한)")
+    parser.add_argument("--quota-window", type=float, default=60.0, help="예산이 다시 채워지는 주기(초)")
+    parser.add_argument("--json", help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+
+    files = synthetic_files(max(args.sizes))
+    servers = mock_apis.start_all(files, latency=args.latency, openai_latency=args.openai_latency,
+                                  error_rate=args.error_rate, notion_rate=args.notion_rate,
+                                  openai_wander=args.openai_wander, github_quota=args.github_quota,
+                                  openai_quota=args.openai_quota, quota_window=args.quota_window, seed=0)
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir:
+        for n in args.sizes:
+            print(f"[BENCH] running {n} file(s) ...", flush=True)
+            rows.append(run_scenario(n, servers, files, workdir))
+    for srv in servers.values():
+        srv.stop()
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
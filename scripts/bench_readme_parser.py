@@ -0,0 +1,232 @@
+# scripts/bench_readme_parser.py
+# 백준/, 프로그래머스/ 아래 모든 README.md 를 파싱해서
+# 단일 패스 parse_readme 와 이전(정규식 여러 번) 구현의 결과가 같은지, 처리량이 얼마나 되는지 비교합니다.
+#
+# 사용법: python scripts/bench_readme_parser.py [반복 횟수]
+
+import os
+import re
+import sys
+import time
+from html import unescape
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from classify_and_push import parse_readme  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIRS = ["백준", "프로그래머스"]
+
+
+# -------------------
+# 비교 기준: 단일 패스로 바꾸기 전 parse_readme (그대로 복사)
+# -------------------
+def parse_readme_legacy(text: str) -> dict:
+    """
+    README.md 텍스트를 받아서 다음 항목을 추출하여 dict로 반환.
+    - problem_url
+    - perf_memory
+    - perf_time
+    - difficulty
+    - problem_text
+    - classification_text
+    - classification_tags
+    """
+    if not text:
+        return {
+            "problem_url": "", "perf_memory": "", "perf_time": "",
+            "difficulty": "", "problem_text": "",
+            "classification_text": "", "classification_tags": []
+        }
+
+    # 0) difficulty 추출 (README 첫 번째 의미있는 라인에서 [..] 내용)
+    difficulty = ""
+    first_line = ""
+    for ln in text.splitlines():
+        if ln.strip():
+            first_line = ln.strip()
+            break
+    if first_line:
+        m_diff = re.search(r'\[([^\]]+)\]', first_line)
+        if m_diff:
+            difficulty = m_diff.group(1).strip()
+
+    # 1) [문제 링크](url) or first url
+    url_match = re.search(r'\[문제\s*링크\]\s*\(\s*(https?://[^\s\)]+)\s*\)', text)
+    if not url_match:
+        url_match = re.search(r'https?://[^\s\)]+', text)
+    problem_url = url_match.group(1) if url_match else ""
+
+    # 2) perf: memory/time
+    mem_match = re.search(r'메모리[:\s]*([\d\.]+\s*MB)', text, flags=re.IGNORECASE)
+    time_match = re.search(r'시간[:\s]*([\d\.]+\s*ms)', text, flags=re.IGNORECASE)
+    perf_memory = mem_match.group(1) if mem_match else ""
+    perf_time = time_match.group(1) if time_match else ""
+
+    # cleaning util
+    def _clean_block(block: str) -> str:
+        # 코드블럭 제거
+        block = re.sub(r"```[\s\S]*?```", "", block)
+        # 인라인 코드 `...` -> 내용만 남기기
+        block = re.sub(r'`([^`]+)`', r'\1', block)
+        # HTML 태그 제거
+        block = re.sub(r'<[^>]+>', '', block)
+        # 여러 공백(유니코드 포함)을 일반 공백으로 바꾸고 줄 단위로 정리
+        block = re.sub(r'[\u00A0\u2000-\u200A\u202F]', ' ', block)
+        lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
+        return unescape("\n".join(lines)).strip()
+
+    # 3) classification 섹션
+    class_blocks = []
+    # 헤딩 '분류' 또는 '구분' (1~6 레벨) 뒤의 블록들을 모두 찾음
+    pattern = re.compile(r'#{1,6}\s*(?:분류|구분)\s*[\r\n]+([\s\S]+?)(?=\n#{1,6}\s|\n-{3,}\n|$)', flags=re.IGNORECASE)
+    for m in pattern.finditer(text):
+        raw = m.group(1)
+        cleaned = _clean_block(raw)
+        if cleaned:
+            class_blocks.append(cleaned)
+
+    class_text = "\n\n".join(class_blocks) if class_blocks else ""
+
+    # ------------------
+    # 각 블록을 태그로 토큰화
+    # 전략:
+    # 1) '>'로 경로 표시하면 각 경로 조각을 태그로 사용 (계층적 정보 유지)
+    # 2) 아니면 줄 단위 목록 -> 각 줄을 항목으로 사용
+    # 3) 한 줄의 경우 쉼표/슬래시/파이프/중점 등으로 분리, 없으면 공백으로 분리
+    # 4) 괄호 내용 제거, 앞뒤 공백 제거
+    # ------------------
+    tags = []
+    def _normalize_tag(t: str) -> str:
+        t = re.sub(r'\(.*?\)', '', t)            # 괄호 안 내용 제거
+        t = re.sub(r'[\u2000-\u200A\u00A0\u202F]', ' ', t)  # 특수 공백 정리
+        t = t.replace('\uFEFF', '').strip()      # BOM 제거 가능성
+        return re.sub(r'\s{2,}', ' ', t).strip()
+
+    for block in class_blocks:
+        # 우선 '>' 기반 분리 시도 (경로 표기)
+        if '>' in block:
+            parts = [p.strip() for p in re.split(r'\s*>\s*', block) if p.strip()]
+            # 각 부분을 정제하여 추가 (예: "탐욕법(Greedy)" -> "탐욕법")
+            for p in parts:
+                nt = _normalize_tag(p)
+                if nt and len(nt) > 0:
+                    if nt not in tags:
+                        tags.append(nt)
+            # 또한 경로 전체(가장 상세한 경로)를 태그로 추가할 수도 있음 (옵션)
+            # full_path = " > ".join([_normalize_tag(p) for p in parts if _normalize_tag(p)])
+            # if full_path and full_path not in tags:
+            #     tags.append(full_path)
+            continue
+
+        # 줄 단위로 목록이 있으면 각 줄 처리
+        lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
+        if len(lines) > 1:
+            for ln in lines:
+                ln_clean = re.sub(r'^[\-\*\•\·\s]+', '', ln).strip()
+                # 분리자로 나누기
+                parts = re.split(r'[,\|/;·•\u2022\u2023]+', ln_clean)
+                if len(parts) == 1:
+                    parts = re.split(r'[\s]+', ln_clean)
+                for p in parts:
+                    nt = _normalize_tag(p)
+                    if nt and len(nt) > 0 and len(nt) > 1:
+                        if nt not in tags:
+                            tags.append(nt)
+            continue
+
+        # 단일라인 블록: 구분자(콤마 등)로 분리, 없으면 공백 분리
+        single = lines[0] if lines else block
+        parts = re.split(r'[,\|/;·•\u2022\u2023]+', single)
+        if len(parts) == 1:
+            parts = re.split(r'[\s]+', single)
+        for p in parts:
+            nt = _normalize_tag(p)
+            if nt and len(nt) > 0 and len(nt) > 1:
+                if nt not in tags:
+                    tags.append(nt)
+
+    # 필터: 너무 짧은 토큰(1 char) 제외, 중복은 이미 제거됨
+    classification_tags = [t for t in tags if len(t) > 1]
+
+    # 4) problem description
+    prob_text = ""
+    m = re.search(r'#{1,6}\s*문제\s*설명\s*[\r\n]+([\s\S]+?)(?:\n#{1,6}\s|\n-{3,}\n|$)', text)
+    if m:
+        block = m.group(1)
+        block = _clean_block(block)
+        lines = block.splitlines()
+        prob_text = " ".join(lines[:6]) if lines else ""
+    else:
+        s = _clean_block(text)
+        prob_text = " ".join(s.splitlines()[:6])
+
+    return {
+        "problem_url": problem_url,
+        "perf_memory": perf_memory,
+        "perf_time": perf_time,
+        "difficulty": difficulty,
+        "problem_text": prob_text,
+        "classification_text": class_text,
+        "classification_tags": classification_tags
+    }
+
+
+def collect_readmes() -> list:
+    texts = []
+    for top in ARCHIVE_DIRS:
+        for dirpath, _dirs, names in sorted(os.walk(os.path.join(ROOT, top))):
+            for n in names:
+                if n.lower() == "readme.md":
+                    path = os.path.join(dirpath, n)
+                    with open(path, "r", encoding="utf-8") as f:
+                        texts.append((os.path.relpath(path, ROOT), f.read()))
+    return texts
+
+
+def _safe(fn, text):
+    try:
+        return fn(text)
+    except Exception as e:  # 이전 구현은 [문제 링크] 가 없으면 예외가 남
+        return {"error": repr(e)}
+
+
+def _bench(fn, texts, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for _path, text in texts:
+            _safe(fn, text)
+    return time.perf_counter() - t0
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    texts = collect_readmes()
+    total_bytes = sum(len(t.encode("utf-8")) for _p, t in texts)
+    print(f"READMEs: {len(texts)}  total: {total_bytes / 1024:.1f} KB  repeat: {repeat}")
+
+    mismatches = 0
+    for path, text in texts:
+        old, new = _safe(parse_readme_legacy, text), _safe(parse_readme, text)
+        if "error" in old:
+            continue
+        # 분류 프롬프트용으로 나중에 추가된 problem_detail 만 비교에서 빼고, 그 밖의 키 차이는 모두 불일치
+        extra = set(new) - set(old) - {"problem_detail"}
+        same = {k: new.get(k) for k in old} == old
+        if extra or not same:
+            mismatches += 1
+            diff = {k: (old[k], new.get(k)) for k in old if old[k] != new.get(k)}
+            print(f"[DIFF] {path}: {diff} extra keys: {sorted(extra)}")
+    print(f"mismatches: {mismatches}")
+
+    results = []
+    for label, fn in (("legacy", parse_readme_legacy), ("single-pass", parse_readme)):
+        elapsed = _bench(fn, texts, repeat)
+        n = len(texts) * repeat
+        results.append(elapsed)
+        print(f"{label:<12} {elapsed:.3f}s  {n / elapsed:,.0f} files/s  "
+              f"{total_bytes * repeat / elapsed / 1024 / 1024:.1f} MB/s")
+    print(f"speedup: {results[0] / results[1]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
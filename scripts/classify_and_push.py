@@ -4,14 +4,32 @@
 
 import os
 import sys
+import ast
+import asyncio
 import json
 import time
 import requests
 import traceback
 import re
-from typing import List, Optional
-from urllib.parse import quote
+import io
+import random
+import subprocess
+import sqlite3
+import tarfile
+import hashlib
+import fnmatch
+import tokenize
+import argparse
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Iterator, List, Optional
+from urllib.parse import quote, urlsplit
 from html import unescape
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
 # 환경변수 읽기
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
@@ -21,6 +39,76 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 NOTION_DB_ID = os.getenv("NOTION_DB_ID")
 GITHUB_EVENT_PATH = os.getenv("GITHUB_EVENT_PATH", "/github/workflow/event.json")
+# API 주소 (로컬 대체 서버로 벤치마크할 때 바꿈, GITHUB_API_URL 은 Actions 가 기본 제공)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+NOTION_API_URL = os.getenv("NOTION_API_URL", "https://api.notion.com/v1").rstrip("/")
+# 동시에 처리할 파일 수 (1이면 기존처럼 순차 처리)
+CLASSIFY_CONCURRENCY = max(1, int(os.getenv("CLASSIFY_CONCURRENCY", "1") or "1"))
+# 처리 엔진: threads(기본, 파일 단위 스레드 풀) 또는 asyncio(단계별 큐 파이프라인)
+CLASSIFY_ENGINE = os.getenv("CLASSIFY_ENGINE", "threads").strip().lower()
+# asyncio 엔진의 단계별 동시 실행 수와 단계 사이 큐 크기
+ASYNC_FETCH_CONCURRENCY = max(1, int(os.getenv("ASYNC_FETCH_CONCURRENCY", "8")))
+ASYNC_README_CONCURRENCY = max(1, int(os.getenv("ASYNC_README_CONCURRENCY", "4")))
+ASYNC_CLASSIFY_CONCURRENCY = max(1, int(os.getenv("ASYNC_CLASSIFY_CONCURRENCY", str(max(2, CLASSIFY_CONCURRENCY)))))
+ASYNC_QUEUE_SIZE = max(1, int(os.getenv("ASYNC_QUEUE_SIZE", "16")))
+# API 모드에서 처리할 파일이 이 개수 이상이면 파일별 contents API 대신 커밋 tarball 을 한 번 받아서 읽음 (0 이면 끔)
+BULK_FETCH_THRESHOLD = int(os.getenv("BULK_FETCH_THRESHOLD", "30"))
+# 변경 파일을 어디서 읽을지: auto(체크아웃이 이벤트 커밋과 같으면 로컬) / local / api
+CLASSIFY_SOURCE = os.getenv("CLASSIFY_SOURCE", "auto").strip().lower()
+GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE") or os.getcwd()
+# OpenAI 분류 결과 디스크 캐시 (actions/cache 로 그대로 저장/복원 가능한 디렉터리, 빈 값이면 끔)
+CLASSIFY_CACHE_DIR = os.getenv("CLASSIFY_CACHE_DIR", ".cache/classify")
+CLASSIFY_CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFY_CACHE_MAX_ENTRIES", "2000"))
+# 프롬프트/스키마를 바꾸면 이 값을 올려서 기존 캐시를 무효화
+PROMPT_VERSION = "2"
+# 프롬프트에 넣을 코드/문제 설명의 토큰 예산 (추정치). 넘으면 주석을 빼고, 그래도 넘으면 앞뒤만 남김
+OPENAI_CODE_MAX_TOKENS = int(os.getenv("OPENAI_CODE_MAX_TOKENS", "3000"))
+OPENAI_PROBLEM_MAX_TOKENS = int(os.getenv("OPENAI_PROBLEM_MAX_TOKENS", "600"))
+# 파이썬 풀이의 로컬(ast) 분석 점수가 이 값 이하이면 LLM 을 부르지 않고 로컬 결과를 사용 (기본 0 = 끔, 켜면 짧은 풀이는 리뷰가 고정 문구가 됨)
+LOCAL_CLASSIFY_MAX_SCORE = int(os.getenv("LOCAL_CLASSIFY_MAX_SCORE", "0"))
+# 여러 파일을 한 번의 요청으로 분류할 최대 개수 (0/1이면 파일별 요청)
+# 1 이면 response_format(json_schema)으로 스키마에 맞는 JSON 만 요청. OPENAI_STREAM=1 이면 스트리밍으로 받으며 검증
+OPENAI_STRUCTURED = os.getenv("OPENAI_STRUCTURED", "0") == "1"
+OPENAI_STREAM = os.getenv("OPENAI_STREAM", "0") == "1"
+OPENAI_BATCH_SIZE = int(os.getenv("OPENAI_BATCH_SIZE", "0"))
+# 배치 요청 하나의 입력 토큰 상한 (추정치, 넘으면 배치를 나눔)
+OPENAI_BATCH_MAX_TOKENS = int(os.getenv("OPENAI_BATCH_MAX_TOKENS", "60000"))
+# 같은 문제(번호/URL + 언어)의 페이지가 있으면 새로 만들지 않고 수정 (1이면 켬)
+NOTION_UPSERT = os.getenv("NOTION_UPSERT", "0") == "1"
+NOTION_INDEX_PATH = os.getenv("NOTION_INDEX_PATH", ".cache/notion_index.json")
+# DB 스키마 디스크 캐시 (초 단위 TTL, 0 이면 매 실행 조회)
+NOTION_SCHEMA_CACHE_PATH = os.getenv("NOTION_SCHEMA_CACHE_PATH", ".cache/notion_schema.json")
+NOTION_SCHEMA_TTL = int(os.getenv("NOTION_SCHEMA_TTL", "86400"))
+# 1 이면 push 에서 삭제된 풀이의 Notion 페이지를 보관(archive) 처리 (인덱스에 경로가 기록된 페이지만)
+NOTION_ARCHIVE_REMOVED = os.getenv("NOTION_ARCHIVE_REMOVED", "0") == "1"
+# Notion 요청 속도 제한 (통합당 약 3 req/s) 과 게시 워커 수
+NOTION_RATE_LIMIT = float(os.getenv("NOTION_RATE_LIMIT", "3"))
+NOTION_WORKERS = max(1, int(os.getenv("NOTION_WORKERS", "3") or "3"))
+# 파일별 동기화 상태 (내용/README 해시, page_id, 분류 결과). actions/cache 로 .cache 와 함께 복원, 빈 값이면 끔
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", ".cache/sync_state.sqlite")
+# 백필(--backfill) 대상 폴더와 진행 상황 파일
+ARCHIVE_ROOTS = ["백준", "프로그래머스"]
+BACKFILL_CHECKPOINT = os.getenv("BACKFILL_CHECKPOINT", ".cache/backfill_checkpoint.jsonl")
+# 경로 라우팅 규칙 JSON ([["glob", "classify|variant|sql|skip"], ...]). 기본 규칙보다 먼저 평가됨
+ROUTING_RULES_PATH = os.getenv("ROUTING_RULES_PATH", "")
+# 응답의 rate-limit 헤더(GitHub X-RateLimit-*, OpenAI x-ratelimit-*)로 호스트별 동시 요청 수를 조절 (0 이면 끔)
+ADAPTIVE_RATE_LIMIT = os.getenv("ADAPTIVE_RATE_LIMIT", "1") == "1"
+ADAPTIVE_MAX_CONCURRENCY = max(1, int(os.getenv("ADAPTIVE_MAX_CONCURRENCY", "16")))
+# 남은 예산 비율이 이 값 아래면 동시 요청을 줄이고 리셋 시각까지 요청 간격을 벌림
+ADAPTIVE_LOW_WATERMARK = float(os.getenv("ADAPTIVE_LOW_WATERMARK", "0.1"))
+# 예산이 바닥났을 때 리셋까지 미리 쉬는 최대 시간(초). 더 길면 쉬지 않고 서버 응답(429/403)에 맡김
+ADAPTIVE_MAX_SLEEP = float(os.getenv("ADAPTIVE_MAX_SLEEP", "60"))
+# HTTP 재시도 설정 (429/5xx/연결 오류에 대해 지수 백오프 + 지터)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+# 실행 지표 리포트: 경로가 비어 있으면 파일로 남기지 않음. 형식은 json 또는 openmetrics
+METRICS_PATH = os.getenv("METRICS_PATH", "")
+METRICS_FORMAT = os.getenv("METRICS_FORMAT", "json").strip().lower()
+METRICS_SUMMARY = os.getenv("METRICS_SUMMARY", "0") == "1"
+# 0 이면 이벤트 원문/변경 파일 목록/README 파싱 결과 같은 긴 덤프를 출력하지 않음
+CLASSIFY_VERBOSE = os.getenv("CLASSIFY_VERBOSE", "1") == "1"
 
 # -------------------
 # 유틸/디버그 함수
@@ -32,46 +120,601 @@ def print_envs():
     print("[ENV] NOTION_DB_ID present" if NOTION_DB_ID else "[ENV-ERR] NOTION_DB_ID missing")
     print("[ENV] OPENAI_MODEL:", OPENAI_MODEL)
     print("[ENV] GITHUB_EVENT_PATH:", GITHUB_EVENT_PATH)
+    print("[ENV] CLASSIFY_CONCURRENCY:", CLASSIFY_CONCURRENCY)
+    print("[ENV] CLASSIFY_ENGINE:", CLASSIFY_ENGINE)
+    print("[ENV] CLASSIFY_SOURCE:", CLASSIFY_SOURCE)
+    print("[ENV] CLASSIFY_CACHE_DIR:", CLASSIFY_CACHE_DIR or "(disabled)")
+    print("[ENV] OPENAI_STRUCTURED:", OPENAI_STRUCTURED, "stream:", OPENAI_STREAM)
+    print("[ENV] OPENAI_BATCH_SIZE:", OPENAI_BATCH_SIZE)
+    print("[ENV] NOTION_UPSERT:", NOTION_UPSERT)
+    print("[ENV] NOTION_SCHEMA_CACHE_PATH:", NOTION_SCHEMA_CACHE_PATH or "(disabled)")
+    print("[ENV] NOTION_ARCHIVE_REMOVED:", NOTION_ARCHIVE_REMOVED)
+    print("[ENV] METRICS_PATH:", METRICS_PATH or "(disabled)")
 
 def read_event() -> dict:
     if not os.path.isfile(GITHUB_EVENT_PATH):
         print("[EVENT-ERR] event file not found:", GITHUB_EVENT_PATH)
         return {}
-    with open(GITHUB_EVENT_PATH, "r", encoding="utf-8") as f:
-        e = json.load(f)
-    print("[EVENT] loaded event, length:", len(json.dumps(e, ensure_ascii=False)))
-    s = json.dumps(e, ensure_ascii=False)
-    print(s[:2000])
+    with METRICS.span("event.parse"):
+        with open(GITHUB_EVENT_PATH, "r", encoding="utf-8") as f:
+            raw = f.read()
+        e = json.loads(raw)
+    # 덤프는 파일 원문을 그대로 사용 (큰 payload 를 다시 직렬화하지 않음)
+    print("[EVENT] loaded event, length:", len(raw))
+    if CLASSIFY_VERBOSE:
+        print(raw[:2000])
     return e
 
-def get_changed_files_from_event(event: dict) -> List[str]:
-    files: List[str] = []
-    for c in event.get("commits", []):
-        files += c.get("added", []) + c.get("modified", []) + c.get("removed", [])
-    print("[INFO] total changed files found in event:", len(files))
-    for i, p in enumerate(files[:200]):
-        print(f"  {i+1}. {p}")
-    return files
+# -------------------
+# 변경 집합: push 의 여러 커밋을 경로별 최종 상태 하나로 합침
+# -------------------
+# 상태: added / modified / removed / renamed(previous = 원래 경로)
+def apply_change(changes: dict, status: str, path: str, previous: Optional[str] = None):
+    """
+    changes(경로 -> {"status", "previous"}) 에 변경 하나를 시간 순서대로 반영합니다.
+    - 추가 후 삭제 -> 없던 일, 삭제 후 추가 -> modified
+    - 추가/이름변경 후 수정 -> 처음 상태 유지
+    - 이름변경이 이어지면 (a -> b -> c) 최초 경로 a 를 previous 로 유지
+    """
+    prev = changes.get(path)
+    if status == "renamed":
+        old = changes.pop(previous, None)
+        if old and old["status"] == "added":
+            changes[path] = {"status": "added", "previous": None}
+        elif old and old["status"] == "renamed":
+            changes[path] = {"status": "renamed", "previous": old["previous"]}
+        else:
+            changes[path] = {"status": "renamed", "previous": previous}
+    elif status == "removed":
+        if prev and prev["status"] == "added":
+            del changes[path]
+        elif prev and prev["status"] == "renamed":
+            # 이름을 바꾼 뒤 삭제 -> 원래 경로가 삭제된 것
+            del changes[path]
+            changes[prev["previous"]] = {"status": "removed", "previous": None}
+        else:
+            changes[path] = {"status": "removed", "previous": None}
+    elif status == "added":
+        if prev and prev["status"] == "removed":
+            changes[path] = {"status": "modified", "previous": None}
+        elif not prev:
+            changes[path] = {"status": "added", "previous": None}
+    else:
+        if not prev or prev["status"] == "removed":
+            changes[path] = {"status": "modified", "previous": None}
 
-def fetch_files_from_commit(owner: str, repo: str, commit_id: str) -> List[str]:
+def _pair_renames(added: List[str], removed: List[str]) -> List[tuple]:
+    """
+    push payload 에는 이름변경 정보가 없으므로, 한 커밋 안에서 같은 파일명이
+    한 곳에서 삭제되고 다른 폴더에 추가된 경우(예: 난이도 폴더 이동)를 이름변경으로 봅니다.
+    파일명이 겹치는 후보가 양쪽에 하나씩일 때만 짝을 짓습니다.
+    """
+    by_name_added, by_name_removed = {}, {}
+    for p in added:
+        by_name_added.setdefault(os.path.basename(p), []).append(p)
+    for p in removed:
+        by_name_removed.setdefault(os.path.basename(p), []).append(p)
+    pairs = []
+    for name, olds in by_name_removed.items():
+        news = by_name_added.get(name, [])
+        if len(olds) == 1 and len(news) == 1 and os.path.dirname(olds[0]) != os.path.dirname(news[0]):
+            pairs.append((olds[0], news[0]))
+    return pairs
+
+def print_change_set(changes: dict, source: str):
+    counts = {}
+    for info in changes.values():
+        counts[info["status"]] = counts.get(info["status"], 0) + 1
+    summary = " ".join(f"{k}: {counts.get(k, 0)}" for k in ("added", "modified", "removed", "renamed"))
+    print(f"[INFO] change set from {source}: {len(changes)} path(s) ({summary})")
+    if CLASSIFY_VERBOSE:
+        for i, (p, info) in enumerate(list(changes.items())[:200]):
+            extra = f" (from {info['previous']})" if info.get("previous") else ""
+            print(f"  {i+1}. [{info['status']}] {p}{extra}")
+
+def get_change_set_from_event(event: dict) -> dict:
+    """payload 의 commits 를 순서대로 합쳐서 경로별 최종 상태를 만듦"""
+    changes: dict = {}
+    for c in event.get("commits", []):
+        added, removed = list(c.get("added", [])), list(c.get("removed", []))
+        for old, new in _pair_renames(added, removed):
+            added.remove(new)
+            removed.remove(old)
+            apply_change(changes, "renamed", new, old)
+        for p in added:
+            apply_change(changes, "added", p)
+        for p in c.get("modified", []):
+            apply_change(changes, "modified", p)
+        for p in removed:
+            apply_change(changes, "removed", p)
+    print_change_set(changes, "event")
+    return changes
+
+_COMMIT_API_STATUS = {"added": "added", "copied": "added", "removed": "removed", "renamed": "renamed"}
+
+def fetch_change_set_from_commit(owner: str, repo: str, commit_id: str) -> dict:
     """payload의 commit list가 비어있을 때 commit API로 폴백"""
     if not GITHUB_TOKEN:
         print("[WARN] cannot fetch commit files because GITHUB_TOKEN is missing")
-        return []
-    url = f"https://api.github.com/repos/{owner}/{repo}/commits/{commit_id}"
+        return {}
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{commit_id}"
     headers = {"Authorization": f"Bearer {GITHUB_TOKEN}", "Accept": "application/vnd.github.v3+json"}
     try:
-        r = requests.get(url, headers=headers, timeout=15)
+        r = http_request("GET", url, headers=headers, timeout=15)
     except Exception as e:
         print("[WARN] fetch commit files exception:", e)
-        return []
+        return {}
     if r.status_code != 200:
         print("[WARN] fetch commit files failed:", r.status_code, r.text[:400])
-        return []
-    data = r.json()
-    files = [f.get("filename") for f in data.get("files", []) if f.get("filename")]
-    print("[INFO] files from commits API (sample):", files[:100])
-    return files
+        return {}
+    changes: dict = {}
+    for f in r.json().get("files", []):
+        if f.get("filename"):
+            apply_change(changes, _COMMIT_API_STATUS.get(f.get("status"), "modified"), f["filename"],
+                         f.get("previous_filename"))
+    print_change_set(changes, "commits API")
+    return changes
+
+# -------------------
+# 실행 지표 (단계별 소요 시간 + HTTP 요청/바이트/재시도 수)
+# -------------------
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+def _label_text(labels: tuple) -> str:
+    """OpenMetrics 라벨 표기: {k="v",...} (값의 역슬래시/따옴표/줄바꿈은 이스케이프)"""
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+class RunMetrics:
+    """
+    span(이름, 라벨...) 별 소요 시간과 카운터를 모읍니다. 여러 스레드에서 같이 써도 됩니다.
+    키는 (이름, 정렬된 라벨 튜플) 이고, 실행이 끝나면 write() 가 JSON 또는 OpenMetrics 텍스트로 남깁니다.
+    """
+    def __init__(self):
+        self.spans = {}      # (name, labels) -> [초, ...]
+        self.counters = {}   # (name, labels) -> 값
+        self.gauges = {}     # (name, labels) -> 마지막 값
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.spans.setdefault(key, []).append(seconds)
+
+    def incr(self, name: str, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def report(self) -> dict:
+        with self._lock:
+            spans = {k: sorted(v) for k, v in self.spans.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        return {
+            "generated_at": int(time.time()),
+            "spans": [
+                {"name": name, "labels": dict(labels), "count": len(v), "total_s": round(sum(v), 6),
+                 "mean_s": round(sum(v) / len(v), 6), "p50_s": round(_percentile(v, 0.50), 6),
+                 "p95_s": round(_percentile(v, 0.95), 6), "max_s": round(v[-1], 6)}
+                for (name, labels), v in sorted(spans.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "gauges": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(gauges.items())
+            ],
+        }
+
+    def to_openmetrics(self) -> str:
+        rep = self.report()
+        lines = ["# TYPE classify_span_seconds summary", "# UNIT classify_span_seconds seconds"]
+        for sp in rep["spans"]:
+            labels = (("span", sp["name"]),) + tuple(sorted(sp["labels"].items()))
+            lines.append(f"classify_span_seconds{_label_text(labels + (('quantile', '0.5'),))} {sp['p50_s']}")
+            lines.append(f"classify_span_seconds{_label_text(labels + (('quantile', '0.95'),))} {sp['p95_s']}")
+            lines.append(f"classify_span_seconds_sum{_label_text(labels)} {sp['total_s']}")
+            lines.append(f"classify_span_seconds_count{_label_text(labels)} {sp['count']}")
+        declared = set()
+        for c in rep["counters"]:
+            metric = "classify_" + c["name"]
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}_total{_label_text(tuple(sorted(c['labels'].items())))} {c['value']}")
+        for g in rep["gauges"]:
+            metric = "classify_" + g["name"]
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{_label_text(tuple(sorted(g['labels'].items())))} {g['value']}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, fmt: str = "json"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        text = self.to_openmetrics() if fmt == "openmetrics" else json.dumps(self.report(), ensure_ascii=False, indent=2)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"[METRICS] report written: {path} ({fmt})")
+
+    def print_summary(self):
+        rep = self.report()
+        print(f"[METRICS] {'span':<40} {'count':>6} {'total(s)':>9} {'p50(ms)':>8} {'p95(ms)':>8} {'max(ms)':>8}")
+        for sp in rep["spans"]:
+            label = sp["name"] + "".join(f" {v}" for _, v in sorted(sp["labels"].items()))
+            print(f"[METRICS] {label[:40]:<40} {sp['count']:>6} {sp['total_s']:>9.2f} {sp['p50_s'] * 1000:>8.1f} "
+                  f"{sp['p95_s'] * 1000:>8.1f} {sp['max_s'] * 1000:>8.1f}")
+        for c in rep["counters"] + rep["gauges"]:
+            label = c["name"] + "".join(f" {k}={v}" for k, v in sorted(c["labels"].items()))
+            print(f"[METRICS] {label:<56} {c['value']:>10}")
+
+METRICS = RunMetrics()
+
+def write_metrics_report():
+    """실행이 끝날 때 (성공/실패와 무관하게) 호출"""
+    if METRICS_SUMMARY:
+        METRICS.print_summary()
+    if METRICS_PATH:
+        try:
+            METRICS.write(METRICS_PATH, METRICS_FORMAT)
+        except Exception as e:
+            print("[WARN] metrics report write failed:", e)
+
+# -------------------
+# 공용 HTTP 클라이언트 (호스트별 keep-alive 세션 + 재시도/백오프)
+# -------------------
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+def pool_size_for(host: str) -> int:
+    """
+    그 호스트로 동시에 나갈 수 있는 최대 요청 수 (엔진/단계별 설정 중 가장 큰 값)
+    - GitHub: 파일 워커, asyncio 면 fetch + readme 단계가 동시에
+    - OpenAI: 파일 워커, asyncio 면 classify 단계
+    - Notion: 파일 워커 + NotionPublisher 워커 (둘 다 게시/조회를 보낼 수 있음)
+    """
+    use_async = CLASSIFY_ENGINE == "asyncio"
+    sizes = {
+        urlsplit(GITHUB_API_URL).netloc: max(CLASSIFY_CONCURRENCY, (ASYNC_FETCH_CONCURRENCY + ASYNC_README_CONCURRENCY)
+                                             if use_async else 0),
+        urlsplit(OPENAI_BASE_URL).netloc: max(CLASSIFY_CONCURRENCY, ASYNC_CLASSIFY_CONCURRENCY if use_async else 0),
+        urlsplit(NOTION_API_URL).netloc: CLASSIFY_CONCURRENCY + NOTION_WORKERS,
+    }
+    return sizes.get(host, max(sizes.values()))
+
+def get_session(url: str) -> requests.Session:
+    """
+    호스트(api.github.com, api.openai.com, api.notion.com ...)마다 Session 하나를 재사용합니다.
+    같은 호스트로 가는 요청은 TCP/TLS 연결을 다시 맺지 않고 커넥션 풀에서 꺼내 씁니다.
+    풀 크기는 그 호스트로 동시에 나갈 수 있는 요청 수(pool_size_for)에 맞춥니다.
+    """
+    host = urlsplit(url).netloc
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size_for(host))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSIONS[host] = session
+        return session
+
+def _retry_after_seconds(r: requests.Response) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환. 없으면 None"""
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+def _backoff_delay(attempt: int) -> float:
+    """지수 백오프 + full jitter: [0, base * 2^(attempt-1)] 구간에서 랜덤"""
+    cap = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, cap)
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    return 0  # 스트림/제너레이터 바디는 크기를 알 수 없음
+
+# -------------------
+# 응답 헤더 기반 적응형 제한 (호스트별 동시 요청 수 + 예산 소진 전 미리 쉬기)
+# -------------------
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+def _duration_seconds(value: str) -> Optional[float]:
+    """OpenAI 식 기간 문자열("1s", "6m0s", "20ms") -> 초. 형식이 아니면 None"""
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = _DURATION_RE.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(num) * units[unit] for num, unit in parts)
+
+def parse_rate_limit_headers(headers) -> List[tuple]:
+    """
+    [(종류, 남은 수, 한도, 리셋까지 초)]
+    - GitHub: X-RateLimit-Remaining / X-RateLimit-Limit / X-RateLimit-Reset(epoch 초)
+    - OpenAI: x-ratelimit-remaining-{requests,tokens} / x-ratelimit-limit-* / x-ratelimit-reset-*("6m0s")
+    """
+    budgets = []
+    try:
+        if headers.get("X-RateLimit-Remaining") is not None:
+            reset = float(headers.get("X-RateLimit-Reset") or 0) - time.time()
+            budgets.append(("requests", int(headers["X-RateLimit-Remaining"]),
+                            int(headers.get("X-RateLimit-Limit") or 0), max(0.0, reset)))
+        for kind in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is not None:
+                reset = _duration_seconds(headers.get(f"x-ratelimit-reset-{kind}", "")) or 0.0
+                budgets.append((kind, int(remaining), int(headers.get(f"x-ratelimit-limit-{kind}") or 0), reset))
+    except (TypeError, ValueError):
+        pass
+    return budgets
+
+class AdaptiveLimiter:
+    """
+    호스트 하나로 동시에 나가는 요청 수(limit)를 응답 헤더의 남은 예산에 맞춰 조절합니다.
+    - 예산이 넉넉하면(절반 이상) limit 을 1씩 늘림 (최대 ADAPTIVE_MAX_CONCURRENCY)
+    - ADAPTIVE_LOW_WATERMARK 아래거나 429 면 limit 을 절반으로, 남은 요청을 리셋 시각까지 고르게 나눠 보냄
+    - 남은 수가 이미 날아가는 요청 수 이하면 리셋까지 새 요청을 미리 멈춤 (429 를 받기 전에)
+    첫 응답을 받기 전에는 예산을 모르므로 요청 하나만 먼저 보냅니다.
+    예산 헤더를 주지 않는 호스트(Notion 등)는 첫 응답 뒤 최대치로 열어 두고 기존 429 재시도/TokenBucket 에 맡깁니다.
+    """
+    def __init__(self, host: str, max_concurrency: int):
+        self.host = host
+        self.max = max_concurrency
+        self.limit = 1
+        self.probed = False
+        self.in_flight = 0
+        self.not_before = 0.0   # monotonic: 이 시각 전에는 새 요청을 보내지 않음
+        self.interval = 0.0     # 요청 시작 사이 최소 간격 (예산을 리셋까지 나눠 쓸 때)
+        self.last_start = 0.0
+        self.budget = {}        # 종류 -> (남은 수, 리셋 monotonic 시각)
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                start_at = max(self.not_before, self.last_start + self.interval)
+                if self.in_flight < self.limit and now >= start_at:
+                    self.in_flight += 1
+                    self.last_start = now
+                    return
+                self._cond.wait(start_at - now if now < start_at else None)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def observe(self, r: requests.Response):
+        """응답 하나의 헤더/상태로 limit, 요청 간격, 미리 쉬기를 갱신 (release 전에 호출)"""
+        budgets = parse_rate_limit_headers(r.headers)
+        with self._cond:
+            now = time.monotonic()
+            others = self.in_flight - 1
+            if not self.probed:
+                self.probed = True
+                if not budgets:
+                    self.limit = self.max  # 예산을 알려 주지 않는 호스트
+            if r.status_code == 429 and self.budget:
+                self.limit = max(1, self.limit // 2)
+            tightest = None
+            for kind, remaining, limit, reset in budgets:
+                # 동시에 보낸 요청의 응답은 순서가 뒤바뀌어 오므로, 같은 리셋 구간에서는 더 작은 값만 믿음
+                reset_at = now + reset
+                prev = self.budget.get(kind)
+                if prev and abs(prev[1] - reset_at) < 1.0 and prev[0] < remaining:
+                    remaining = prev[0]
+                self.budget[kind] = (remaining, reset_at)
+                METRICS.gauge("ratelimit_remaining", remaining, host=self.host, kind=kind)
+                ratio = remaining / limit if limit else 1.0
+                if tightest is None or ratio < tightest[0]:
+                    tightest = (ratio, kind, remaining, reset)
+            if tightest is not None:
+                ratio, kind, remaining, reset = tightest
+                if remaining <= others:
+                    # 이미 날아간 요청들이 남은 예산을 다 쓰게 됨 -> 리셋까지 새 요청을 멈춤
+                    sleep = min(reset, ADAPTIVE_MAX_SLEEP)
+                    if reset > ADAPTIVE_MAX_SLEEP:
+                        print(f"[RATE] {self.host} {kind} budget exhausted, reset in {reset:.0f}s "
+                              f"(> ADAPTIVE_MAX_SLEEP) -> not waiting")
+                    elif self.not_before <= now:
+                        self.not_before = now + sleep
+                        METRICS.incr("ratelimit_preemptive_sleeps", host=self.host)
+                        METRICS.incr("ratelimit_preemptive_sleep_seconds", round(sleep, 3), host=self.host)
+                        print(f"[RATE] {self.host} {kind} remaining {remaining} -> pausing {sleep:.2f}s until reset")
+                    self.limit = 1
+                elif ratio < ADAPTIVE_LOW_WATERMARK:
+                    self.limit = max(1, min(self.limit // 2, remaining - others))
+                    self.interval = reset / remaining
+                elif ratio >= 0.5:
+                    self.limit = max(1, min(self.max, self.limit + 1, remaining - others))
+                    self.interval = 0.0
+                else:
+                    self.limit = max(1, min(self.limit, remaining - others))
+            METRICS.gauge("ratelimit_concurrency", self.limit, host=self.host)
+            self._cond.notify_all()
+
+_ADAPTIVE = {}
+_ADAPTIVE_LOCK = threading.Lock()
+
+def adaptive_limiter(host: str) -> Optional[AdaptiveLimiter]:
+    if not ADAPTIVE_RATE_LIMIT:
+        return None
+    with _ADAPTIVE_LOCK:
+        limiter = _ADAPTIVE.get(host)
+        if limiter is None:
+            limiter = _ADAPTIVE[host] = AdaptiveLimiter(host, ADAPTIVE_MAX_CONCURRENCY)
+        return limiter
+
+def _rate_limited_403(r: requests.Response) -> bool:
+    """GitHub 기본 rate limit 초과는 429 가 아니라 403 + X-RateLimit-Remaining: 0"""
+    return r.status_code == 403 and r.headers.get("X-RateLimit-Remaining") == "0"
+
+# 같은 요청을 두 번 보내도 결과가 같은 메서드 (POST/PATCH 는 호출 측이 idempotent=True 로 알려 줘야 함)
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+def _request_not_sent(e: Exception) -> bool:
+    """연결 자체가 안 된 오류(연결 시간 초과/거부)면 True. 읽기 시간 초과나 도중에 끊긴 경우는 서버가 처리했을 수 있음"""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    if isinstance(e, requests.Timeout):
+        return False
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+def http_request(method: str, url: str, limiter=None, idempotent: Optional[bool] = None,
+                 **kwargs) -> requests.Response:
+    """
+    requests.request 대체. 호스트별 세션을 사용하고,
+    429/5xx 응답과 연결 오류는 HTTP_MAX_RETRIES 번까지 재시도합니다.
+    idempotent 가 아닌 요청(기본: POST/PATCH)은 보내기 전에 실패한 연결 오류만 재시도합니다
+    (응답을 기다리다 끊긴 생성 요청을 다시 보내면 Notion 페이지/블록이 중복되고 OpenAI 요금이 두 번 나감).
+    Retry-After 헤더가 있으면 그 값을 우선 사용합니다.
+    limiter(TokenBucket)가 주어지면 매 시도 전에 토큰을 받고, 429 면 limiter 전체를 멈춥니다.
+    모든 호스트는 AdaptiveLimiter 를 거치며, 응답의 rate-limit 헤더로 동시 요청 수/미리 쉬기를 조절합니다.
+    시도마다 METRICS 에 호스트별 소요 시간/상태 코드/송수신 바이트/재시도 수를 기록합니다.
+    """
+    session = get_session(url)
+    host = urlsplit(url).netloc
+    adaptive = adaptive_limiter(host)
+    if idempotent is None:
+        idempotent = method.upper() in _IDEMPOTENT_METHODS
+    attempt = 0
+    while True:
+        attempt += 1
+        if limiter is not None or adaptive is not None:
+            with METRICS.span("ratelimit.wait", host=host):
+                if adaptive is not None:
+                    adaptive.acquire()
+                if limiter is not None:
+                    limiter.acquire()
+        error = None
+        try:
+            with METRICS.span("http", host=host, method=method):
+                r = session.request(method, url, **kwargs)
+            if adaptive is not None:
+                adaptive.observe(r)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        finally:
+            # 스트리밍 응답은 헤더를 받은 시점에 자리를 돌려줌 (바디는 호출 측이 읽음)
+            if adaptive is not None:
+                adaptive.release()
+        if error is not None:
+            e = error
+            METRICS.incr("http_errors", host=host)
+            if attempt > HTTP_MAX_RETRIES:
+                raise e
+            if not idempotent and not _request_not_sent(e):
+                print(f"[HTTP] {method} {host} exception after sending: {e} -> not retrying (not idempotent)")
+                raise e
+            METRICS.incr("http_retries", host=host)
+            delay = _backoff_delay(attempt)
+            print(f"[HTTP] {method} {host} exception: {e} -> retry {attempt}/{HTTP_MAX_RETRIES} in {delay:.2f}s")
+            time.sleep(delay)
+            continue
+        METRICS.incr("http_requests", host=host, status=r.status_code)
+        METRICS.incr("http_bytes_sent", _body_size(r.request.body), host=host)
+        if kwargs.get("stream"):
+            received = int(r.headers.get("Content-Length") or 0)  # 스트리밍이면 바디를 여기서 읽지 않음
+        else:
+            received = len(r.content)
+        METRICS.incr("http_bytes_received", received, host=host)
+        if (r.status_code in _RETRY_STATUS or _rate_limited_403(r)) and attempt <= HTTP_MAX_RETRIES:
+            METRICS.incr("http_retries", host=host)
+            delay = _retry_after_seconds(r)
+            if delay is None:
+                delay = _backoff_delay(attempt)
+            delay = min(delay, HTTP_BACKOFF_MAX)
+            if limiter is not None and r.status_code == 429:
+                limiter.pause(delay)
+            print(f"[HTTP] {method} {host} status:{r.status_code} -> retry {attempt}/{HTTP_MAX_RETRIES} in {delay:.2f}s")
+            r.content  # 바디를 끝까지 읽어야 연결이 풀로 반환됨
+            time.sleep(delay)
+            continue
+        return r
+
+class TokenBucket:
+    """
+    초당 rate 개의 토큰이 채워지는 버킷 (최대 capacity 개).
+    acquire() 는 토큰이 생길 때까지 기다립니다. 여러 스레드에서 같이 써도 됩니다.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """429 를 받으면 seconds 동안 아무도 토큰을 받지 못하게 하고, 그 뒤에는 토큰 1개부터 다시 채움"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 1
+            self.updated = self.paused_until
+
+# Notion 은 최근 1초 동안의 요청 수를 세므로 모아 둔 토큰을 한꺼번에 쓰면 한도를 넘음 -> 버스트 없이 1개씩.
+# 간격을 정확히 1/rate 로 맞추면 요청이 도착하는 시각이 조금만 흔들려도 1초 안에 rate+1 개가 들어가므로 10% 여유를 둠
+_NOTION_BUCKET = TokenBucket(NOTION_RATE_LIMIT * 0.9, capacity=1)
+
+def notion_request(method: str, url: str, **kwargs) -> requests.Response:
+    """모든 Notion API 호출은 공용 토큰 버킷을 통과 (idempotent 는 http_request 와 같음)"""
+    return http_request(method, url, limiter=_NOTION_BUCKET, **kwargs)
 
 # -------------------
 # GitHub contents 읽기 (경로 인코딩 주의)
@@ -84,10 +727,10 @@ def get_file_raw(owner: str, repo: str, path: str, ref: str) -> Optional[str]:
         print("[WARN] GITHUB_TOKEN missing, cannot fetch file")
         return None
     encoded_path = quote(path, safe="/")
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{encoded_path}?ref={ref}"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{encoded_path}?ref={ref}"
     headers = {"Authorization": f"Bearer {GITHUB_TOKEN}", "Accept": "application/vnd.github.v3.raw"}
     try:
-        r = requests.get(url, headers=headers, timeout=15)
+        r = http_request("GET", url, headers=headers, timeout=15)
     except Exception as e:
         print(f"[ERROR] requests exception fetching {path}: {e}")
         return None
@@ -97,9 +740,286 @@ def get_file_raw(owner: str, repo: str, path: str, ref: str) -> Optional[str]:
         print(f"[WARN] fetch file failed: {path} status:{r.status_code} body:{r.text[:400]}")
         return None
 
+def fetch_tarball_entries(owner: str, repo: str, ref: str, wanted: set) -> tuple:
+    """
+    GET /repos/{owner}/{repo}/tarball/{ref} 를 스트리밍으로 받으면서 wanted 경로만 메모리로 읽습니다.
+    tarfile 스트림 모드(r|gz)라 디스크에 풀지 않고 앞에서부터 한 번만 훑으며, 다 찾으면 나머지는 받지 않고 끊습니다.
+    tarball 의 최상위 폴더("{owner}-{repo}-{sha}/")는 떼고 저장소 기준 경로로 돌려줍니다.
+    반환: ({경로: 내용}, complete) — complete 면 못 찾은 경로는 그 커밋에 없는 것
+    """
+    if not GITHUB_TOKEN or not wanted:
+        return {}, False
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{quote(ref, safe='')}"
+    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
+    try:
+        # api.github.com 은 codeload 로 302 리다이렉트 (requests 가 따라감)
+        r = http_request("GET", url, headers=headers, timeout=60, stream=True)
+    except Exception as e:
+        print("[ERROR] tarball request exception:", e)
+        return {}, False
+    if r.status_code != 200:
+        print(f"[WARN] tarball fetch failed: status:{r.status_code}")
+        r.close()
+        return {}, False
+    found = {}
+    complete = False
+    try:
+        with tarfile.open(fileobj=r.raw, mode="r|gz") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                rel = member.name.partition("/")[2]
+                if rel in wanted:
+                    found[rel] = tar.extractfile(member).read().decode("utf-8", errors="replace")
+                    if len(found) == len(wanted):
+                        break
+        complete = True
+    except (tarfile.TarError, OSError, EOFError) as e:
+        print("[WARN] tarball read failed:", e)
+    finally:
+        r.close()
+    return found, complete
+
+# -------------------
+# 로컬 체크아웃에서 읽기 (actions/checkout 결과를 그대로 사용, API 호출 없음)
+# -------------------
+def _git(*args) -> Optional[str]:
+    """GITHUB_WORKSPACE 에서 git 명령 실행. 실패하면 None"""
+    try:
+        r = subprocess.run(["git", "-C", GITHUB_WORKSPACE, *args], capture_output=True, timeout=30)
+    except Exception as e:
+        print("[WARN] git exception:", e)
+        return None
+    if r.returncode != 0:
+        return None
+    return r.stdout.decode("utf-8", errors="replace")
+
+def local_checkout_matches(commit_id: Optional[str]) -> bool:
+    """작업 디렉터리가 git 체크아웃이고, (주어졌다면) HEAD 가 commit_id 와 같은지"""
+    head = _git("rev-parse", "HEAD")
+    if not head:
+        return False
+    return not commit_id or head.strip() == commit_id
+
+_GIT_STATUS = {"A": "added", "C": "added", "D": "removed", "R": "renamed"}
+
+_GIT_DEEPEN_STEPS = (50, 200, 1000)
+
+def _has_commit(sha: str) -> bool:
+    return _git("cat-file", "-e", f"{sha}^{{commit}}") is not None
+
+def ensure_local_commit(sha: str) -> bool:
+    """sha 가 로컬에 없고 얕은 클론(fetch-depth)이면 --deepen 으로 히스토리를 늘려가며 찾음"""
+    if _has_commit(sha):
+        return True
+    if (_git("rev-parse", "--is-shallow-repository") or "").strip() != "true":
+        return False
+    for depth in _GIT_DEEPEN_STEPS:
+        print(f"[GIT] {sha[:12]} not in shallow clone -> git fetch --deepen={depth}")
+        if _git("fetch", "--quiet", f"--deepen={depth}") is None:
+            return False
+        if _has_commit(sha):
+            return True
+    return False
+
+def get_change_set_from_git(base: Optional[str] = None) -> dict:
+    """
+    git diff --name-status <base>..HEAD 로 변경 집합을 구합니다. git 이 직접 찾은 rename(R)을 그대로 사용합니다.
+    base 가 로컬에 없으면 얕은 클론을 deepen 해 보고, 그래도 없으면 {} 를 돌려서
+    호출 측이 이벤트의 커밋 목록으로 넘어가게 합니다 (HEAD~1 로 추측하면 push 의 앞 커밋들이 빠짐)
+    """
+    if not base or set(base) == {"0"}:
+        # 새 브랜치 push 등: 비교할 이전 커밋이 없음
+        print("[INFO] no usable 'before' commit for git diff -> using event payload")
+        return {}
+    if not ensure_local_commit(base):
+        print(f"[WARN] before commit {base[:12]} not available locally -> using event payload instead of git diff")
+        return {}
+    out = _git("diff", "--name-status", "-z", f"{base}..HEAD")
+    if out is None:
+        print("[WARN] git diff failed for", f"{base}..HEAD")
+        return {}
+    changes: dict = {}
+    tokens = out.split("\0")
+    i = 0
+    while i < len(tokens) and tokens[i]:
+        status = tokens[i]
+        if status[0] in "RC":
+            # R100 <old> <new>
+            apply_change(changes, _GIT_STATUS[status[0]], tokens[i + 2], tokens[i + 1])
+            i += 3
+        else:
+            apply_change(changes, _GIT_STATUS.get(status[0], "modified"), tokens[i + 1])
+            i += 2
+    print_change_set(changes, f"git diff {base}..HEAD")
+    return changes
+
+def read_local_file(path: str) -> Optional[str]:
+    full = os.path.realpath(os.path.join(GITHUB_WORKSPACE, path))
+    root = os.path.realpath(GITHUB_WORKSPACE)
+    if not full.startswith(root + os.sep) or not os.path.isfile(full):
+        return None
+    with open(full, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def resolve_source_mode(event: dict) -> bool:
+    """CLASSIFY_SOURCE 에 따라 로컬 체크아웃을 쓸지 결정 (True = 로컬)"""
+    if CLASSIFY_SOURCE == "api":
+        return False
+    commit_id = event.get("after") or event.get("head_commit", {}).get("id")
+    if CLASSIFY_SOURCE == "local":
+        return True
+    matches = local_checkout_matches(commit_id)
+    if not matches:
+        print("[INFO] local checkout does not match event commit -> using GitHub API")
+    return matches
+
+def fetch_content(ctx: dict, path: str) -> Optional[str]:
+    """tarball 로 미리 읽어 둔 것이 있으면 그것, 로컬 모드면 작업 트리에서 읽고, 없으면 contents API로 폴백"""
+    prefetched = ctx.get("prefetched")
+    if prefetched and path in prefetched:
+        return prefetched[path]
+    if ctx.get("use_local"):
+        content = read_local_file(path)
+        if content is not None:
+            return content
+        print("[INFO] not in local checkout, falling back to API:", path)
+    return get_file_raw(ctx["owner"], ctx["repo"], path, ctx["ref"])
+
 # -------------------
 # README.md 파서 (difficulty, url, perf, classification, problem_text 등)
 # -------------------
+# 패턴은 모듈 로드 시 한 번만 컴파일
+_HEADING_RE = re.compile(r'#{1,6}[ \t]*([^\r\n]*?)[ \t]*\r?$', re.MULTILINE)
+_SECTION_END_RE = re.compile(r'\n#{1,6}\s|\n-{3,}\n')
+_BLANK_LINES_RE = re.compile(r'[\r\n]+')
+_NON_SPACE_RE = re.compile(r'\S')
+_DIFFICULTY_RE = re.compile(r'\[([^\]]+)\]')
+_PROBLEM_LINK_RE = re.compile(r'\[문제\s*링크\]\s*\(\s*(https?://[^\s\)]+)\s*\)')
+_ANY_URL_RE = re.compile(r'https?://[^\s\)]+')
+_PERF_MEMORY_RE = re.compile(r'메모리[:\s]*([\d\.]+\s*MB)', re.IGNORECASE)
+_PERF_TIME_RE = re.compile(r'시간[:\s]*([\d\.]+\s*ms)', re.IGNORECASE)
+_CODE_FENCE_RE = re.compile(r"```[\s\S]*?```")
+_INLINE_CODE_RE = re.compile(r'`([^`]+)`')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_UNICODE_SPACE_RE = re.compile(r'[\u00A0\u2000-\u200A\u202F]')
+_PAREN_RE = re.compile(r'\(.*?\)')
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+_PATH_SPLIT_RE = re.compile(r'\s*>\s*')
+_BULLET_RE = re.compile(r'^[\-\*\•\·\s]+')
+_TAG_SEP_RE = re.compile(r'[,\|/;·•\u2022\u2023]+')
+_WHITESPACE_SPLIT_RE = re.compile(r'[\s]+')
+_TABLE_RE = re.compile(r'<table\b[\s\S]*?</table>', re.IGNORECASE)
+_TABLE_ROW_RE = re.compile(r'<tr\b[\s\S]*?</tr>', re.IGNORECASE)
+_TABLE_CELL_RE = re.compile(r'<t[hd]\b[^>]*>([\s\S]*?)</t[hd]>', re.IGNORECASE)
+
+def split_readme_sections(text: str) -> List[tuple]:
+    """
+    README 를 한 번 훑어서 (헤딩, 본문) 목록으로 나눕니다.
+    헤딩 키는 공백을 뺀 문자열 ("문제 설명" -> "문제설명").
+    본문은 헤딩 다음 줄부터 다음 헤딩 / '---' 구분선 / 문서 끝까지입니다.
+    """
+    # 줄 첫머리의 '#' 위치만 str.find 로 빠르게 찾고, 그 자리에서만 헤딩 패턴을 맞춰봄
+    starts = [0] if text.startswith("#") else []
+    i = text.find("\n#")
+    while i != -1:
+        starts.append(i + 1)
+        i = text.find("\n#", i + 1)
+    sections = []
+    for pos in starts:
+        m = _HEADING_RE.match(text, pos)
+        if not m:
+            continue
+        start = m.end()
+        nl = _BLANK_LINES_RE.match(text, start)
+        if not nl:
+            continue
+        start = nl.end()
+        end_m = _SECTION_END_RE.search(text, start)
+        end = end_m.start() if end_m else len(text)
+        sections.append(("".join(m.group(1).split()), text[start:end]))
+    return sections
+
+def _clean_block(block: str) -> str:
+    # 코드블럭 제거
+    block = _CODE_FENCE_RE.sub("", block)
+    # 인라인 코드 `...` -> 내용만 남기기
+    block = _INLINE_CODE_RE.sub(r'\1', block)
+    # HTML 태그 제거
+    block = _HTML_TAG_RE.sub('', block)
+    # 여러 공백(유니코드 포함)을 일반 공백으로 바꾸고 줄 단위로 정리
+    block = _UNICODE_SPACE_RE.sub(' ', block)
+    lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
+    return unescape("\n".join(lines)).strip()
+
+def _table_cells(row: str) -> List[str]:
+    return [" ".join((_HTML_TAG_RE.sub("", c) if "<" in c else c).split()) for c in _TABLE_CELL_RE.findall(row)]
+
+def _summarize_table(m) -> str:
+    """
+    HTML 표 하나를 프롬프트용 한 줄 요약으로 바꿈 (셀이 줄마다 풀려서 토큰을 많이 쓰는 것을 막기 위함)
+    - 'Column name' 로 시작하는 스키마 표: "[스키마: 컬럼 타입, ...]"
+    - 그 외(예시 데이터 등): "[표 N행: 헤더1, 헤더2, ...]" — 데이터 행은 세기만 함
+    """
+    rows = _TABLE_ROW_RE.finditer(m.group(0))
+    first = next(rows, None)
+    header = _table_cells(first.group(0)) if first else []
+    if not header:
+        return "\n"
+    if header[0].lower() == "column name":
+        cols = [" ".join(_table_cells(r.group(0))[:2]) for r in rows]
+        return "\n[스키마: " + ", ".join(cols) + "]\n"
+    n_rows = m.group(0).lower().count("<tr") - 1
+    return f"\n[표 {n_rows}행: " + ", ".join(header) + "]\n"
+
+def _problem_detail(body: str) -> str:
+    """문제 설명 섹션 전체를 표만 요약해서 한 덩어리 텍스트로 (분류 프롬프트용, 길이 제한은 프롬프트 빌더에서)"""
+    return " ".join(_clean_block(_TABLE_RE.sub(_summarize_table, body)).splitlines())
+
+def _normalize_tag(t: str) -> str:
+    t = _PAREN_RE.sub('', t)                 # 괄호 안 내용 제거
+    t = _UNICODE_SPACE_RE.sub(' ', t)        # 특수 공백 정리
+    t = t.replace('\uFEFF', '').strip()      # BOM 제거 가능성
+    return _MULTI_SPACE_RE.sub(' ', t).strip()
+
+def _split_tag_line(line: str) -> List[str]:
+    # 구분자(콤마 등)로 분리, 없으면 공백 분리
+    parts = _TAG_SEP_RE.split(line)
+    if len(parts) == 1:
+        parts = _WHITESPACE_SPLIT_RE.split(line)
+    return parts
+
+def _tags_from_blocks(class_blocks: List[str]) -> List[str]:
+    """
+    각 블록을 태그로 토큰화
+    전략:
+    1) '>'로 경로 표시하면 각 경로 조각을 태그로 사용 (계층적 정보 유지)
+    2) 아니면 줄 단위 목록 -> 각 줄을 항목으로 사용
+    3) 한 줄의 경우 쉼표/슬래시/파이프/중점 등으로 분리, 없으면 공백으로 분리
+    4) 괄호 내용 제거, 앞뒤 공백 제거
+    """
+    tags = []
+    seen = set()
+    for block in class_blocks:
+        if '>' in block:
+            # 예: "코딩테스트 연습 > 탐욕법(Greedy)" -> ["코딩테스트 연습", "탐욕법"]
+            parts = [p for p in _PATH_SPLIT_RE.split(block) if p.strip()]
+        else:
+            lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
+            if len(lines) > 1:
+                parts = []
+                for ln in lines:
+                    parts += _split_tag_line(_BULLET_RE.sub('', ln).strip())
+            else:
+                parts = _split_tag_line(lines[0] if lines else block)
+        for p in parts:
+            nt = _normalize_tag(p)
+            # 너무 짧은 토큰(1 char) 제외, 중복 제거
+            if len(nt) > 1 and nt not in seen:
+                seen.add(nt)
+                tags.append(nt)
+    return tags
+
 def parse_readme(text: str) -> dict:
     """
     README.md 텍스트를 받아서 다음 항목을 추출하여 dict로 반환.
@@ -107,138 +1027,69 @@ def parse_readme(text: str) -> dict:
     - perf_memory
     - perf_time
     - difficulty
-    - problem_text
+    - problem_text (앞 6줄, Notion 본문용)
+    - problem_detail (섹션 전체, 표는 요약. 분류 프롬프트용)
     - classification_text
     - classification_tags
     """
     if not text:
         return {
             "problem_url": "", "perf_memory": "", "perf_time": "",
-            "difficulty": "", "problem_text": "",
+            "difficulty": "", "problem_text": "", "problem_detail": "",
             "classification_text": "", "classification_tags": []
         }
 
     # 0) difficulty 추출 (README 첫 번째 의미있는 라인에서 [..] 내용)
     difficulty = ""
-    first_line = ""
-    for ln in text.splitlines():
-        if ln.strip():
-            first_line = ln.strip()
-            break
-    if first_line:
-        m_diff = re.search(r'\[([^\]]+)\]', first_line)
+    m = _NON_SPACE_RE.search(text)
+    if m:
+        line_end = len(text)
+        for sep in ("\n", "\r"):
+            pos = text.find(sep, m.start())
+            if pos != -1:
+                line_end = min(line_end, pos)
+        m_diff = _DIFFICULTY_RE.search(text, m.start(), line_end)
         if m_diff:
             difficulty = m_diff.group(1).strip()
 
     # 1) [문제 링크](url) or first url
-    url_match = re.search(r'\[문제\s*링크\]\s*\(\s*(https?://[^\s\)]+)\s*\)', text)
-    if not url_match:
-        url_match = re.search(r'https?://[^\s\)]+', text)
-    problem_url = url_match.group(1) if url_match else ""
-
-    # 2) perf: memory/time
-    mem_match = re.search(r'메모리[:\s]*([\d\.]+\s*MB)', text, flags=re.IGNORECASE)
-    time_match = re.search(r'시간[:\s]*([\d\.]+\s*ms)', text, flags=re.IGNORECASE)
+    url_match = _PROBLEM_LINK_RE.search(text)
+    if url_match:
+        problem_url = url_match.group(1)
+    else:
+        url_match = _ANY_URL_RE.search(text)
+        problem_url = url_match.group(0) if url_match else ""
+
+    # 2) perf: memory/time (README 전체에서 처음 나오는 값)
+    mem_match = _PERF_MEMORY_RE.search(text)
+    time_match = _PERF_TIME_RE.search(text)
     perf_memory = mem_match.group(1) if mem_match else ""
     perf_time = time_match.group(1) if time_match else ""
 
-    # cleaning util
-    def _clean_block(block: str) -> str:
-        # 코드블럭 제거
-        block = re.sub(r"```[\s\S]*?```", "", block)
-        # 인라인 코드 `...` -> 내용만 남기기
-        block = re.sub(r'`([^`]+)`', r'\1', block)
-        # HTML 태그 제거
-        block = re.sub(r'<[^>]+>', '', block)
-        # 여러 공백(유니코드 포함)을 일반 공백으로 바꾸고 줄 단위로 정리
-        block = re.sub(r'[\u00A0\u2000-\u200A\u202F]', ' ', block)
-        lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
-        return unescape("\n".join(lines)).strip()
-
-    # 3) classification 섹션
-    class_blocks = []
-    # 헤딩 '분류' 또는 '구분' (1~6 레벨) 뒤의 블록들을 모두 찾음
-    pattern = re.compile(r'#{1,6}\s*(?:분류|구분)\s*[\r\n]+([\s\S]+?)(?=\n#{1,6}\s|\n-{3,}\n|$)', flags=re.IGNORECASE)
-    for m in pattern.finditer(text):
-        raw = m.group(1)
-        cleaned = _clean_block(raw)
-        if cleaned:
-            class_blocks.append(cleaned)
+    # 3) 섹션 분리 (한 번만 훑음)
+    sections = split_readme_sections(text)
 
+    # 4) classification 섹션 (헤딩 '분류' 또는 '구분' 뒤의 블록들을 모두)
+    class_blocks = []
+    for title, body in sections:
+        if title in ("분류", "구분"):
+            cleaned = _clean_block(body)
+            if cleaned:
+                class_blocks.append(cleaned)
     class_text = "\n\n".join(class_blocks) if class_blocks else ""
+    classification_tags = _tags_from_blocks(class_blocks)
 
-    # ------------------
-    # 각 블록을 태그로 토큰화
-    # 전략:
-    # 1) '>'로 경로 표시하면 각 경로 조각을 태그로 사용 (계층적 정보 유지)
-    # 2) 아니면 줄 단위 목록 -> 각 줄을 항목으로 사용
-    # 3) 한 줄의 경우 쉼표/슬래시/파이프/중점 등으로 분리, 없으면 공백으로 분리
-    # 4) 괄호 내용 제거, 앞뒤 공백 제거
-    # ------------------
-    tags = []
-    def _normalize_tag(t: str) -> str:
-        t = re.sub(r'\(.*?\)', '', t)            # 괄호 안 내용 제거
-        t = re.sub(r'[\u2000-\u200A\u00A0\u202F]', ' ', t)  # 특수 공백 정리
-        t = t.replace('\uFEFF', '').strip()      # BOM 제거 가능성
-        return re.sub(r'\s{2,}', ' ', t).strip()
-
-    for block in class_blocks:
-        # 우선 '>' 기반 분리 시도 (경로 표기)
-        if '>' in block:
-            parts = [p.strip() for p in re.split(r'\s*>\s*', block) if p.strip()]
-            # 각 부분을 정제하여 추가 (예: "탐욕법(Greedy)" -> "탐욕법")
-            for p in parts:
-                nt = _normalize_tag(p)
-                if nt and len(nt) > 0:
-                    if nt not in tags:
-                        tags.append(nt)
-            # 또한 경로 전체(가장 상세한 경로)를 태그로 추가할 수도 있음 (옵션)
-            # full_path = " > ".join([_normalize_tag(p) for p in parts if _normalize_tag(p)])
-            # if full_path and full_path not in tags:
-            #     tags.append(full_path)
-            continue
-
-        # 줄 단위로 목록이 있으면 각 줄 처리
-        lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
-        if len(lines) > 1:
-            for ln in lines:
-                ln_clean = re.sub(r'^[\-\*\•\·\s]+', '', ln).strip()
-                # 분리자로 나누기
-                parts = re.split(r'[,\|/;·•\u2022\u2023]+', ln_clean)
-                if len(parts) == 1:
-                    parts = re.split(r'[\s]+', ln_clean)
-                for p in parts:
-                    nt = _normalize_tag(p)
-                    if nt and len(nt) > 0 and len(nt) > 1:
-                        if nt not in tags:
-                            tags.append(nt)
-            continue
-
-        # 단일라인 블록: 구분자(콤마 등)로 분리, 없으면 공백 분리
-        single = lines[0] if lines else block
-        parts = re.split(r'[,\|/;·•\u2022\u2023]+', single)
-        if len(parts) == 1:
-            parts = re.split(r'[\s]+', single)
-        for p in parts:
-            nt = _normalize_tag(p)
-            if nt and len(nt) > 0 and len(nt) > 1:
-                if nt not in tags:
-                    tags.append(nt)
-
-    # 필터: 너무 짧은 토큰(1 char) 제외, 중복은 이미 제거됨
-    classification_tags = [t for t in tags if len(t) > 1]
-
-    # 4) problem description
-    prob_text = ""
-    m = re.search(r'#{1,6}\s*문제\s*설명\s*[\r\n]+([\s\S]+?)(?:\n#{1,6}\s|\n-{3,}\n|$)', text)
-    if m:
-        block = m.group(1)
-        block = _clean_block(block)
-        lines = block.splitlines()
+    # 5) problem description
+    prob_body = next((body for title, body in sections if title == "문제설명"), None)
+    if prob_body is not None:
+        lines = _clean_block(prob_body).splitlines()
         prob_text = " ".join(lines[:6]) if lines else ""
+        # 표가 없으면 정리한 줄을 그대로 이어 붙임 (같은 본문을 두 번 정리하지 않음)
+        prob_detail = _problem_detail(prob_body) if "<table" in prob_body else " ".join(lines)
     else:
         s = _clean_block(text)
         prob_text = " ".join(s.splitlines()[:6])
+        prob_detail = prob_text
 
     return {
         "problem_url": problem_url,
@@ -246,10 +1097,63 @@ def parse_readme(text: str) -> dict:
         "perf_time": perf_time,
         "difficulty": difficulty,
         "problem_text": prob_text,
+        "problem_detail": prob_detail,
         "classification_text": class_text,
         "classification_tags": classification_tags
     }
 
+# -------------------
+# 폴더별 README 지연 로딩 (실행당 폴더마다 최대 한 번)
+# -------------------
+class ReadmeResolver:
+    """
+    폴더 -> parse_readme 결과를 처음 필요할 때 읽어서 실행이 끝날 때까지 재사용합니다.
+    풀이만 바뀌고 README 는 안 바뀐 push 에서도 문제 설명/URL/난이도/성능을 채울 수 있습니다.
+    읽기는 fetch_content 를 사용하므로 로컬 체크아웃이 우선이고, 없으면 API 로 가져옵니다.
+    """
+    def __init__(self, ctx: dict):
+        self.ctx = ctx
+        self._paths = {}     # folder -> README 경로 (이번 push 에 있던 이름 그대로)
+        self._parsed = {}    # folder -> parse_readme 결과
+        self._lock = threading.Lock()
+        self._folder_locks = {}
+
+    def register(self, readme_path: str):
+        with self._lock:
+            self._paths[os.path.dirname(readme_path)] = readme_path
+
+    def path_for(self, folder: str) -> str:
+        """폴더의 README 경로 (이번 push 에 있던 이름, 없으면 README.md)"""
+        with self._lock:
+            return self._paths.get(folder, f"{folder}/README.md")
+
+    def get(self, folder: str) -> dict:
+        # 저장소 루트 README 는 BaekjoonHub 소개글이므로 문제 정보가 아님
+        if not folder:
+            return {}
+        with self._lock:
+            if folder in self._parsed:
+                return self._parsed[folder]
+            folder_lock = self._folder_locks.setdefault(folder, threading.Lock())
+        # 같은 폴더를 여러 워커가 동시에 요청해도 한 번만 읽도록 폴더 단위로 잠금
+        with folder_lock:
+            with self._lock:
+                if folder in self._parsed:
+                    return self._parsed[folder]
+            path = self.path_for(folder)
+            content = fetch_content(self.ctx, path)
+            with METRICS.span("readme.parse"):
+                parsed = parse_readme(content) if content else {}
+            if parsed and CLASSIFY_VERBOSE:
+                print(f"[INFO] parsed README for folder {folder}: {parsed}")
+            elif parsed:
+                print("[INFO] parsed README for folder", folder)
+            else:
+                print("[INFO] no README for folder", folder)
+            with self._lock:
+                self._parsed[folder] = parsed
+            return parsed
+
 # -------------------
 # OpenAI 분류기 (problem_text 옵션 추가, robust JSON parsing)
 # -------------------
@@ -286,101 +1190,409 @@ def _extract_code_fence_jsons(text: str) -> list:
         blocks.append(inner)
     return blocks
     
-def classify_with_openai(code: str, problem_text: str = "", max_retries: int = 1) -> dict:
-    """
-    code: 코드 문자열
-    problem_text: (옵션) README에서 추출한 문제 설명을 문자열로 전달
-    반환: {"tags":[...], "review": "...", "time_complexity": "..."}
-    """
-    if not OPENAI_API_KEY:
-        return {"tags": [], "review": "no api key", "time_complexity": ""}
-
-    # 엄격한 JSON 출력 요구 + few-shot(짧게)
-    prompt = f"""
+# 파일별 분류 프롬프트의 고정 부분 (배치 모드에서 절약량 추정에도 사용)
+_CLASSIFY_INSTRUCTIONS = """
 당신은 코딩테스트 풀이 코드를 보고 알고리즘 태그와 간단한 코드리뷰를 JSON으로 반환하는 도우미입니다.
 **중요**: 절대 다른 텍스트를 출력하지 말고, 오직 하나의 JSON 객체만 출력하세요. 형식은 정확히 아래 JSON 스키마를 따르세요.
 
 스키마:
-{{"tags": ["DP","그리디"], "review": "코드에 대한 간단한 리뷰(한두 문장)", "time_complexity": "O(n)"}}
+{"tags": ["DP","그리디"], "review": "코드에 대한 간단한 리뷰(한두 문장)", "time_complexity": "O(n)"}
 
 예시:
-{{"tags":["그리디"], "review":"정렬 후 탐색으로 해결. 경계조건 체크 필요.", "time_complexity":"O(n log n)"}}
+{"tags":["그리디"], "review":"정렬 후 탐색으로 해결. 경계조건 체크 필요.", "time_complexity":"O(n log n)"}
 
 아래 문제 설명(있으면)과 코드를 참고하여 태그와 리뷰를 작성하세요.
-문제 설명:
-{problem_text}
-코드:
-{code}
 """
 
+# -------------------
+# 분류 프롬프트 빌더 (고정 지시문은 system 메시지 = 매 요청 같은 prefix, 가변 부분은 토큰 예산 안으로)
+# -------------------
+_C_STYLE_LANGUAGES = ("c", "c++", "c#", "java", "javascript", "kotlin", "swift", "go", "rust", "typescript", "scala")
+# 문자열 리터럴은 그대로 두고 // 주석과 /* */ 주석만 지움
+_C_STYLE_COMMENT_RE = re.compile(r'("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')|//[^\n]*|/\*[\s\S]*?\*/')
+
+def _strip_python_comments(code: str) -> str:
+    """tokenize 로 COMMENT 토큰만 잘라냄 (문자열 안의 '#' 은 유지). 토큰화에 실패하면 원문 그대로"""
+    lines = code.splitlines()
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type == tokenize.COMMENT:
+                row, col = tok.start
+                lines[row - 1] = lines[row - 1][:col].rstrip()
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return code
+    return "\n".join(lines)
+
+def strip_code_comments(code: str, language: str) -> str:
+    """언어별 주석과 빈 줄 제거 (모르는 언어는 빈 줄만)"""
+    if language == "python":
+        code = _strip_python_comments(code)
+    elif language in _C_STYLE_LANGUAGES:
+        code = _C_STYLE_COMMENT_RE.sub(lambda m: m.group(1) or "", code)
+    return "\n".join(ln.rstrip() for ln in code.splitlines() if ln.strip())
+
+def _truncate_lines(text: str, budget: int) -> str:
+    """앞쪽 2/3, 뒤쪽 1/3 예산만큼 줄을 남기고 가운데를 생략 표시로 바꿈"""
+    lines = text.splitlines()
+    head, tail = [], []
+    used = 0
+    for ln in lines:
+        cost = estimate_tokens(ln)
+        if used + cost > budget * 2 // 3:
+            break
+        head.append(ln)
+        used += cost
+    for ln in reversed(lines[len(head):]):
+        cost = estimate_tokens(ln)
+        if used + cost > budget:
+            break
+        tail.append(ln)
+        used += cost
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [f"... ({omitted}줄 생략) ..."] + tail[::-1])
+
+def fit_code(code: str, language: str, budget: int = 0) -> tuple:
+    """(예산 안에 맞춘 코드, 줄인 방법 "" / "comments" / "truncated")"""
+    budget = budget or OPENAI_CODE_MAX_TOKENS
+    if estimate_tokens(code) <= budget:
+        return code, ""
+    code = strip_code_comments(code, language)
+    if estimate_tokens(code) <= budget:
+        return code, "comments"
+    return _truncate_lines(code, budget), "truncated"
+
+def fit_problem_text(text: str, budget: int = 0) -> tuple:
+    """(예산 안에 맞춘 문제 설명, "" / "truncated"). 표는 parse_readme 에서 이미 요약됨"""
+    budget = budget or OPENAI_PROBLEM_MAX_TOKENS
+    est = estimate_tokens(text)
+    if est <= budget:
+        return text, ""
+    keep = len(text) * budget // est
+    while keep > 0 and estimate_tokens(text[:keep]) > budget:
+        keep = keep * 9 // 10
+    return text[:keep].rstrip() + " ...(이하 생략)", "truncated"
+
+def problem_text_for_prompt(readme_info: dict) -> str:
+    """프롬프트에는 표를 요약한 문제 설명 전체를 우선 사용 (예전 캐시/README 결과면 앞 6줄)"""
+    if not readme_info:
+        return ""
+    return readme_info.get("problem_detail") or readme_info.get("problem_text", "")
+
+def _classify_user_content(code: str, problem_text: str, language: str) -> tuple:
+    """(user 메시지 본문, 토큰 추정 {"problem","code"}, 줄인 부분 목록)"""
+    problem, p_trim = fit_problem_text(problem_text or "")
+    code, c_trim = fit_code(code, language)
+    trimmed = [f"problem:{p_trim}"] if p_trim else []
+    if c_trim:
+        trimmed.append(f"code:{c_trim}")
+    content = f"문제 설명:\n{problem}\n코드:\n{code}\n"
+    return content, {"problem": estimate_tokens(problem), "code": estimate_tokens(code)}, trimmed
+
+def build_classify_messages(code: str, problem_text: str = "", language: str = "") -> List[dict]:
+    """
+    파일별 분류 요청의 messages.
+    지시문은 system 메시지로 맨 앞에 고정 -> 요청마다 prefix 가 바이트 단위로 같아서 제공자 쪽 프롬프트 캐시 대상이 됨
+    """
+    content, parts, trimmed = _classify_user_content(code, problem_text, language)
+    record_prompt_tokens(_CLASSIFY_INSTRUCTIONS, parts, trimmed)
+    return [{"role": "system", "content": _CLASSIFY_INSTRUCTIONS},
+            {"role": "user", "content": content}]
+
+def record_prompt_tokens(prefix: str, parts: dict, trimmed: List[str]):
+    """요청 하나의 입력 토큰 추정치를 로그/지표에 남김"""
+    prefix_tokens = estimate_tokens(prefix)
+    total = prefix_tokens + sum(parts.values())
+    with _OPENAI_STATS_LOCK:
+        _OPENAI_STATS["prompt_tokens_est"] += total
+    METRICS.incr("openai_prompt_tokens_est", prefix_tokens, part="prefix")
+    for name, n in parts.items():
+        METRICS.incr("openai_prompt_tokens_est", n, part=name)
+    for t in trimmed:
+        METRICS.incr("openai_prompt_trimmed", part=t.split(":")[0])
+    detail = " ".join(f"{k}={v}" for k, v in parts.items())
+    print(f"[OpenAI] prompt ~{total} tokens (prefix={prefix_tokens} {detail})"
+          + (f" trimmed: {', '.join(trimmed)}" if trimmed else ""))
+
+def record_usage(usage: Optional[dict]):
+    """응답의 usage (실제 입력 토큰 / 캐시 적중 토큰) 를 누적. 없으면 무시"""
+    if not isinstance(usage, dict):
+        return
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    cached = int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+    with _OPENAI_STATS_LOCK:
+        _OPENAI_STATS["prompt_tokens"] += prompt_tokens
+        _OPENAI_STATS["cached_tokens"] += cached
+    METRICS.incr("openai_prompt_tokens", prompt_tokens)
+    METRICS.incr("openai_cached_tokens", cached)
+
+# OpenAI 호출 통계 (배치 모드의 절약 시간 추정용 + 입력 토큰 추정/실제/캐시 적중)
+_OPENAI_STATS = {"requests": 0, "seconds": 0.0, "prompt_tokens_est": 0, "prompt_tokens": 0, "cached_tokens": 0}
+_OPENAI_STATS_LOCK = threading.Lock()
+
+def _record_openai_call(elapsed: float):
+    with _OPENAI_STATS_LOCK:
+        _OPENAI_STATS["requests"] += 1
+        _OPENAI_STATS["seconds"] += elapsed
+
+_PARSE_PATHS = {}   # 응답을 어느 단계에서 해석했는지: structured/code_fence/full_text/brace_block/retry/fallback_text
+
+def _record_parse_path(step: str):
+    with _OPENAI_STATS_LOCK:
+        _PARSE_PATHS[step] = _PARSE_PATHS.get(step, 0) + 1
+    METRICS.incr("openai_parse_path", path=step)
+
+def print_openai_summary():
+    if not _OPENAI_STATS["requests"]:
+        return
+    avg = _OPENAI_STATS["seconds"] / _OPENAI_STATS["requests"]
+    paths = " ".join(f"{k}={v}" for k, v in sorted(_PARSE_PATHS.items()))
+    print(f"[OpenAI] requests: {_OPENAI_STATS['requests']} avg: {avg:.2f}s parse paths: {paths or '-'}")
+    print(f"[OpenAI] prompt tokens est: {_OPENAI_STATS['prompt_tokens_est']} "
+          f"reported: {_OPENAI_STATS['prompt_tokens']} cached: {_OPENAI_STATS['cached_tokens']}")
+
+# -------------------
+# 구조화 출력 (OPENAI_STRUCTURED): 스키마 고정 JSON + 스트리밍 점진 검증
+# -------------------
+_CLASSIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "review": {"type": "string"},
+        "time_complexity": {"type": "string"},
+    },
+    "required": ["tags", "review", "time_complexity"],
+    "additionalProperties": False,
+}
+
+def _apply_output_mode(body: dict) -> dict:
+    """요청 body 에 구조화 출력/스트리밍 옵션을 붙임 (재시도 요청에도 같이 적용)"""
+    if OPENAI_STRUCTURED:
+        body["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "classification", "strict": True, "schema": _CLASSIFICATION_SCHEMA},
+        }
+        if OPENAI_STREAM:
+            body["stream"] = True
+            body["stream_options"] = {"include_usage": True}  # 마지막 청크에 usage 가 실려 옴
+    return body
+
+class IncrementalJSONObject:
+    """
+    스트리밍으로 들어오는 텍스트 조각을 받아 최상위 JSON 객체 하나가 끝나는 지점을 찾습니다.
+    - 공백을 뺀 첫 글자가 '{' 가 아니면 invalid (스키마 밖 응답)
+    - 문자열/이스케이프를 따라가며 괄호 깊이를 세고, 깊이가 다시 0 이 되면 complete
+    """
+    def __init__(self):
+        self._buf = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.complete = False
+        self.invalid = False
+
+    def feed(self, chunk: str) -> bool:
+        """더 해석할 필요가 없으면(complete 또는 invalid) True"""
+        for ch in chunk:
+            if self.complete or self.invalid:
+                break
+            if not self.started:
+                if ch.isspace():
+                    continue
+                if ch != "{":
+                    self.invalid = True
+                    break
+                self.started = True
+            self._buf.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+        return self.complete or self.invalid
+
+    def value(self) -> Optional[dict]:
+        if not self.complete:
+            return None
+        try:
+            v = json.loads("".join(self._buf))
+        except ValueError:
+            return None
+        return v if isinstance(v, dict) else None
+
+def _validate_classification(obj) -> Optional[dict]:
+    """스키마(tags: 문자열 배열, review/time_complexity: 문자열)를 만족하면 정규화한 dict, 아니면 None"""
+    if not isinstance(obj, dict):
+        return None
+    tags, review, tc = obj.get("tags"), obj.get("review"), obj.get("time_complexity")
+    if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+        return None
+    if not isinstance(review, str) or not isinstance(tc, str):
+        return None
+    return {"tags": tags, "review": review, "time_complexity": tc}
+
+def _chat_completion_text(headers: dict, body: dict) -> tuple:
+    """/chat/completions 호출. (status_code, 응답 텍스트, 스트리밍이면 IncrementalJSONObject 아니면 None)"""
+    url = f"{OPENAI_BASE_URL}/chat/completions"
+    if not body.get("stream"):
+        r = http_request("POST", url, headers=headers, json=body, timeout=30)
+        try:
+            data = r.json()
+            record_usage(data.get("usage"))
+            text = data["choices"][0]["message"]["content"]
+        except Exception as e:
+            print("[ERROR] OpenAI response parse failed:", e, (r.text or "")[:1000])
+            text = r.text or ""
+        return r.status_code, text, None
+
+    t0 = time.perf_counter()
+    r = http_request("POST", url, headers=headers, json=body, timeout=30, stream=True)
+    if r.status_code != 200:
+        return r.status_code, r.text or "", None
+    r.encoding = "utf-8"  # text/event-stream 에 charset 이 없으면 requests 가 latin-1 로 읽음
+    parser = IncrementalJSONObject()
+    parts = []
+    first = True
+    try:
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+                record_usage(chunk.get("usage"))
+                delta = chunk["choices"][0].get("delta", {}).get("content") or ""
+            except (ValueError, KeyError, IndexError, AttributeError):
+                continue
+            if first and delta:
+                METRICS.observe("openai.first_token", time.perf_counter() - t0)
+                first = False
+            parts.append(delta)
+            # 객체가 닫힌 뒤에는 해석하지 않고 [DONE] 까지 흘려보냄 (연결을 풀로 돌려주기 위해)
+            parser.feed(delta)
+    finally:
+        r.close()
+    return r.status_code, "".join(parts), parser
+
+def _classification_from_text(last_text: str) -> Optional[dict]:
+    """
+    모델 응답 텍스트에서 분류 JSON 을 찾아 {"tags","review","time_complexity"} 로 변환.
+    코드펜스 안 -> 전체 텍스트 -> 정제 후 첫 중괄호 블록 순서로 시도하고, 모두 실패하면 None
+    """
+    # 0) 코드펜스 내부 JSON 시도
+    try:
+        code_blocks = _extract_code_fence_jsons(last_text)
+        for block in code_blocks:
+            # 앞에 'json' 키워드가 붙어있거나 주석/설명일 수 있으니, 가능한 경우 JSON 파싱 시도
+            candidate = block.strip()
+            # 어떤 경우에 'json\n{...}' 처럼 줄바꿈 포함될 수 있으니 'json' 접두어 제거
+            candidate = re.sub(r'^\s*json\s*', '', candidate, flags=re.IGNORECASE).strip()
+            try:
+                parsed = json.loads(candidate)
+                if isinstance(parsed, dict):
+                    # 성공적으로 JSON 파싱됨 -> 정상 반환
+                    _record_parse_path("code_fence")
+                    return {
+                        "tags": parsed.get("tags", []) if isinstance(parsed.get("tags", []), list) else [],
+                        "review": str(parsed.get("review", "")),
+                        "time_complexity": str(parsed.get("time_complexity", ""))
+                    }
+            except Exception:
+                # 다음 블록 시도
+                continue
+    except Exception as e:
+        print("[WARN] code-fence JSON extraction failed:", e)
+
+    # 1) 전체 텍스트가 JSON일 가능성
+    try:
+        parsed = json.loads(last_text)
+        if isinstance(parsed, dict):
+            _record_parse_path("full_text")
+            return {
+                "tags": parsed.get("tags", []) if isinstance(parsed.get("tags", []), list) else [],
+                "review": str(parsed.get("review", "")),
+                "time_complexity": str(parsed.get("time_complexity", ""))
+            }
+    except Exception:
+        pass
+
+    # 2) 정제 후 중괄호 블록 추출
+    stripped = _strip_code_fences_and_trailing(last_text)
+    candidate = _extract_first_json_block(stripped)
+    if candidate:
+        try:
+            parsed = json.loads(candidate)
+            result = {
+                "tags": parsed.get("tags", []) if isinstance(parsed.get("tags", []), list) else [],
+                "review": str(parsed.get("review", ""))[:1200],
+                "time_complexity": str(parsed.get("time_complexity", ""))[:200]
+            }
+            _record_parse_path("brace_block")
+            return result
+        except Exception as e:
+            print("[WARN] extracted JSON parse failed:", e, candidate[:800])
+    return None
+
+def classify_with_openai(code: str, problem_text: str = "", max_retries: int = 1, language: str = "") -> dict:
+    """
+    code: 코드 문자열
+    problem_text: (옵션) README에서 추출한 문제 설명을 문자열로 전달
+    language: (옵션) 예산을 넘을 때 주석 제거 방식을 고르는 데 사용 (ext_to_language 값)
+    반환: {"tags":[...], "review": "...", "time_complexity": "..."}
+    """
+    if not OPENAI_API_KEY:
+        return {"tags": [], "review": "no api key", "time_complexity": ""}
+
+    # 엄격한 JSON 출력 요구 + few-shot(짧게) -> system prefix, 문제 설명/코드는 예산 안으로 줄여서 user 메시지
+    messages = build_classify_messages(code, problem_text, language)
+
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
-    body = {"model": OPENAI_MODEL, "messages": [{"role": "user", "content": prompt}], "temperature": 0}
+    body = _apply_output_mode({"model": OPENAI_MODEL, "messages": messages, "temperature": 0})
 
     attempt = 0
     last_text = ""
     while True:
         attempt += 1
+        t0 = time.perf_counter()
         try:
-            r = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=body, timeout=30)
+            status, last_text, stream_parser = _chat_completion_text(headers, body)
         except Exception as e:
             print("[ERROR] OpenAI request exception:", e)
             return {"tags": [], "review": f"OpenAI request exception: {e}", "time_complexity": ""}
+        _record_openai_call(time.perf_counter() - t0)
 
-        print("[OpenAI] status_code:", r.status_code)
-        try:
-            last_text = r.json()["choices"][0]["message"]["content"]
-        except Exception as e:
-            print("[ERROR] OpenAI response parse failed:", e, (r.text or "")[:1000])
-            last_text = r.text or ""
-
-        # 0) 코드펜스 내부 JSON 시도
-        try:
-            code_blocks = _extract_code_fence_jsons(last_text)
-            for block in code_blocks:
-                # 앞에 'json' 키워드가 붙어있거나 주석/설명일 수 있으니, 가능한 경우 JSON 파싱 시도
-                candidate = block.strip()
-                # 어떤 경우에 'json\n{...}' 처럼 줄바꿈 포함될 수 있으니 'json' 접두어 제거
-                candidate = re.sub(r'^\s*json\s*', '', candidate, flags=re.IGNORECASE).strip()
+        print("[OpenAI] status_code:", status)
+        if OPENAI_STRUCTURED and status == 200:
+            # 스키마 고정 응답: 스트리밍 파서가 닫힌 객체를 찾았으면 그것을, 아니면 전체 텍스트를 한 번만 해석
+            if stream_parser is not None:
+                obj = stream_parser.value()
+            else:
                 try:
-                    parsed = json.loads(candidate)
-                    if isinstance(parsed, dict):
-                        # 성공적으로 JSON 파싱됨 -> 정상 반환
-                        return {
-                            "tags": parsed.get("tags", []) if isinstance(parsed.get("tags", []), list) else [],
-                            "review": str(parsed.get("review", "")),
-                            "time_complexity": str(parsed.get("time_complexity", ""))
-                        }
-                except Exception:
-                    # 다음 블록 시도
-                    continue
-        except Exception as e:
-            print("[WARN] code-fence JSON extraction failed:", e)
-
-        # 1) 전체 텍스트가 JSON일 가능성
-        try:
-            parsed = json.loads(last_text)
-            if isinstance(parsed, dict):
-                return {
-                    "tags": parsed.get("tags", []) if isinstance(parsed.get("tags", []), list) else [],
-                    "review": str(parsed.get("review", "")),
-                    "time_complexity": str(parsed.get("time_complexity", ""))
-                }
-        except Exception:
-            pass
-            
-        # 2) 정제 후 중괄호 블록 추출
-        stripped = _strip_code_fences_and_trailing(last_text)
-        candidate = _extract_first_json_block(stripped)
-        if candidate:
-            try:
-                parsed = json.loads(candidate)
-                return {
-                    "tags": parsed.get("tags", []) if isinstance(parsed.get("tags", []), list) else [],
-                    "review": str(parsed.get("review", ""))[:1200],
-                    "time_complexity": str(parsed.get("time_complexity", ""))[:200]
-                }
-            except Exception as e:
-                print("[WARN] extracted JSON parse failed:", e, candidate[:800])
+                    obj = json.loads(last_text)
+                except ValueError:
+                    obj = None
+            result = _validate_classification(obj)
+            if result is not None:
+                _record_parse_path("structured")
+                return result
+            print("[WARN] structured output did not match the schema -> falling back to text extraction")
+
+        with METRICS.span("openai.json_extract"):
+            result = _classification_from_text(last_text)
+        if result is not None:
+            return result
 
         # 3) 재시도(모델에게 '오직 JSON만' 재요청) — 최대 max_retries 번만
         if attempt <= max_retries:
@@ -392,12 +1604,15 @@ def classify_with_openai(code: str, problem_text: str = "", max_retries: int = 1
                 f"RESPONSE:\n{last_text}\n\n"
                 '스키마: {"tags": [..], "review": "..", "time_complexity": ".."}'
             )
-            body = {"model": OPENAI_MODEL, "messages":[{"role":"user","content": retry_prompt}], "temperature": 0}
+            body = _apply_output_mode({"model": OPENAI_MODEL, "messages": [{"role": "user", "content": retry_prompt}],
+                                       "temperature": 0})
+            _record_parse_path("retry")
             time.sleep(0.3)
             continue
 
         # 4) 최종 fallback
         print("[WARN] Failed to obtain strict JSON from OpenAI; returning fallback")
+        _record_parse_path("fallback_text")
         # 코드펜스가 있다면 내부 텍스트를 추출해서 가능한 한 깔끔하게 만듦
         extracted_text = last_text
         # 제거: ```와 같은 코드펜스 마커만 제거하되 안의 내용은 남김
@@ -409,78 +1624,802 @@ def classify_with_openai(code: str, problem_text: str = "", max_retries: int = 1
         return {"tags": [], "review": extracted_text[:1000], "time_complexity": ""}
 
 # -------------------
-# Notion helper: DB schema, wrapping values, create page
+# 로컬 사전 분류 (ast): 짧은 파이썬 풀이는 태그/시간복잡도를 직접 추정하고 LLM 호출을 건너뜀
 # -------------------
-_DB_SCHEMA_CACHE = None
+# 호출 이름(마지막 속성 이름 또는 모듈.함수) -> 태그
+_CALL_TAGS = {
+    "sorted": "정렬", "sort": "정렬",
+    "Counter": "해시", "defaultdict": "해시", "dict": "해시", "set": "해시",
+    "accumulate": "누적 합",
+    "heappush": "우선순위 큐", "heappop": "우선순위 큐", "heapify": "우선순위 큐",
+    "bisect_left": "이분 탐색", "bisect_right": "이분 탐색", "bisect": "이분 탐색",
+    "deque": "큐",
+    "permutations": "브루트포스", "combinations": "브루트포스", "product": "브루트포스",
+    "gcd": "수학", "lcm": "수학", "sqrt": "수학", "factorial": "수학",
+    "upper": "문자열", "lower": "문자열", "replace": "문자열", "swapcase": "문자열",
+    "isalpha": "문자열", "isdigit": "문자열", "isupper": "문자열", "islower": "문자열",
+}
+# 입력 크기에 대해 선형/로그/n log n 인 내장 함수와 메서드
+# (split 은 입력 한 줄을 나누는 데 주로 쓰여 반복문 안에서도 n 에 비례하지 않으므로 제외)
+_LINEAR_CALLS = {"sum", "max", "min", "any", "all", "list", "tuple", "set", "dict", "Counter", "join", "count",
+                 "index", "replace", "reverse", "reversed", "accumulate", "heapify", "deque"}
+_LOG_CALLS = {"heappush", "heappop", "bisect_left", "bisect_right", "bisect", "insort"}
+_SORT_CALLS = {"sorted", "sort"}
+# 입력 크기로 비용을 정할 수 없는 호출 (지수/조합) -> 로컬 분석으로 끝내지 않음
+_UNBOUNDED_CALLS = {"permutations", "combinations", "product", "combinations_with_replacement"}
+
+def _call_name(func) -> str:
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return ""
+
+def _is_halving(node) -> bool:
+    """while 본문에 x //= 2, x >>= 1, x = x // k 같은 축소가 있으면 로그 반복으로 봄"""
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.AugAssign) and isinstance(sub.op, (ast.FloorDiv, ast.RShift, ast.Div)):
+            return True
+        if isinstance(sub, ast.Assign) and isinstance(sub.value, ast.BinOp) \
+                and isinstance(sub.value.op, (ast.FloorDiv, ast.RShift)):
+            return True
+    return False
+
+class SourceAnalyzer(ast.NodeVisitor):
+    """
+    파이썬 풀이 하나를 훑으며
+    - tags: 정렬/해시/누적 합/재귀 등 (호출 이름과 자료구조 리터럴, 점화식 패턴으로 판단)
+    - cost: (n 지수, log 지수) — 반복 중첩 깊이 + 그 안에서 부르는 내장 함수 비용의 최댓값
+    - score: 문장 수 + 반복문 수 + 분기 수 (로컬 결과를 믿을지 정하는 기준)
+    를 모읍니다. 재귀나 조합 생성처럼 비용을 정할 수 없으면 bounded 가 False
+    """
+    def __init__(self):
+        self.tags = []
+        self.cost = (0, 0)
+        self.score = 0
+        self.bounded = True
+        self._depth = (0, 0)
+        self._funcs = []
+
+    def _tag(self, tag: str):
+        if tag not in self.tags:
+            self.tags.append(tag)
+
+    def _charge(self, n: int = 0, log: int = 0):
+        cost = (self._depth[0] + n, self._depth[1] + log)
+        if cost > self.cost:
+            self.cost = cost
+
+    def _nested(self, nodes, n: int = 1, log: int = 0):
+        saved = self._depth
+        self._depth = (saved[0] + n, saved[1] + log)
+        self._charge()
+        for node in nodes:
+            self.visit(node)
+        self._depth = saved
+
+    def generic_visit(self, node):
+        if isinstance(node, ast.stmt):
+            self.score += 1
+        super().generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        self.score += 1
+        self._funcs.append(node.name)
+        for stmt in node.body:
+            self.visit(stmt)
+        self._funcs.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self.visit(node.body)
+
+    def visit_For(self, node):
+        self.score += 2
+        self.visit(node.iter)
+        self._nested(node.body + node.orelse)
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node):
+        self.score += 2
+        self.visit(node.test)
+        if _is_halving(node):
+            self._nested(node.body + node.orelse, n=0, log=1)
+        else:
+            self._nested(node.body + node.orelse)
+
+    def visit_If(self, node):
+        self.score += 1
+        self.generic_visit(node)
+
+    def _comprehension(self, node, elts):
+        saved = self._depth
+        for gen in node.generators:
+            self.visit(gen.iter)
+            self._depth = (self._depth[0] + 1, self._depth[1])
+            self._charge()
+            for cond in gen.ifs:
+                self.visit(cond)
+        for elt in elts:
+            self.visit(elt)
+        self._depth = saved
+
+    def visit_ListComp(self, node):
+        self._comprehension(node, [node.elt])
+
+    visit_GeneratorExp = visit_ListComp
+
+    def visit_SetComp(self, node):
+        self._tag("해시")
+        self._comprehension(node, [node.elt])
+
+    def visit_DictComp(self, node):
+        self._tag("해시")
+        self._comprehension(node, [node.key, node.value])
+
+    def visit_Dict(self, node):
+        if node.keys:
+            self._tag("해시")
+        self.generic_visit(node)
+
+    def visit_Set(self, node):
+        self._tag("해시")
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        # a[i] = a[i-1] + x 형태 -> 누적 합(점화식)
+        target = node.targets[0] if len(node.targets) == 1 else None
+        if isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name) \
+                and isinstance(node.value, ast.BinOp) and isinstance(node.value.op, ast.Add):
+            for side in (node.value.left, node.value.right):
+                if isinstance(side, ast.Subscript) and isinstance(side.value, ast.Name) \
+                        and side.value.id == target.value.id:
+                    self._tag("누적 합")
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        name = _call_name(node.func)
+        # obj.solve() 처럼 속성으로 부른 것은 같은 이름의 다른 함수일 수 있으므로 그냥 이름으로 부른 것만 재귀로 봄
+        if isinstance(node.func, ast.Name) and name in self._funcs:
+            self._tag("재귀")
+            self.bounded = False
+        if name in _UNBOUNDED_CALLS:
+            self.bounded = False
+        if name in _CALL_TAGS:
+            self._tag(_CALL_TAGS[name])
+        if name in _SORT_CALLS:
+            self._charge(1, 1)
+        elif name in _LOG_CALLS:
+            self._charge(0, 1)
+        elif name in _LINEAR_CALLS and (node.args or isinstance(node.func, ast.Attribute)):
+            self._charge(1, 0)
+        self.generic_visit(node)
+
+def format_complexity(cost: tuple) -> str:
+    """(n 지수, log 지수) -> "O(n^2 log n)" 형식"""
+    n, log = cost
+    parts = []
+    if n:
+        parts.append("n" if n == 1 else f"n^{n}")
+    if log:
+        parts.append("log n" if log == 1 else f"log^{log} n")
+    return f"O({' '.join(parts) or '1'})"
+
+def analyze_python_source(code: str) -> Optional[dict]:
+    """{"tags", "time_complexity", "score", "bounded"} (구문 오류면 None)"""
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    analyzer = SourceAnalyzer()
+    analyzer.visit(tree)
+    return {"tags": analyzer.tags or ["구현"], "time_complexity": format_complexity(analyzer.cost),
+            "score": analyzer.score, "bounded": analyzer.bounded}
 
-def get_database_schema():
-    global _DB_SCHEMA_CACHE
-    if _DB_SCHEMA_CACHE is not None:
-        return _DB_SCHEMA_CACHE
-    if not NOTION_TOKEN or not NOTION_DB_ID:
-        print("[WARN] Notion creds missing - cannot fetch DB schema")
-        return {}
-    url = f"https://api.notion.com/v1/databases/{NOTION_DB_ID}"
-    headers = {"Authorization": f"Bearer {NOTION_TOKEN}", "Notion-Version": "2022-06-28"}
+_LOCAL_STATS = {"local": 0}
+
+def local_classify(code: str, language: str) -> Optional[dict]:
+    """점수가 LOCAL_CLASSIFY_MAX_SCORE 이하인 파이썬 풀이면 LLM 없이 분류 결과를 만듦, 아니면 None"""
+    if LOCAL_CLASSIFY_MAX_SCORE <= 0 or language != "python":
+        return None
+    info = analyze_python_source(code)
+    if info is None or not info["bounded"] or info["score"] > LOCAL_CLASSIFY_MAX_SCORE:
+        return None
+    with _CACHE_LOCK:
+        _LOCAL_STATS["local"] += 1
+    METRICS.incr("classify_local")
+    print(f"[LOCAL] classified without LLM (score {info['score']}): {info['tags']} {info['time_complexity']}")
+    return {"tags": info["tags"], "time_complexity": info["time_complexity"],
+            "review": f"짧은 풀이라 로컬 분석으로 분류했습니다 (문장/반복/분기 점수 {info['score']})."}
+
+# SQL 풀이는 키워드로 분류 (태그 이름은 프로그래머스 SQL 고득점 Kit 분류를 따름)
+_SQL_COMMENT_RE = re.compile(r"--[^\n]*|/\*[\s\S]*?\*/")
+_SQL_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_SQL_KEYWORD_TAGS = [
+    (re.compile(r"\bjoin\b", re.IGNORECASE), "JOIN"),
+    (re.compile(r"\bgroup\s+by\b", re.IGNORECASE), "GROUP BY"),
+    (re.compile(r"\b(?:sum|max|min|avg|count)\s*\(", re.IGNORECASE), "SUM, MAX, MIN"),
+    (re.compile(r"\bis\s+(?:not\s+)?null\b|\b(?:ifnull|coalesce|nvl)\s*\(", re.IGNORECASE), "IS NULL"),
+    (re.compile(r"\b(?:date_format|datediff|year|month|day|to_char|substr|substring|concat|replace|left|right)\s*\(|\blike\b",
+                re.IGNORECASE), "String, Date"),
+    (re.compile(r"\(\s*select\b", re.IGNORECASE), "서브쿼리"),
+    (re.compile(r"\bover\s*\(", re.IGNORECASE), "윈도우 함수"),
+    (re.compile(r"\bwith\s+(?:recursive\s+)?\w+\s+as\s*\(", re.IGNORECASE), "WITH"),
+]
+
+def classify_sql(code: str) -> dict:
+    """주석/문자열을 뺀 SQL 에서 키워드를 찾아 태그로 (아무것도 없으면 SELECT)"""
+    text = _SQL_STRING_RE.sub("''", _SQL_COMMENT_RE.sub(" ", code))
+    tags = [tag for pattern, tag in _SQL_KEYWORD_TAGS if pattern.search(text)] or ["SELECT"]
+    METRICS.incr("classify_sql")
+    print(f"[SQL] classified by keywords: {tags}")
+    return {"tags": tags, "time_complexity": "", "review": "SQL 풀이라 키워드로 분류했습니다."}
+
+# -------------------
+# 분류 결과 캐시 (정규화된 코드 + 문제 설명 + 모델 + 프롬프트 버전의 해시를 키로 사용)
+# -------------------
+_CACHE_STATS = {"hits": 0, "misses": 0, "stores": 0}
+_CACHE_LOCK = threading.Lock()
+
+def _normalize_code(code: str) -> str:
+    """줄바꿈 통일, 줄 끝 공백/빈 줄 제거 -> 공백만 바뀐 수정은 같은 키가 됨"""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(ln.rstrip() for ln in lines if ln.strip())
+
+def classification_cache_key(code: str, problem_text: str = "") -> str:
+    raw = json.dumps([_normalize_code(code), (problem_text or "").strip(), OPENAI_MODEL, PROMPT_VERSION],
+                     ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _cache_path(key: str) -> str:
+    # 한 디렉터리에 파일이 너무 많아지지 않도록 앞 2글자로 나눔
+    return os.path.join(CLASSIFY_CACHE_DIR, key[:2], key + ".json")
+
+def cache_get(key: str) -> Optional[dict]:
+    if not CLASSIFY_CACHE_DIR:
+        return None
+    path = _cache_path(key)
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-    except Exception as e:
-        print("[ERROR] get_database_schema request exception:", e)
-        return {}
-    if r.status_code != 200:
-        print("[WARN] get_database_schema failed:", r.status_code, r.text[:1000])
-        return {}
-    data = r.json()
-    props = data.get("properties", {})
-    _DB_SCHEMA_CACHE = props
-    print("[Notion] DB schema fetched. properties:", list(props.keys()))
-    return props
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        os.utime(path)  # LRU: 최근 사용 시각 갱신
+    except OSError:
+        pass
+    return result
 
-def _wrap_value_for_property(prop_schema: dict, value):
-    ptype = prop_schema.get("type")
-    if ptype == "title":
-        return {"title": [{"text": {"content": str(value)}}]}
-    if ptype == "rich_text":
-        return {"rich_text": [{"type": "text", "text": {"content": str(value)}}]}
-    if ptype == "select":
-        return {"select": {"name": str(value)}}
-    if ptype == "multi_select":
-        if isinstance(value, (list, tuple)):
-            return {"multi_select": [{"name": str(v)} for v in value]}
-        else:
-            return {"multi_select": [{"name": str(value)}]}
-    if ptype == "url":
-        return {"url": str(value)}
-    if ptype == "number":
+def cache_put(key: str, result: dict):
+    if not CLASSIFY_CACHE_DIR:
+        return
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({k: result.get(k) for k in ("tags", "review", "time_complexity")}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def prune_classification_cache():
+    """항목 수가 CLASSIFY_CACHE_MAX_ENTRIES 를 넘으면 가장 오래 안 쓴 것부터 삭제"""
+    if not CLASSIFY_CACHE_DIR or not os.path.isdir(CLASSIFY_CACHE_DIR):
+        return
+    entries = []
+    for root, _dirs, names in os.walk(CLASSIFY_CACHE_DIR):
+        for n in names:
+            if n.endswith(".json"):
+                full = os.path.join(root, n)
+                try:
+                    entries.append((os.path.getmtime(full), full))
+                except OSError:
+                    pass
+    overflow = len(entries) - CLASSIFY_CACHE_MAX_ENTRIES
+    if overflow <= 0:
+        return
+    entries.sort()
+    for _mtime, full in entries[:overflow]:
         try:
-            return {"number": float(value)}
-        except Exception:
-            return {"number": None}
-    if ptype == "checkbox":
-        return {"checkbox": bool(value)}
-    if ptype == "date":
-        return {"date": {"start": str(value)}}
-    if ptype == "people":
-        return {"people": []}
-    return {"rich_text": [{"type": "text", "text": {"content": str(value)}}]}
+            os.remove(full)
+        except OSError:
+            pass
+    print(f"[CACHE] evicted {overflow} entries (max {CLASSIFY_CACHE_MAX_ENTRIES})")
 
-def create_notion_page(meta: dict):
+def classify_cached(code: str, problem_text: str = "", language: str = "") -> dict:
     """
-    meta: {
-      title, platform, tags(list), difficulty, language, url,
-      problem_text, classification_text, review, time_complexity,
-      perf_memory, perf_time, code_snippet
-    }
-    DB 스키마에 따라 properties를 안전하게 포장하고,
-    children에 problem_text/classification_text/review/perf/code를 추가합니다.
+    짧은 파이썬 풀이는 로컬 분석 결과, 캐시에 있으면 그대로 반환(토큰/지연 0),
+    없으면 classify_with_openai 후 성공한 결과만 저장
     """
-    if not NOTION_TOKEN or not NOTION_DB_ID:
-        print("[WARN] Notion creds missing, skipping create")
+    local = local_classify(code, language)
+    if local is not None:
+        return local
+    key = classification_cache_key(code, problem_text)
+    cached = cache_get(key)
+    if cached is not None:
+        with _CACHE_LOCK:
+            _CACHE_STATS["hits"] += 1
+        print("[CACHE] classification hit:", key[:12])
+        return cached
+    with _CACHE_LOCK:
+        _CACHE_STATS["misses"] += 1
+    result = classify_with_openai(code, problem_text=problem_text, language=language)
+    # 실패/폴백 응답(태그와 복잡도가 모두 비어 있음)은 저장하지 않음
+    if result.get("tags") or result.get("time_complexity"):
+        cache_put(key, result)
+        with _CACHE_LOCK:
+            _CACHE_STATS["stores"] += 1
+    return result
+
+# -------------------
+# 배치 분류 (N개 풀이를 한 요청에 담고 path 별 JSON 배열로 받음)
+# -------------------
+_BATCH_INSTRUCTIONS = """
+당신은 코딩테스트 풀이 코드를 보고 알고리즘 태그와 간단한 코드리뷰를 JSON으로 반환하는 도우미입니다.
+아래에 여러 개의 풀이가 "=== path: ..." 구분선과 함께 주어집니다.
+**중요**: 절대 다른 텍스트를 출력하지 말고, 오직 하나의 JSON 배열만 출력하세요. 배열의 각 원소는 풀이 하나에 대응하며 형식은 정확히 아래와 같습니다.
+path 는 입력에 주어진 값을 그대로 복사하세요.
+
+원소 스키마:
+{"path": "입력의 path", "tags": ["DP","그리디"], "review": "코드에 대한 간단한 리뷰(한두 문장)", "time_complexity": "O(n)"}
+
+각 풀이의 문제 설명(있으면)과 코드를 참고하여 태그와 리뷰를 작성하세요.
+"""
+
+# OPENAI_STRUCTURED 일 때 배치 응답 스키마. json_schema 의 최상위는 객체여야 하므로 배열을 items 로 감쌈
+_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": dict(path={"type": "string"}, **_CLASSIFICATION_SCHEMA["properties"]),
+                "required": ["path"] + _CLASSIFICATION_SCHEMA["required"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["items"],
+    "additionalProperties": False,
+}
+
+_BATCH_STATS = {"batches": 0, "items": 0, "answered": 0, "tokens_saved": 0}
+_BATCH_LOCK = threading.Lock()
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수: ASCII 는 4글자당 1토큰, 한글 등 그 외 문자는 1글자당 1토큰"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+def _batch_item_text(path: str, code: str, problem_text: str) -> str:
+    """배치 항목 하나 (파일별 요청과 같은 예산으로 문제 설명/코드를 줄임)"""
+    content, _parts, _trimmed = _classify_user_content(code, problem_text, ext_to_language(path))
+    return f"=== path: {path}\n{content}"
+
+def plan_batches(items: List[tuple]) -> List[List[tuple]]:
+    """
+    items: [(path, code, problem_text), ...]
+    OPENAI_BATCH_SIZE 개수와 OPENAI_BATCH_MAX_TOKENS 토큰 예산을 넘지 않도록 순서대로 묶습니다.
+    혼자서도 예산을 넘는 항목은 배치에서 빼고(파일별 요청으로 처리) 반환하지 않습니다.
+    """
+    budget = OPENAI_BATCH_MAX_TOKENS - estimate_tokens(_BATCH_INSTRUCTIONS)
+    batches: List[List[tuple]] = []
+    cur: List[tuple] = []
+    used = 0
+    for item in items:
+        cost = estimate_tokens(_batch_item_text(*item))
+        if cost > budget:
+            print(f"[BATCH] {item[0]} too large for a batch (~{cost} tokens) -> per-file request")
+            continue
+        if cur and (len(cur) >= OPENAI_BATCH_SIZE or used + cost > budget):
+            batches.append(cur)
+            cur, used = [], 0
+        cur.append(item)
+        used += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+def _parse_json_array(text: str) -> Optional[list]:
+    """코드펜스 안 / 전체 텍스트 / 첫 '[' ~ 마지막 ']' 순서로 JSON 배열 파싱 시도"""
+    candidates = _extract_code_fence_jsons(text) + [text]
+    start, end = text.find('['), text.rfind(']')
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+    for c in candidates:
+        c = re.sub(r'^\s*json\s*', '', c.strip(), flags=re.IGNORECASE)
+        try:
+            parsed = json.loads(c)
+        except Exception:
+            continue
+        if isinstance(parsed, list):
+            return parsed
+    return None
+
+def classify_batch(items: List[tuple]) -> dict:
+    """
+    items 를 한 번의 chat-completion 요청으로 분류합니다.
+    반환: {path: {"tags", "review", "time_complexity"}} — 응답에 빠진 path 는 포함되지 않음
+    """
+    if not OPENAI_API_KEY or not items:
+        return {}
+    item_texts = [_batch_item_text(*it) for it in items]
+    record_prompt_tokens(_BATCH_INSTRUCTIONS, {"items": sum(estimate_tokens(t) for t in item_texts)}, [])
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
+    # 배치 지시문도 system 메시지로 고정 prefix
+    body = {"model": OPENAI_MODEL, "messages": [{"role": "system", "content": _BATCH_INSTRUCTIONS},
+                                                {"role": "user", "content": "\n".join(item_texts)}],
+            "temperature": 0}
+    if OPENAI_STRUCTURED:
+        # 스트리밍은 쓰지 않음: 배치 응답은 전부 받은 뒤에야 항목별로 나눌 수 있음
+        body["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "classification_batch", "strict": True, "schema": _BATCH_SCHEMA},
+        }
+    t0 = time.perf_counter()
+    try:
+        r = http_request("POST", f"{OPENAI_BASE_URL}/chat/completions", headers=headers, json=body,
+                         timeout=30 + 10 * len(items))
+    except Exception as e:
+        print("[ERROR] OpenAI batch request exception:", e)
+        return {}
+    _record_openai_call(time.perf_counter() - t0)
+    print(f"[OpenAI] batch of {len(items)} status_code:", r.status_code)
+    try:
+        data = r.json()
+        record_usage(data.get("usage"))
+        text = data["choices"][0]["message"]["content"]
+    except Exception as e:
+        print("[ERROR] OpenAI batch response parse failed:", e, (r.text or "")[:1000])
+        return {}
+
+    arr = None
+    if OPENAI_STRUCTURED:
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict) and isinstance(obj.get("items"), list):
+            arr = obj["items"]
+            _record_parse_path("structured_batch")
+        else:
+            print("[WARN] structured batch output did not match the schema -> falling back to text extraction")
+    if arr is None:
+        arr = _parse_json_array(text) or []
+    wanted = {it[0] for it in items}
+    results = {}
+    for obj in arr:
+        if not isinstance(obj, dict) or obj.get("path") not in wanted:
+            continue
+        results[obj["path"]] = {
+            "tags": obj.get("tags", []) if isinstance(obj.get("tags", []), list) else [],
+            "review": str(obj.get("review", ""))[:1200],
+            "time_complexity": str(obj.get("time_complexity", ""))[:200]
+        }
+    missing = wanted - set(results)
+    if missing:
+        print(f"[BATCH] {len(missing)} item(s) missing from batch response -> per-file fallback")
+    with _BATCH_LOCK:
+        _BATCH_STATS["batches"] += 1
+        _BATCH_STATS["items"] += len(items)
+        _BATCH_STATS["answered"] += len(results)
+        # 배치로 답을 받은 항목마다 파일별 요청에서 반복됐을 지시문 토큰을 아낌 (배치 지시문 1회분은 제외).
+        # 답이 없거나 하나뿐인 배치는 아낀 것이 없으므로 음수로 깎지 않음
+        _BATCH_STATS["tokens_saved"] += max(0, len(results) * estimate_tokens(_CLASSIFY_INSTRUCTIONS)
+                                            - estimate_tokens(_BATCH_INSTRUCTIONS))
+    return results
+
+def classify_targets_batched(items: List[tuple], concurrency: int = 1) -> dict:
+    """
+    캐시를 먼저 확인하고, 캐시에 없는 항목만 배치로 분류해서 캐시에 저장합니다.
+    반환: {path: result} (배치 응답에서 빠진 항목은 없음 -> 호출 측에서 파일별로 처리)
+    """
+    results = {}
+    pending = []
+    for path, code, problem_text in items:
+        local = local_classify(code, ext_to_language(path))
+        if local is not None:
+            results[path] = local
+            continue
+        cached = cache_get(classification_cache_key(code, problem_text))
+        if cached is not None:
+            with _CACHE_LOCK:
+                _CACHE_STATS["hits"] += 1
+            results[path] = cached
+        else:
+            pending.append((path, code, problem_text))
+    batches = plan_batches(pending)
+    if not batches:
+        return results
+    print(f"[BATCH] {len(pending)} item(s) -> {len(batches)} batch request(s)")
+    by_path = {it[0]: it for it in pending}
+    labels = [f"batch {i + 1} ({len(b)} files)" for i, b in enumerate(batches)]
+    by_label = dict(zip(labels, batches))
+    # 배치 요청도 파일 처리와 같은 워커 풀로 돌려서 로그가 배치 단위로 묶이게 함
+    done = run_file_pool(labels, lambda lb: {"path": lb, "status": "ok", "results": classify_batch(by_label[lb])},
+                         concurrency)
+    for d in done:
+        for path, res in d["results"].items():
+            results[path] = res
+            _path, code, problem_text = by_path[path]
+            if res.get("tags") or res.get("time_complexity"):
+                cache_put(classification_cache_key(code, problem_text), res)
+                with _CACHE_LOCK:
+                    _CACHE_STATS["stores"] += 1
+    return results
+
+def print_batch_summary():
+    if not _BATCH_STATS["batches"]:
         return
+    saved_requests = _BATCH_STATS["answered"] - _BATCH_STATS["batches"]
+    avg = _OPENAI_STATS["seconds"] / _OPENAI_STATS["requests"] if _OPENAI_STATS["requests"] else 0.0
+    print(f"[BATCH] batches: {_BATCH_STATS['batches']} items: {_BATCH_STATS['items']} "
+          f"answered: {_BATCH_STATS['answered']} requests saved: {saved_requests} "
+          f"tokens saved(est): {_BATCH_STATS['tokens_saved']} "
+          f"seconds saved(est): {max(0, saved_requests) * avg:.1f}")
+
+# -------------------
+# Notion helper: DB schema, wrapping values, create page
+# -------------------
+# 값 -> property 포장 함수. type 별로 한 번 골라두고 페이지마다 재사용
+def _wrap_title(value):
+    return {"title": [{"text": {"content": str(value)}}]}
+
+def _wrap_rich_text(value):
+    return {"rich_text": [{"type": "text", "text": {"content": str(value)}}]}
+
+def _wrap_select(value):
+    return {"select": {"name": str(value)}}
+
+def _wrap_multi_select(value):
+    if isinstance(value, (list, tuple)):
+        return {"multi_select": [{"name": str(v)} for v in value]}
+    return {"multi_select": [{"name": str(value)}]}
+
+def _wrap_url(value):
+    return {"url": str(value)}
+
+def _wrap_number(value):
+    try:
+        return {"number": float(value)}
+    except Exception:
+        return {"number": None}
+
+def _wrap_checkbox(value):
+    return {"checkbox": bool(value)}
+
+def _wrap_date(value):
+    return {"date": {"start": str(value)}}
+
+def _wrap_people(value):
+    return {"people": []}
+
+_PROPERTY_WRAPPERS = {
+    "title": _wrap_title, "rich_text": _wrap_rich_text, "select": _wrap_select,
+    "multi_select": _wrap_multi_select, "url": _wrap_url, "number": _wrap_number,
+    "checkbox": _wrap_checkbox, "date": _wrap_date, "people": _wrap_people,
+}
+
+# 페이지에 쓰는 property (build_notion_page_body 의 mapping 과 같은 이름)
+PAGE_PROPERTIES = ("Name", "Platform", "Algorithm", "Difficulty", "Language", "URL")
+
+def _wrap_value_for_property(prop_schema: dict, value):
+    return _PROPERTY_WRAPPERS.get(prop_schema.get("type"), _wrap_rich_text)(value)
+
+def schema_fingerprint(props: dict) -> str:
+    """property 이름 -> type 만으로 만든 해시 (포장 방식이 달라지는 변경만 반영)"""
+    shape = sorted((name, p.get("type", "")) for name, p in props.items())
+    return hashlib.sha256(json.dumps(shape, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+class NotionSchemaCache:
+    """
+    DB 스키마(properties)를 NOTION_SCHEMA_CACHE_PATH 에 NOTION_SCHEMA_TTL 초 동안 보관합니다.
+    - 파일이 유효하면(같은 DB, TTL 이내, 지문 일치) 실행마다 하던 스키마 GET 을 생략
+    - 페이지 생성이 validation_error 로 실패했을 때만 revalidate() 로 다시 조회
+    - property 이름 -> 포장 함수 매핑은 스키마 지문마다 한 번만 만듦
+    """
+    def __init__(self, path: str, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        self.properties = None
+        self.fingerprint = ""
+        self._writers = {}   # fingerprint -> {property 이름: 포장 함수}
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        with self._lock:
+            if self.properties is None:
+                props = self._load_disk()
+                if props is None:
+                    props = self._fetch()
+                    if props is None:
+                        return {}
+                    self._save_disk(props)
+                self._use(props)
+            return self.properties
+
+    def writers(self) -> dict:
+        """PAGE_PROPERTIES 중 스키마에 있는 것들의 포장 함수 (스키마에 없는 property 는 한 번만 알림)"""
+        props = self.get()
+        with self._lock:
+            compiled = self._writers.get(self.fingerprint)
+            if compiled is None:
+                compiled = {}
+                for name in PAGE_PROPERTIES:
+                    if name not in props:
+                        print(f"[INFO] property '{name}' not found in DB schema - skipping")
+                        continue
+                    compiled[name] = _PROPERTY_WRAPPERS.get(props[name].get("type"), _wrap_rich_text)
+                self._writers[self.fingerprint] = compiled
+            return compiled
+
+    def revalidate(self, seen: str) -> bool:
+        """
+        seen(실패한 요청을 만들 때의 지문) 이후 스키마가 바뀌었으면 True (호출한 쪽에서 한 번 재시도)
+        다른 워커가 이미 다시 조회했으면 그 결과를 그대로 사용
+        """
+        with self._lock:
+            if self.fingerprint != seen:
+                return True
+            METRICS.incr("notion_schema_revalidations")
+            old = self.fingerprint
+            props = self._fetch()
+            if props is None:
+                return False
+            self._save_disk(props)
+            self._use(props)
+            changed = self.fingerprint != old
+        print(f"[Notion] schema revalidated: {'changed' if changed else 'unchanged'} ({self.fingerprint})")
+        return changed
+
+    def _use(self, props: dict):
+        self.properties = props
+        self.fingerprint = schema_fingerprint(props)
+
+    def _load_disk(self) -> Optional[dict]:
+        if not self.path:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        props = data.get("properties") or {}
+        age = time.time() - data.get("fetched_at", 0)
+        if data.get("database_id") != NOTION_DB_ID or age > self.ttl or data.get("fingerprint") != schema_fingerprint(props):
+            return None
+        print(f"[Notion] DB schema loaded from cache ({int(age)}s old). properties:", list(props.keys()))
+        return props
+
+    def _save_disk(self, props: dict):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"database_id": NOTION_DB_ID, "fetched_at": int(time.time()),
+                           "fingerprint": schema_fingerprint(props), "properties": props}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("[WARN] schema cache write failed:", e)
+
+    def _fetch(self) -> Optional[dict]:
+        if not NOTION_TOKEN or not NOTION_DB_ID:
+            print("[WARN] Notion creds missing - cannot fetch DB schema")
+            return None
+        url = f"{NOTION_API_URL}/databases/{NOTION_DB_ID}"
+        headers = {"Authorization": f"Bearer {NOTION_TOKEN}", "Notion-Version": "2022-06-28"}
+        try:
+            r = notion_request("GET", url, headers=headers, timeout=10)
+        except Exception as e:
+            print("[ERROR] get_database_schema request exception:", e)
+            return None
+        if r.status_code != 200:
+            print("[WARN] get_database_schema failed:", r.status_code, r.text[:1000])
+            return None
+        props = r.json().get("properties", {})
+        print("[Notion] DB schema fetched. properties:", list(props.keys()))
+        return props
+
+_SCHEMA = NotionSchemaCache(NOTION_SCHEMA_CACHE_PATH, NOTION_SCHEMA_TTL)
+
+def _is_validation_error(r: requests.Response) -> bool:
+    if r.status_code != 400:
+        return False
+    try:
+        return r.json().get("code") == "validation_error"
+    except ValueError:
+        return False
 
-    schema = get_database_schema()
-    properties_payload = {}
+# -------------------
+# Notion 본문 블록: 제한 크기로 나눠 만들고, 생성 요청에 못 담은 나머지는 append 로 이어 씀
+# -------------------
+NOTION_TEXT_LIMIT = 2000            # rich_text 조각 하나의 최대 글자 수
+NOTION_RICH_TEXT_ITEMS = 100        # 블록 하나의 rich_text 배열 최대 길이
+NOTION_CHILDREN_LIMIT = 100         # 요청 하나의 children 최대 개수
+NOTION_REQUEST_MAX_BYTES = 450000   # 요청 body 상한(500KB)에서 properties 몫을 남긴 값
 
+def split_rich_text(text: str, link: Optional[str] = None) -> List[dict]:
+    """
+    text 를 NOTION_TEXT_LIMIT 이하 rich_text 조각들로 나눔 (이어 붙이면 원문과 같음).
+    조각 뒤쪽 절반 안에 줄바꿈이 있으면 거기서 잘라서 코드가 줄 중간에서 끊기지 않게 함
+    """
+    segments = []
+    pos = 0
+    while pos < len(text):
+        end = min(len(text), pos + NOTION_TEXT_LIMIT)
+        if end < len(text):
+            nl = text.rfind("\n", pos + NOTION_TEXT_LIMIT // 2, end)
+            if nl != -1:
+                end = nl + 1
+        piece = {"content": text[pos:end]}
+        if link:
+            piece["link"] = {"url": link}
+        segments.append({"type": "text", "text": piece})
+        pos = end
+    return segments
+
+def text_blocks(block_type: str, text: str, link: Optional[str] = None, **extra) -> List[dict]:
+    """text 전체를 담는 block_type 블록 목록 (조각이 NOTION_RICH_TEXT_ITEMS 를 넘으면 블록을 이어서 나눔)"""
+    segments = split_rich_text(text, link)
+    blocks = []
+    for i in range(0, len(segments), NOTION_RICH_TEXT_ITEMS):
+        inner = {"rich_text": segments[i:i + NOTION_RICH_TEXT_ITEMS]}
+        inner.update(extra)
+        blocks.append({"object": "block", "type": block_type, block_type: inner})
+    return blocks
+
+def batch_children(children: List[dict]) -> List[List[dict]]:
+    """children 을 요청 하나에 들어갈 묶음들로 (개수 NOTION_CHILDREN_LIMIT, 크기 NOTION_REQUEST_MAX_BYTES 이하)"""
+    batches: List[List[dict]] = []
+    cur: List[dict] = []
+    size = 0
+    for block in children:
+        cost = len(json.dumps(block))  # requests 의 json= 과 같은 ASCII 직렬화 기준 바이트 수
+        if cur and (len(cur) >= NOTION_CHILDREN_LIMIT or size + cost > NOTION_REQUEST_MAX_BYTES):
+            batches.append(cur)
+            cur, size = [], 0
+        cur.append(block)
+        size += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+def append_children(block_id: str, batches: List[List[dict]], created: Optional[List[str]] = None) -> bool:
+    """
+    batches 를 순서대로 PATCH /blocks/{id}/children 으로 이어 붙임. created 를 주면 새로 생긴 블록 id 를 모음.
+    같은 부모에 동시에 보내면 도착 순서대로 붙어 본문 순서가 섞이므로 페이지 안에서는 순차로 보냄
+    (여러 페이지는 NotionPublisher 워커들이 병렬로 처리)
+    """
+    url = f"{NOTION_API_URL}/blocks/{block_id}/children"
+    for i, batch in enumerate(batches):
+        r = notion_request("PATCH", url, headers=_notion_headers(), json={"children": batch}, timeout=25)
+        METRICS.incr("notion_append_batches")
+        if r.status_code != 200:
+            print(f"[WARN] Notion append children failed (batch {i + 1}/{len(batches)}):",
+                  r.status_code, r.text[:400])
+            return False
+        if created is not None:
+            created += [b.get("id") for b in r.json().get("results", [])]
+    return True
+
+def build_notion_page_body(meta: dict):
+    """
+    meta: {
+      title, platform, tags(list), difficulty, language, url,
+      problem_text, classification_text, review, time_complexity,
+      perf_memory, perf_time, code_snippet
+    }
+    DB 스키마에 따라 properties를 안전하게 포장하고,
+    children에 problem_text/classification_text/review/perf/code를 추가합니다.
+    긴 텍스트는 자르지 않고 text_blocks 로 나눠 담습니다 (요청 단위 묶음은 batch_children).
+    반환: (properties, children)
+    """
+    writers = _SCHEMA.writers()
     mapping = {
         "Name": meta.get("title", ""),
         "Platform": meta.get("platform", ""),
@@ -490,44 +2429,22 @@ def create_notion_page(meta: dict):
         "URL": meta.get("url", "")
     }
 
-    for prop_name, val in mapping.items():
-        if prop_name not in schema:
-            print(f"[INFO] property '{prop_name}' not found in DB schema - skipping")
-            continue
-        prop_schema = schema[prop_name]
-        wrapped = _wrap_value_for_property(prop_schema, val)
-        properties_payload[prop_name] = wrapped
+    properties_payload = {name: writers[name](val) for name, val in mapping.items() if name in writers}
 
     # children: 순서대로 문제링크/문제설명/분류/성능/리뷰/코드
     children = []
 
     # 1) 문제 URL을 명시적으로 보여주려면 paragraph + link 텍스트로 추가
     if meta.get("url"):
-        children.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {"type": "text", "text": {"content": f"문제 링크: {meta.get('url')}", "link": {"url": meta.get("url")}}}
-                ]
-            }
-        })
+        children += text_blocks("paragraph", f"문제 링크: {meta.get('url')}", link=meta.get("url"))
 
     # 2) 문제 설명
     if meta.get("problem_text"):
-        children.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {"rich_text": [{"type": "text", "text": {"content": meta.get("problem_text")}}]}
-        })
+        children += text_blocks("paragraph", meta.get("problem_text"))
 
     # 3) classification_text (README의 분류 섹션 원문)
     if meta.get("classification_text"):
-        children.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {"rich_text": [{"type": "text", "text": {"content": f"분류(README): {meta.get('classification_text')}"}}]}
-        })
+        children += text_blocks("paragraph", f"분류(README): {meta.get('classification_text')}")
 
     # 4) 성능 요약
     perf_lines = []
@@ -536,60 +2453,494 @@ def create_notion_page(meta: dict):
     if meta.get("perf_time"):
         perf_lines.append(f"시간: {meta.get('perf_time')}")
     if perf_lines:
-        children.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {"rich_text": [{"type": "text", "text": {"content": " | ".join(perf_lines)}}]}
-        })
+        children += text_blocks("paragraph", " | ".join(perf_lines))
 
     # 5) LLM 리뷰 및 시간복잡도
     if meta.get("review"):
-        children.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {"rich_text": [{"type": "text", "text": {"content": f"LLM 리뷰: {meta.get('review')}"}}]}
-        })
+        children += text_blocks("paragraph", f"LLM 리뷰: {meta.get('review')}")
     if meta.get("time_complexity"):
-        children.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {"rich_text": [{"type": "text", "text": {"content": f"추정 시간복잡도: {meta.get('time_complexity')}"}}]}
-        })
+        children += text_blocks("paragraph", f"추정 시간복잡도: {meta.get('time_complexity')}")
 
-    # 6) 코드 블록 (길면 자름)
+    # 6) 코드 블록 (전체, 2000자 조각으로 나눔)
     code_snippet = meta.get("code_snippet", "")
     if code_snippet:
         # Notion이 허용하는 언어 키로 매핑(확장자에서 결정된 meta['language'] 기대)
         lang = (meta.get("language") or "").strip().lower()
         # Notion에서 허용되는 언어를 간단히 추정 (많은 항목 허용)
-        allowed = {"python","javascript","java","c","c++","c#","rust","go","kotlin","ruby","plain text"}
+        allowed = {"python","javascript","java","c","c++","c#","rust","go","kotlin","ruby","sql","plain text"}
         if lang not in allowed:
             lang = "plain text"
-        children.append({
-            "object": "block",
-            "type": "code",
-            "code": {
-                "rich_text": [{"type": "text", "text": {"content": code_snippet[:15000]}}],
-                "language": lang
-            }
-        })
+        children += text_blocks("code", code_snippet, language=lang)
+
+    return properties_payload, children
+
+def _notion_headers() -> dict:
+    return {"Authorization": f"Bearer {NOTION_TOKEN}", "Notion-Version": "2022-06-28", "Content-Type": "application/json"}
 
-    payload = {"parent": {"database_id": NOTION_DB_ID}, "properties": properties_payload}
-    if children:
-        payload["children"] = children
+def create_notion_page(meta: dict):
+    """meta 로 새 페이지를 만들고 page_id 반환 (실패 시 None)"""
+    if not NOTION_TOKEN or not NOTION_DB_ID:
+        print("[WARN] Notion creds missing, skipping create")
+        return None
 
-    url = "https://api.notion.com/v1/pages"
-    headers = {"Authorization": f"Bearer {NOTION_TOKEN}", "Notion-Version": "2022-06-28", "Content-Type": "application/json"}
+    url = f"{NOTION_API_URL}/pages"
+    headers = _notion_headers()
+    for attempt in range(2):
+        with METRICS.span("notion.build_payload"):
+            properties_payload, children = build_notion_page_body(meta)
+        schema_seen = _SCHEMA.fingerprint
+        # 생성 요청에는 첫 묶음만 싣고 나머지는 페이지가 생긴 뒤 append
+        batches = batch_children(children)
+        payload = {"parent": {"database_id": NOTION_DB_ID}, "properties": properties_payload}
+        if batches:
+            payload["children"] = batches[0]
+        try:
+            r = notion_request("POST", url, headers=headers, json=payload, timeout=25)
+        except Exception as e:
+            print("[ERROR] Notion request exception:", e)
+            return None
+        print("[Notion] status_code:", r.status_code)
+        if r.status_code in (200, 201):
+            break
+        print("[WARN] Notion create failed:", r.status_code, r.text[:1000])
+        # 캐시된 스키마가 오래됐을 수 있음 -> 다시 조회해서 달라졌으면 한 번만 재시도
+        if attempt == 0 and _is_validation_error(r) and _SCHEMA.revalidate(schema_seen):
+            print("[INFO] retrying Notion create with refreshed schema")
+            continue
+        return None
+    page_id = r.json().get("id")
+    print("[OK] Notion page created:", page_id)
+    if len(batches) > 1:
+        print(f"[Notion] appending {len(batches) - 1} more block batch(es) to {page_id}")
+        try:
+            ok = append_children(page_id, batches[1:])
+        except Exception as e:
+            print("[WARN] Notion append exception:", e)
+            ok = False
+        if not ok:
+            # 페이지는 이미 있으므로 id 는 돌려줌 (partial 로 남겨서 다음 실행이 다시 게시 -> upsert 면 본문 교체)
+            mark_partial_page(page_id)
+            METRICS.incr("notion_partial_pages")
+            print("[WARN] Notion page body is incomplete:", page_id)
+    return page_id
+
+# -------------------
+# Notion upsert: 문제 키(문제 번호/URL + 언어) -> page_id 로컬 인덱스
+# -------------------
+_PROBLEM_ID_PATTERNS = [
+    (re.compile(r'acmicpc\.net/problem/(\d+)'), "boj"),
+    (re.compile(r'programmers\.co\.kr/learn/courses/\d+/lessons/(\d+)'), "programmers"),
+]
+
+def notion_page_key(url: str, title: str = "", language: str = "") -> str:
+    """
+    같은 문제의 같은 언어 풀이는 같은 키가 되도록 만듭니다.
+    예) https://www.acmicpc.net/problem/1000 + python -> "boj:1000|python"
+    문제 번호를 못 찾으면 URL(없으면 제목)을 그대로 사용합니다.
+    """
+    base = ""
+    for pattern, prefix in _PROBLEM_ID_PATTERNS:
+        m = pattern.search(url or "")
+        if m:
+            base = f"{prefix}:{m.group(1)}"
+            break
+    if not base:
+        base = (url or title or "").strip()
+    return f"{base}|{(language or '').strip().lower()}"
+
+def _property_plain_value(prop: dict) -> str:
+    """Notion 페이지 property 값을 문자열로 (title/rich_text/url/select 정도만)"""
+    ptype = prop.get("type")
+    if ptype in ("title", "rich_text"):
+        return "".join(t.get("plain_text", "") for t in prop.get(ptype) or [])
+    if ptype == "url":
+        return prop.get("url") or ""
+    if ptype == "select":
+        return (prop.get("select") or {}).get("name", "")
+    return ""
+
+class NotionPageIndex:
+    """
+    문제 키 -> page_id 인덱스를 NOTION_INDEX_PATH(JSON)에 보관합니다.
+    파일이 없거나 다른 DB의 인덱스면 DB 전체를 페이지네이션 조회해서 한 번 만들고,
+    이후에는 페이지를 만들 때마다 증분으로 갱신합니다.
+    paths(소스 경로 -> 문제 키)는 게시할 때만 기록되므로 DB 조회로는 다시 만들 수 없습니다.
+    DB 조회가 끝까지 가지 못하면 pages 를 믿을 수 없으므로 get() 이 RuntimeError 를 내고(중복 생성 방지),
+    저장할 때 complete=false 로 남겨서 다음 실행이 다시 조회합니다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.pages = {}
+        self.paths = {}
+        self.file_read = False
+        self.loaded = False       # pages 가 DB 전체를 반영함
+        self.load_error = None    # 이번 실행에서 다시 만들기에 실패한 이유 (재시도하지 않음)
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def _read_file(self):
+        """저장된 인덱스를 한 번만 읽음. paths 는 항상, pages 는 끝까지 만들어진 인덱스일 때만 사용"""
+        if self.file_read:
+            return
+        self.file_read = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("database_id") != NOTION_DB_ID:
+            return
+        self.paths = data.get("paths", {})
+        if data.get("complete", True):
+            self.pages = data.get("pages", {})
+            self.loaded = True
+            print(f"[Notion] page index loaded: {len(self.pages)} entries")
+        else:
+            print("[Notion] saved page index is incomplete -> rebuilding from database")
+
+    def ensure_loaded(self):
+        with self._lock:
+            self._read_file()
+            if self.loaded:
+                return
+            if self.load_error is None and not self.rebuild():
+                self.load_error = "Notion page index could not be rebuilt (database query did not finish)"
+            if self.load_error is not None:
+                raise RuntimeError(self.load_error)
+            self.loaded = True
+
+    def rebuild(self) -> bool:
+        """
+        POST /databases/{id}/query 를 100개씩 끝까지 조회해서 인덱스를 다시 만듦.
+        중간에 실패하면 기존 pages 를 그대로 두고 False
+        """
+        url = f"{NOTION_API_URL}/databases/{NOTION_DB_ID}/query"
+        pages = {}
+        body = {"page_size": 100}
+        while True:
+            try:
+                r = notion_request("POST", url, headers=_notion_headers(), json=body, timeout=25, idempotent=True)
+            except Exception as e:
+                print("[ERROR] Notion query exception:", e)
+                return False
+            if r.status_code != 200:
+                print("[WARN] Notion query failed:", r.status_code, r.text[:400])
+                return False
+            data = r.json()
+            for page in data.get("results", []):
+                props = page.get("properties", {})
+                key = notion_page_key(
+                    _property_plain_value(props.get("URL", {})),
+                    _property_plain_value(props.get("Name", {})),
+                    _property_plain_value(props.get("Language", {})),
+                )
+                pages.setdefault(key, page.get("id"))
+            if not data.get("has_more"):
+                break
+            body["start_cursor"] = data.get("next_cursor")
+        self.pages = pages
+        self.dirty = True
+        print(f"[Notion] page index rebuilt from database: {len(pages)} entries")
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        self.ensure_loaded()
+        with self._lock:
+            return self.pages.get(key)
+
+    def set(self, key: str, page_id: Optional[str]):
+        with self._lock:
+            if page_id:
+                self.pages[key] = page_id
+            else:
+                self.pages.pop(key, None)
+            self.dirty = True
+
+    def key_for_path(self, source_path: str) -> Optional[str]:
+        with self._lock:
+            self._read_file()
+            return self.paths.get(source_path)
+
+    def set_path(self, source_path: str, key: Optional[str]):
+        with self._lock:
+            self._read_file()
+            if key:
+                self.paths[source_path] = key
+            else:
+                self.paths.pop(source_path, None)
+            self.dirty = True
+
+    def paths_for_key(self, key: str) -> List[str]:
+        with self._lock:
+            return [p for p, k in self.paths.items() if k == key]
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"database_id": NOTION_DB_ID, "complete": self.loaded, "pages": self.pages,
+                           "paths": self.paths}, f, ensure_ascii=False, indent=0)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+_PAGE_INDEX = NotionPageIndex(NOTION_INDEX_PATH)
+
+# 이번 실행에서 본문이 다 쓰이지 않은 페이지. 동기화 상태에 ok 로 남기지 않아서 다음 실행이 다시 게시함
+_PARTIAL_PAGES = set()
+_PARTIAL_LOCK = threading.Lock()
+
+def mark_partial_page(page_id: str, partial: bool = True):
+    with _PARTIAL_LOCK:
+        if partial:
+            _PARTIAL_PAGES.add(page_id)
+        else:
+            _PARTIAL_PAGES.discard(page_id)
+
+def is_partial_page(page_id: Optional[str]) -> bool:
+    with _PARTIAL_LOCK:
+        return page_id in _PARTIAL_PAGES
+
+def publish_status(page_id: Optional[str]) -> str:
+    """게시 결과 -> ok / partial(페이지는 있지만 본문이 다 안 쓰임) / failed"""
+    if not page_id:
+        return "failed"
+    return "partial" if is_partial_page(page_id) else "ok"
+
+def _delete_blocks(block_ids: List[str]) -> int:
+    """블록들을 DELETE. 실패한 수를 반환 (404 는 이미 지워진 것으로 봄)"""
+    failed = 0
+    for block_id in block_ids:
+        r = notion_request("DELETE", f"{NOTION_API_URL}/blocks/{block_id}", headers=_notion_headers(), timeout=25)
+        if r.status_code not in (200, 404):
+            print("[WARN] Notion delete block failed:", block_id, r.status_code, r.text[:200])
+            failed += 1
+    return failed
+
+def _replace_page_children(page_id: str, children: list) -> bool:
+    """
+    본문을 children 으로 교체. 새 블록을 먼저 다 붙인 뒤에만 기존 블록을 지웁니다.
+    붙이다 실패하면 새로 붙은 것만 지워서 기존 본문을 그대로 두고 False
+    """
+    url = f"{NOTION_API_URL}/blocks/{page_id}/children"
+    old_ids = []
+    params = {"page_size": 100}
+    while True:
+        r = notion_request("GET", url, headers=_notion_headers(), params=params, timeout=25)
+        if r.status_code != 200:
+            print("[WARN] Notion list children failed:", r.status_code, r.text[:400])
+            return False
+        data = r.json()
+        old_ids += [b.get("id") for b in data.get("results", [])]
+        if not data.get("has_more"):
+            break
+        params["start_cursor"] = data.get("next_cursor")
+    created: List[str] = []
+    if not append_children(page_id, batch_children(children), created):
+        if _delete_blocks(created):
+            print("[WARN] Notion page has leftover blocks from a failed replace:", page_id)
+        return False
+    failed = _delete_blocks(old_ids)
+    if failed:
+        print(f"[WARN] Notion page {page_id}: {failed}/{len(old_ids)} old block(s) not deleted")
+        return False
+    return True
+
+# update_notion_page 의 "페이지가 없어짐(404/보관됨)" 결과. 이때만 새 페이지를 만듦 (그 밖의 실패는 None)
+NOTION_PAGE_GONE = "gone"
+
+def _page_gone(r: requests.Response) -> bool:
+    """404, 보관된 페이지(200 + archived), 보관된 페이지 수정 거부(400 + archived 메시지)"""
+    if r.status_code == 404:
+        return True
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=25)
+        data = r.json()
+    except ValueError:
+        return False
+    if r.status_code == 200:
+        return bool(data.get("archived"))
+    return r.status_code == 400 and "archived" in str(data.get("message", "")).lower()
+
+def update_notion_page(page_id: str, meta: dict) -> Optional[str]:
+    """
+    기존 페이지의 properties 를 PATCH 하고 본문을 교체.
+    페이지가 없어졌으면(404/보관) NOTION_PAGE_GONE, 일시적인 실패(네트워크/5xx/409 등)는 None
+    본문 교체가 실패하면 page_id 는 돌려주되 mark_partial_page 로 표시 (같은 문제 페이지를 새로 만들지 않도록)
+    """
+    with METRICS.span("notion.build_payload"):
+        properties_payload, children = build_notion_page_body(meta)
+    try:
+        r = notion_request("PATCH", f"{NOTION_API_URL}/pages/{page_id}", headers=_notion_headers(),
+                         json={"properties": properties_payload}, timeout=25, idempotent=True)
     except Exception as e:
-        print("[ERROR] Notion request exception:", e)
+        print("[ERROR] Notion update exception:", e)
+        return None
+    print("[Notion] update status_code:", r.status_code)
+    if _page_gone(r):
+        print("[WARN] Notion page no longer exists (deleted/archived):", page_id, r.status_code)
+        return NOTION_PAGE_GONE
+    if r.status_code != 200:
+        print("[WARN] Notion update failed:", r.status_code, r.text[:400])
+        return None
+    try:
+        replaced = _replace_page_children(page_id, children)
+    except Exception as e:
+        print("[WARN] Notion body replace exception:", e)
+        replaced = False
+    mark_partial_page(page_id, not replaced)
+    if not replaced:
+        METRICS.incr("notion_partial_pages")
+        print("[WARN] Notion page properties updated but body not replaced:", page_id)
+        return page_id
+    print("[OK] Notion page updated:", page_id)
+    return page_id
+
+def publish_notion_page(meta: dict) -> Optional[str]:
+    """
+    NOTION_UPSERT 가 켜져 있으면 같은 문제 키의 페이지를 찾아 수정하고, 없을 때만 새로 만듭니다.
+    꺼져 있으면 기존처럼 항상 새 페이지를 만듭니다.
+    """
+    if not NOTION_UPSERT or not NOTION_TOKEN or not NOTION_DB_ID:
+        return create_notion_page(meta)
+    key = notion_page_key(meta.get("url", ""), meta.get("title", ""), meta.get("language", ""))
+    page_id = _PAGE_INDEX.get(key)
+    if page_id:
+        print(f"[Notion] existing page for {key}: {page_id} -> update")
+        updated = update_notion_page(page_id, meta)
+        if updated is None:
+            # 일시적인 실패 -> 인덱스는 그대로 두고 실패로 보고 (다음 실행에서 같은 페이지를 다시 수정)
+            return None
+        if updated == NOTION_PAGE_GONE:
+            # 인덱스가 오래됨(삭제/보관된 페이지) -> 인덱스에서 빼고 새로 생성
+            _PAGE_INDEX.set(key, None)
+            page_id = None
+    if not page_id:
+        page_id = create_notion_page(meta)
+        if page_id:
+            _PAGE_INDEX.set(key, page_id)
+    if page_id and meta.get("path"):
+        # 소스 경로 -> 문제 키 (삭제된 풀이의 페이지를 찾을 때 사용)
+        _PAGE_INDEX.set_path(meta["path"], key)
+    return page_id
+
+def archive_notion_page_for_path(source_path: str) -> Optional[str]:
+    """
+    삭제된 소스 경로의 페이지를 보관(archived=true) 처리. 보관한 page_id 반환
+    같은 문제 키를 쓰는 다른 경로가 남아 있으면(같은 문제의 다른 풀이) 페이지는 그대로 둡니다.
+    """
+    key = _PAGE_INDEX.key_for_path(source_path)
+    try:
+        page_id = _PAGE_INDEX.get(key) if key else None
+    except RuntimeError as e:
+        print("[ERROR] cannot archive page for removed file:", source_path, e)
+        return None
+    _PAGE_INDEX.set_path(source_path, None)
+    if not page_id:
+        print("[INFO] removed file has no indexed Notion page, skipping:", source_path)
+        return None
+    others = _PAGE_INDEX.paths_for_key(key)
+    if others:
+        print(f"[INFO] {key} still used by {others[0]} -> keeping page {page_id}")
+        return None
+    try:
+        r = notion_request("PATCH", f"{NOTION_API_URL}/pages/{page_id}", headers=_notion_headers(),
+                           json={"archived": True}, timeout=25, idempotent=True)
+    except Exception as e:
+        print("[ERROR] Notion archive exception:", e)
+        return None
+    if r.status_code != 200:
+        print("[WARN] Notion archive failed:", r.status_code, r.text[:400])
+        return None
+    _PAGE_INDEX.set(key, None)
+    print("[OK] Notion page archived for removed file:", source_path, page_id)
+    return page_id
+
+# -------------------
+# Notion 게시 워커 풀 (토큰 버킷으로 속도 제한, 페이지별 상태/지연 기록)
+# -------------------
+class NotionPublisher:
+    """
+    main()/process_file() 에서 만든 페이지 meta 를 받아 NOTION_WORKERS 개의 워커가 게시합니다.
+    요청 속도는 notion_request() 의 토큰 버킷이 제한하므로 워커 수와 무관하게 NOTION_RATE_LIMIT 을 넘지 않습니다.
+    """
+    def __init__(self, workers: int = NOTION_WORKERS):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notion")
+        self._lock = threading.Lock()
+        self.results: List[dict] = []
+
+    def submit(self, meta: dict, on_done=None):
+        """
+        Future 반환. result() 는 {"title", "status", "page_id", "latency", "error", "log"}
+        on_done(page_id) 는 게시가 끝나면 게시 워커에서 호출 (동기화 상태 기록 등)
+        """
+        return self._pool.submit(self._publish, meta, on_done)
+
+    def _publish(self, meta: dict, on_done=None) -> dict:
+        # 파일 워커의 로그 버퍼 안에서 호출된 경우, 게시 로그도 따로 모아서 돌려줌
+        out = sys.stdout
+        capture = isinstance(out, _PerFileStdout)
+        if capture:
+            out.begin()
+        t0 = time.perf_counter()
+        error = None
+        try:
+            page_id = publish_notion_page(meta)
+        except Exception as e:
+            print("[ERROR] Notion publish exception:", e)
+            page_id, error = None, str(e)
+        if on_done is not None:
+            try:
+                on_done(page_id)
+            except Exception as e:
+                print("[ERROR] Notion publish callback exception:", e)
+        res = {
+            "title": meta.get("title", ""),
+            "status": publish_status(page_id),
+            "page_id": page_id,
+            "latency": time.perf_counter() - t0,
+            "error": error,
+        }
+        with self._lock:
+            self.results.append(dict(res))
+        res["log"] = out.end() if capture else ""
+        return res
+
+    @staticmethod
+    def collect(results: List[dict]) -> List[dict]:
+        """
+        process_file 이 게시를 맡기고 돌려준 결과(status=pending, "publish"=Future)를 게시가 끝난 결과로 바꿈.
+        파일 워커는 게시를 기다리지 않고 다음 파일로 넘어가므로, 게시 로그는 여기서 입력 순서대로 출력합니다.
+        """
+        for res in results:
+            fut = res.pop("publish", None)
+            if fut is None:
+                continue
+            done = fut.result()
+            METRICS.observe("stage.publish", done["latency"])
+            log = done.pop("log", "")
+            if log:
+                sys.stdout.write(f"----- [publish] {res['path']} -----\n{log}")
+            res["status"], res["page_id"] = done["status"], done["page_id"]
+        return results
+
+    def close(self) -> List[dict]:
+        self._pool.shutdown(wait=True)
+        return self.results
+
+def print_publish_summary(results: List[dict]):
+    if not results:
         return
-    print("[Notion] status_code:", r.status_code)
-    if r.status_code not in (200, 201):
-        print("[WARN] Notion create failed:", r.status_code, r.text[:1000])
-    else:
-        print("[OK] Notion page created:", r.json().get("id"))
+    lat = sorted(r["latency"] for r in results)
+    ok = sum(1 for r in results if r["status"] == "ok")
+    partial = sum(1 for r in results if r["status"] == "partial")
+    print(f"[Notion] published: {len(results)} ok: {ok} partial: {partial} failed: {len(results) - ok - partial} "
+          f"latency p50: {lat[len(lat) // 2]:.2f}s max: {lat[-1]:.2f}s")
+    for r in results:
+        if r["status"] != "ok":
+            print(f"  [{r['status'].upper()}] {r['title']} ({r['latency']:.2f}s) {r['error'] or ''}".rstrip())
 
 # -------------------
 # 연결 테스트 (디버그용)
@@ -599,7 +2950,7 @@ def test_openai_connectivity():
         print("[SKIP] OpenAI key missing")
         return
     try:
-        r = requests.get("https://api.openai.com/v1/models", headers={"Authorization": f"Bearer {OPENAI_API_KEY}"}, timeout=10)
+        r = http_request("GET", f"{OPENAI_BASE_URL}/models", headers={"Authorization": f"Bearer {OPENAI_API_KEY}"}, timeout=10)
         print("[OpenAI] connectivity status:", r.status_code)
         print("body-preview:", (r.text or "")[:400])
     except Exception as e:
@@ -610,8 +2961,8 @@ def test_notion_connectivity():
         print("[SKIP] Notion creds missing")
         return
     try:
-        url = f"https://api.notion.com/v1/databases/{NOTION_DB_ID}"
-        r = requests.get(url, headers={"Authorization": f"Bearer {NOTION_TOKEN}", "Notion-Version": "2022-06-28"}, timeout=10)
+        url = f"{NOTION_API_URL}/databases/{NOTION_DB_ID}"
+        r = notion_request("GET", url, headers={"Authorization": f"Bearer {NOTION_TOKEN}", "Notion-Version": "2022-06-28"}, timeout=10)
         print("[Notion] connectivity status:", r.status_code)
         print("body-preview:", (r.text or "")[:400])
     except Exception as e:
@@ -636,15 +2987,903 @@ def ext_to_language(path: str) -> str:
         return "c#"
     if path.endswith(".kt") or path.endswith(".kts"):
         return "kotlin"
+    if path.endswith(".sql"):
+        return "sql"
     # fallback
     return "plain text"
 
+# -------------------
+# 동기화 상태 저장소 (SQLite): 경로별로 마지막으로 게시한 내용/README 해시와 page_id 를 기록
+# -------------------
+_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    content_hash TEXT,
+    readme_hash TEXT,
+    page_id TEXT,
+    classification TEXT,
+    status TEXT,
+    first_seen REAL,
+    synced_at REAL,
+    updated_at REAL
+)
+"""
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def readme_hash(readme_info: dict) -> str:
+    """README 원문 대신 파싱 결과를 해시 (게시 내용에 영향이 있는 변화만 잡힘)"""
+    return content_hash(json.dumps(readme_info or {}, sort_keys=True, ensure_ascii=False))
+
+class SyncStateStore:
+    """
+    path -> (content_hash, readme_hash, page_id, classification, status, 시각들) 을 SQLite 한 파일에 보관합니다.
+    - 내용과 README 가 마지막 성공 게시 때와 같으면 그 파일은 다시 분류/게시하지 않음 (--force 로 무시)
+    - 실패한 파일도 status=failed (본문이 다 안 쓰인 페이지는 partial) 로 남아서 "아직 동기화 안 된 파일" 조회에 잡힘
+    연결 하나를 스레드들이 잠금으로 나눠 쓰고, 기록할 때마다 commit 하므로 중간에 끊겨도 그때까지는 남습니다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute(_STATE_SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    def get(self, path: str) -> Optional[dict]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT * FROM files WHERE path = ?", (path,)).fetchone() if db else None
+        return dict(row) if row else None
+
+    def unchanged_page(self, path: str, c_hash: str, r_hash: str) -> Optional[str]:
+        """마지막 성공 게시 이후 내용/README 가 그대로면 그 page_id, 아니면 None"""
+        row = self.get(path)
+        if row and row["status"] == "ok" and row["page_id"] \
+                and row["content_hash"] == c_hash and row["readme_hash"] == r_hash:
+            return row["page_id"]
+        return None
+
+    def record(self, path: str, c_hash: str, r_hash: str, page_id: Optional[str], classification: Optional[dict],
+               status: str):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            if db is None:
+                return
+            # 실패한 경우에는 예전 성공 기록(해시/page_id/synced_at)을 덮어쓰지 않고 상태만 바꿈
+            if status == "ok":
+                db.execute(
+                    "INSERT INTO files (path, content_hash, readme_hash, page_id, classification, status, "
+                    "first_seen, synced_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET content_hash = excluded.content_hash, "
+                    "readme_hash = excluded.readme_hash, page_id = excluded.page_id, "
+                    "classification = excluded.classification, status = excluded.status, "
+                    "synced_at = excluded.synced_at, updated_at = excluded.updated_at",
+                    (path, c_hash, r_hash, page_id, json.dumps(classification or {}, ensure_ascii=False),
+                     status, now, now, now))
+            else:
+                db.execute(
+                    "INSERT INTO files (path, status, first_seen, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                    (path, status, now, now))
+            db.commit()
+
+    def synced_paths(self) -> dict:
+        """{path: row} (마지막 상태가 ok 인 것만)"""
+        with self._lock:
+            db = self._db()
+            rows = db.execute("SELECT * FROM files WHERE status = 'ok'").fetchall() if db else []
+        return {r["path"]: dict(r) for r in rows}
+
+    def paths_in(self, folder: str) -> List[str]:
+        """folder 바로 아래에 기록이 있는 경로들"""
+        prefix = folder + "/"
+        with self._lock:
+            db = self._db()
+            rows = db.execute("SELECT path FROM files WHERE substr(path, 1, ?) = ?",
+                              (len(prefix), prefix)).fetchall() if db else []
+        return [r["path"] for r in rows if os.path.dirname(r["path"]) == folder]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_STATE = SyncStateStore(STATE_DB_PATH)
+
+def unchanged_since_sync(ctx: dict, path: str, content: str, readme_info: dict) -> Optional[str]:
+    """상태 저장소 기준으로 다시 게시할 필요가 없으면 page_id (--force 면 항상 None)"""
+    if ctx.get("force"):
+        return None
+    return _STATE.unchanged_page(path, content_hash(content), readme_hash(readme_info))
+
+def record_sync_state(path: str, content: str, readme_info: dict, parsed: Optional[dict], page_id: Optional[str]):
+    _STATE.record(path, content_hash(content), readme_hash(readme_info), page_id, parsed,
+                  publish_status(page_id))
+
+# -------------------
+# 파일 단위 처리 (fetch -> LLM 분류 -> Notion 생성)
+# -------------------
+# 처리할 확장자
+SOURCE_EXTS = [".py", ".cpp", ".c", ".java", ".js"]
+
+# -------------------
+# 경로 라우팅: (glob, 동작) 규칙을 위에서부터 처음 맞는 것으로 결정 (대소문자 무시, '*' 는 '/' 도 포함)
+# - classify: LLM 분류 후 게시 / sql: 키워드 분류 후 게시
+# - variant: 같은 폴더 풀이의 페이지에 코드만 덧붙임 (LLM 없음) / skip: 처리하지 않음
+# 어느 규칙에도 맞지 않으면 skip
+# -------------------
+ROUTE_ACTIONS = ("classify", "variant", "sql", "skip")
+DEFAULT_ROUTING_RULES = [
+    ("scripts/*", "skip"),            # 이 동기화 도구 자체
+    (".github/*", "skip"),
+    ("*-codereview.py", "skip"),      # 최상위 모아 보기 노트 (Bakejoon-/Programmers-CodeReview.py)
+    ("*codereview.sql", "skip"),      # PROGRAMMERS-SQL CODEREVIEW.sql
+    ("*/codereview.py", "variant"),   # 문제 폴더의 리뷰 버전
+    ("*.sql", "sql"),
+] + [("*" + ext, "classify") for ext in SOURCE_EXTS]
+
+def load_routing_rules() -> List[tuple]:
+    """ROUTING_RULES_PATH 의 규칙 + 기본 규칙. 형식이 틀린 항목은 경고 후 무시"""
+    rules = []
+    if ROUTING_RULES_PATH:
+        try:
+            with open(ROUTING_RULES_PATH, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print("[WARN] routing rules not loaded:", e)
+            entries = []
+        for entry in entries:
+            if isinstance(entry, list) and len(entry) == 2 and entry[1] in ROUTE_ACTIONS:
+                rules.append((str(entry[0]), entry[1]))
+            else:
+                print("[WARN] invalid routing rule ignored:", entry)
+    return rules + DEFAULT_ROUTING_RULES
+
+class PathRouter:
+    """규칙을 한 번 컴파일해 두고 경로 -> 동작을 돌려줌 (경로별 결과는 기억)"""
+    def __init__(self, rules: List[tuple]):
+        self.rules = [(re.compile(fnmatch.translate(glob.lower())), action) for glob, action in rules]
+        self._memo = {}
+
+    def route(self, path: str) -> str:
+        action = self._memo.get(path)
+        if action is None:
+            low = path.lower()
+            action = next((a for pattern, a in self.rules if pattern.match(low)), "skip")
+            self._memo[path] = action
+        return action
+
+    def split(self, paths: List[str]) -> dict:
+        """{동작: [경로, ...]} (입력 순서 유지)"""
+        routes = {action: [] for action in ROUTE_ACTIONS}
+        for p in paths:
+            routes[self.route(p)].append(p)
+        return routes
+
+_ROUTER = PathRouter(load_routing_rules())
+
+def is_publish_target(path: str) -> bool:
+    """자기 페이지를 갖는 파일인지 (classify/sql)"""
+    return _ROUTER.route(path) in ("classify", "sql")
+
+# 아래 단계 함수들은 process_file(스레드 엔진)과 run_async_pipeline(asyncio 엔진)이 같이 사용
+def fetch_source(ctx: dict, path: str) -> Optional[str]:
+    """1단계: 소스 내용 (배치 모드에서 미리 읽은 것이 있으면 그것)"""
+    with METRICS.span("stage.fetch"):
+        return ctx.get("contents", {}).get(path) or fetch_content(ctx, path)
+
+def resolve_readme(ctx: dict, path: str) -> dict:
+    """2단계: 같은 폴더 README 파싱 결과 (없으면 {})"""
+    with METRICS.span("stage.readme"):
+        return ctx["readmes"].get(os.path.dirname(path)) or {}
+
+def classify_source(ctx: dict, path: str, content: str, readme_info: dict) -> dict:
+    """3단계: LLM 분류 (문제 설명 포함). 배치 모드에서 이미 분류된 경우 그 결과 사용"""
+    parsed = ctx.get("classifications", {}).get(path)
+    if parsed is None and _ROUTER.route(path) == "sql":
+        parsed = classify_sql(content)
+    if parsed is None:
+        with METRICS.span("stage.classify"):
+            parsed = classify_cached(content, problem_text=problem_text_for_prompt(readme_info),
+                                     language=ext_to_language(path))
+    return parsed
+
+def build_page_meta(ctx: dict, path: str, content: str, readme_info: dict, parsed: dict) -> dict:
+    """4단계 준비: README 정보 + 분류 결과로 Notion 페이지 meta 구성"""
+    owner, repo, ref = ctx["owner"], ctx["repo"], ctx["ref"]
+    problem_text = readme_info.get("problem_text", "") if readme_info else ""
+    problem_url = readme_info.get("problem_url", "") if readme_info else ""
+    perf_memory = readme_info.get("perf_memory", "") if readme_info else ""
+    perf_time = readme_info.get("perf_time", "") if readme_info else ""
+    difficulty = readme_info.get("difficulty", "") if readme_info else ""
+    classification_text = readme_info.get("classification_text", "") if readme_info else ""
+    classification_tags = readme_info.get("classification_tags", []) if readme_info else []
+
+    # tags 병합: README 분류 우선, LLM 태그 추가, 중복 제거
+    llm_tags = parsed.get("tags", []) or []
+    tags = []
+    # 우선 README tags (원문) 넣고, LLM 태그 추가
+    for t in classification_tags + llm_tags:
+        if isinstance(t, str) and t.strip():
+            tt = t.strip()
+            if tt not in tags:
+                tags.append(tt)
+
+    # language 결정
+    language = ext_to_language(path)
+
+    # --- 파일명에서 확장자 제거하고 '제목' 만들기 ---
+    filename = os.path.basename(path)            # "이어 붙인 수.py" 또는 "이어 붙인 수.py"
+    name_no_ext, _ext = os.path.splitext(filename)  # ("이어 붙인 수", ".py")
+
+    # 정제: 유니코드 공백(넓은 공백, NBSP 등)들을 일반 공백으로 바꾸고 중복 공백은 하나로 축소
+    # 주요 유니코드 공백들: \u00A0 (NBSP), \u2000-\u200A (various spaces), \u202F, \u2005, BOM \uFEFF 등
+    title = re.sub(r'[\u00A0\u2000-\u200A\u202F\u2005\uFEFF]', ' ', name_no_ext)  # 특수 공백 정리
+    title = unescape(title)                          # 혹시 HTML 이스케이프가 있으면 되돌리기
+    title = re.sub(r'\s+', ' ', title).strip()       # 연속 공백 -> 하나, 앞뒤 공백 제거
+
+    # --- platform 추출 ---
+    raw_platform = path.split('/', 1)[0] if '/' in path else path
+    # 정리: 유니코드 공백 정리 및 앞뒤 공백 제거
+    platform = re.sub(r'[\u00A0\u2000-\u200A\u202F]', ' ', raw_platform).strip()
+
+    meta = {
+        "path": path,
+        "title": title,
+        "platform": platform,
+        "tags": tags,
+        "difficulty": difficulty,
+        "language": language,
+        "url": problem_url or f"https://github.com/{owner}/{repo}/blob/{ref}/{path}",
+        "problem_text": problem_text,
+        "classification_text": classification_text,
+        "review": parsed.get("review", ""),
+        "time_complexity": parsed.get("time_complexity", ""),
+        "perf_memory": perf_memory,
+        "perf_time": perf_time,
+        "code_snippet": content
+    }
+    return meta
+
+def process_file(ctx: dict, path: str) -> dict:
+    """
+    변경된 소스 파일 하나를 처리합니다.
+    ctx: {"owner", "repo", "ref", "use_local", "readmes"}
+    반환: {"path", "status"(ok/partial/unchanged/skipped/failed), "page_id"}
+    """
+    print("[PROCESS] handling:", path)
+    content = fetch_source(ctx, path)
+    if not content:
+        print("[WARN] content not fetched for", path)
+        return {"path": path, "status": "skipped", "page_id": None}
+
+    readme_info = resolve_readme(ctx, path)
+    page_id = unchanged_since_sync(ctx, path, content, readme_info)
+    if page_id:
+        print("[STATE] unchanged since last sync -> skip:", path)
+        return {"path": path, "status": "unchanged", "page_id": page_id}
+    parsed = classify_source(ctx, path, content, readme_info)
+    meta = build_page_meta(ctx, path, content, readme_info, parsed)
+    publisher = ctx.get("publisher")
+    if publisher is not None:
+        # 게시 워커에 맡기고 바로 다음 파일로 (결과는 process_targets 가 NotionPublisher.collect 로 채움)
+        fut = publisher.submit(meta, lambda pid: record_sync_state(path, content, readme_info, parsed, pid))
+        return {"path": path, "status": "pending", "page_id": None, "publish": fut}
+    with METRICS.span("stage.publish"):
+        page_id = publish_notion_page(meta)
+    record_sync_state(path, content, readme_info, parsed, page_id)
+    return {"path": path, "status": publish_status(page_id), "page_id": page_id}
+
+# -------------------
+# 리뷰 버전(variant) 파일: 같은 폴더 풀이의 페이지 끝에 코드 블록으로 덧붙임
+# -------------------
+def _folder_paths(ctx: dict, folder: str) -> List[str]:
+    """이번 변경 목록 + 동기화 기록 + (로컬 모드면) 체크아웃에서 찾은 folder 안의 파일들"""
+    paths = [p for p in ctx.get("changed", []) if os.path.dirname(p) == folder]
+    paths += _STATE.paths_in(folder)
+    if ctx.get("use_local"):
+        try:
+            paths += [f"{folder}/{name}" for name in os.listdir(os.path.join(GITHUB_WORKSPACE, folder))]
+        except OSError:
+            pass
+    return list(dict.fromkeys(paths))
+
+def primary_for_variant(ctx: dict, path: str) -> Optional[str]:
+    """variant 가 붙을 풀이 (같은 폴더의 게시 대상, 확장자가 같은 것 우선)"""
+    ext = os.path.splitext(path)[1].lower()
+    primaries = [p for p in _folder_paths(ctx, os.path.dirname(path)) if is_publish_target(p)]
+    primaries.sort(key=lambda p: (os.path.splitext(p)[1].lower() != ext, p))
+    return primaries[0] if primaries else None
+
+def attach_variant(ctx: dict, path: str) -> dict:
+    """
+    variant 파일 하나를 풀이 페이지에 덧붙임. 반환 형식은 process_file 과 같음
+    같은 내용을 이미 그 페이지에 붙였고 그 뒤로 풀이 페이지가 다시 게시되지 않았으면 건너뜀
+    """
+    print("[VARIANT] handling:", path)
+    primary = primary_for_variant(ctx, path)
+    primary_row = _STATE.get(primary) if primary else None
+    page_id = ctx.get("published", {}).get(primary)
+    if not page_id and primary_row and primary_row["status"] == "ok":
+        page_id = primary_row["page_id"]
+    if not page_id and primary and NOTION_UPSERT:
+        key = _PAGE_INDEX.key_for_path(primary)
+        page_id = _PAGE_INDEX.get(key) if key else None
+    if not page_id:
+        print("[WARN] no published page to attach variant to:", path, "primary:", primary)
+        return {"path": path, "status": "skipped", "page_id": None}
+
+    content = fetch_source(ctx, path)
+    if not content:
+        print("[WARN] content not fetched for", path)
+        return {"path": path, "status": "skipped", "page_id": None}
+    c_hash = content_hash(content)
+    row = _STATE.get(path)
+    if not ctx.get("force") and row and row["status"] == "ok" and row["page_id"] == page_id \
+            and row["content_hash"] == c_hash and row["synced_at"] >= ((primary_row or {}).get("synced_at") or 0):
+        print("[STATE] variant already attached -> skip:", path)
+        return {"path": path, "status": "unchanged", "page_id": page_id}
+
+    children = text_blocks("heading_3", f"리뷰 버전: {os.path.basename(path)}")
+    children += text_blocks("code", content, language=ext_to_language(path))
+    with METRICS.span("stage.publish"):
+        ok = append_children(page_id, batch_children(children))
+    METRICS.incr("variants_attached" if ok else "variants_failed")
+    _STATE.record(path, c_hash, "", page_id if ok else None, None, "ok" if ok else "failed")
+    if ok:
+        print(f"[OK] variant attached to {primary}: {page_id}")
+    return {"path": path, "status": "ok" if ok else "failed", "page_id": page_id if ok else None}
+
+def process_variants(ctx: dict, variants: List[str], results: List[dict]) -> List[dict]:
+    """
+    풀이 처리가 끝난 뒤 variant 들을 덧붙임.
+    이번에 바뀐 variant 에 더해, 이번에 처리한 풀이와 같은 폴더의 variant 도 확인함
+    (풀이 페이지가 다시 게시되면 본문이 교체되어 덧붙였던 블록이 사라지므로)
+    """
+    variants = list(variants)
+    ctx["published"] = {res["path"]: res["page_id"] for res in results if res.get("page_id")}
+    for res in results:
+        if res["status"] in ("ok", "unchanged"):
+            for p in _folder_paths(ctx, os.path.dirname(res["path"])):
+                if _ROUTER.route(p) == "variant" and p not in variants:
+                    variants.append(p)
+    if not variants:
+        return []
+    return run_file_pool(variants, lambda p: attach_variant(ctx, p), CLASSIFY_CONCURRENCY)
+
+# -------------------
+# 워커 풀 (CLASSIFY_CONCURRENCY > 1 일 때 파일들을 동시에 처리)
+# -------------------
+class _PerFileStdout:
+    """
+    워커 스레드마다 print 출력을 따로 버퍼링하는 stdout 대리 객체.
+    파일별 로그가 뒤섞이지 않도록, 끝난 뒤 입력 순서대로 한 번에 출력합니다.
+    """
+    def __init__(self, real):
+        self._real = real
+        self._local = threading.local()
+
+    def begin(self):
+        self._local.buf = io.StringIO()
+
+    def end(self) -> str:
+        buf = getattr(self._local, "buf", None)
+        self._local.buf = None
+        return buf.getvalue() if buf is not None else ""
+
+    def write(self, s):
+        buf = getattr(self._local, "buf", None)
+        if buf is not None:
+            return buf.write(s)
+        return self._real.write(s)
+
+    def flush(self):
+        self._real.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+def run_file_pool(paths: List[str], handler, concurrency: int) -> List[dict]:
+    """
+    handler(path) -> dict 를 paths 각각에 대해 실행합니다.
+    concurrency <= 1 이면 기존처럼 순차 실행, 그 외에는 스레드 풀에서 동시에 실행하고
+    로그는 파일 단위로 묶어 입력 순서대로 출력합니다.
+    handler 가 예외를 내면 아직 시작하지 않은 파일은 실행하지 않고(status=cancelled) 첫 예외를 다시 냅니다.
+    순차 모드와 달리 그때 이미 실행 중이던 파일들은 끝까지 처리됩니다.
+    """
+    if concurrency <= 1 or len(paths) <= 1:
+        return [handler(p) for p in paths]
+
+    real_stdout = sys.stdout
+    proxy = _PerFileStdout(real_stdout)
+    stop = threading.Event()
+
+    def _task(p):
+        if stop.is_set():
+            return {"path": p, "status": "cancelled", "page_id": None, "elapsed": 0.0}, None, None
+        proxy.begin()
+        t0 = time.perf_counter()
+        try:
+            res = handler(p)
+            err = None
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+            res = {"path": p, "status": "failed", "page_id": None}
+            err = e
+            stop.set()
+        res["elapsed"] = time.perf_counter() - t0
+        return res, err, proxy.end()
+
+    results = []
+    first_error = None
+    sys.stdout = proxy
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="classify") as pool:
+            futures = [pool.submit(_task, p) for p in paths]
+            # 제출 순서대로 꺼내므로 출력 순서는 실행 타이밍과 무관하게 항상 같음
+            for i, fut in enumerate(futures, 1):
+                res, err, log = fut.result()
+                results.append(res)
+                if log is None:
+                    continue  # 앞선 파일의 예외로 시작하지 않음
+                real_stdout.write(f"----- [{i}/{len(paths)}] {res['path']} ({res['elapsed']:.2f}s) -----\n")
+                real_stdout.write(log)
+                real_stdout.flush()
+                if err is not None and first_error is None:
+                    first_error = err
+    finally:
+        sys.stdout = real_stdout
+    if first_error is not None:
+        # 실패를 상위(main)로 전달. 시작하지 않은 파일 수는 요약의 cancelled 로 보임
+        print_run_summary(results, None, concurrency)
+        raise first_error
+    return results
+
+def print_run_summary(results: List[dict], elapsed: Optional[float], concurrency: int):
+    counts = {"ok": 0, "partial": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+    for r in results:
+        counts[r.get("status", "failed")] = counts.get(r.get("status", "failed"), 0) + 1
+    line = (f"[SUMMARY] files: {len(results)} ok: {counts['ok']} skipped: {counts['skipped']} "
+            f"failed: {counts['failed']} concurrency: {concurrency}")
+    if counts["partial"]:
+        line += f" partial: {counts['partial']}"
+    if counts.get("cancelled"):
+        line += f" cancelled: {counts['cancelled']}"
+    if counts["unchanged"]:
+        line += f" unchanged: {counts['unchanged']}"
+    if elapsed is not None:
+        rate = len(results) / elapsed if elapsed > 0 else 0.0
+        line += f" elapsed: {elapsed:.2f}s throughput: {rate:.2f} files/s"
+    print(line)
+
+# -------------------
+# asyncio 엔진 (CLASSIFY_ENGINE=asyncio): fetch -> README -> classify -> publish 단계를 크기 제한 큐로 연결
+# -------------------
+_ASYNC_STAGES = ("fetch", "readme", "classify", "publish")
+
+async def run_async_pipeline(ctx: dict, targets: List[str]) -> List[dict]:
+    """
+    파일 하나하나가 4단계를 차례로 지나가고, 단계 사이는 ASYNC_QUEUE_SIZE 크기의 asyncio.Queue 로 연결합니다.
+    - 단계마다 워커 수가 따로라서 느린 LLM 호출이 GitHub 읽기를 막지 않음
+    - 큐가 가득 차면 앞 단계가 기다리므로 push 가 커도 동시에 메모리에 올라가는 파일 수가 제한됨
+    - 블로킹 호출(requests)은 asyncio.to_thread 로, 게시는 NotionPublisher 의 Future 를 기다림
+    - 한 파일에서 난 예외는 그 파일만 failed 로 남기고 나머지는 계속 처리
+    로그는 파일 단위로 모아서 끝난 순서대로 출력합니다.
+    """
+    publisher = ctx.get("publisher")
+    limits = {
+        "fetch": ASYNC_FETCH_CONCURRENCY,
+        "readme": ASYNC_README_CONCURRENCY,
+        "classify": ASYNC_CLASSIFY_CONCURRENCY,
+        "publish": publisher.workers if publisher is not None else NOTION_WORKERS,
+    }
+    loop = asyncio.get_running_loop()
+    # to_thread 가 쓰는 기본 실행기를 단계 워커 수 합만큼 키워서, 단계별 제한이 실제 병목이 되게 함
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=sum(limits.values()), thread_name_prefix="stage"))
+    queues = {name: asyncio.Queue(maxsize=ASYNC_QUEUE_SIZE) for name in _ASYNC_STAGES}
+    real_stdout = sys.stdout
+    proxy = _PerFileStdout(real_stdout)
+    results: List[dict] = []
+
+    def _captured(job, fn, *args):
+        # 실행기 스레드에서 호출: 이 스레드의 출력만 모아서 파일 로그에 붙임
+        proxy.begin()
+        try:
+            return fn(*args)
+        finally:
+            job["log"].append(proxy.end())
+
+    def _finish(job, status, page_id=None):
+        elapsed = time.perf_counter() - job["t0"]
+        real_stdout.write(f"----- [{len(results) + 1}/{len(targets)}] {job['path']} ({elapsed:.2f}s) -----\n")
+        real_stdout.write("".join(job["log"]))
+        real_stdout.flush()
+        results.append({"path": job["path"], "status": status, "page_id": page_id, "elapsed": elapsed})
+
+    async def _fetch(job):
+        job["t0"] = time.perf_counter()
+        job["log"].append(f"[PROCESS] handling: {job['path']}\n")
+        job["content"] = await asyncio.to_thread(_captured, job, fetch_source, ctx, job["path"])
+        if not job["content"]:
+            job["log"].append(f"[WARN] content not fetched for {job['path']}\n")
+            _finish(job, "skipped")
+            return False
+        return True
+
+    async def _readme(job):
+        job["readme"] = await asyncio.to_thread(_captured, job, resolve_readme, ctx, job["path"])
+        return True
+
+    async def _classify(job):
+        page_id = unchanged_since_sync(ctx, job["path"], job["content"], job["readme"])
+        if page_id:
+            job["log"].append(f"[STATE] unchanged since last sync -> skip: {job['path']}\n")
+            _finish(job, "unchanged", page_id)
+            return False
+        parsed = await asyncio.to_thread(_captured, job, classify_source, ctx, job["path"], job["content"],
+                                         job["readme"])
+        job["meta"] = build_page_meta(ctx, job["path"], job["content"], job["readme"], parsed)
+        job["parsed"] = parsed
+        return True
+
+    async def _publish(job):
+        with METRICS.span("stage.publish"):
+            if publisher is not None:
+                res = await asyncio.wrap_future(publisher.submit(job["meta"]))
+                job["log"].append(res.pop("log", ""))
+                page_id = res["page_id"]
+            else:
+                page_id = await asyncio.to_thread(_captured, job, publish_notion_page, job["meta"])
+        record_sync_state(job["path"], job["content"], job["readme"], job["parsed"], page_id)
+        job["content"] = None
+        _finish(job, publish_status(page_id), page_id)
+        return False
+
+    handlers = {"fetch": _fetch, "readme": _readme, "classify": _classify, "publish": _publish}
+
+    async def _worker(name, outq):
+        inq = queues[name]
+        while True:
+            job = await inq.get()
+            if job is None:
+                return
+            METRICS.observe("queue.wait", time.perf_counter() - job["queued_at"], stage=name)
+            try:
+                forward = await handlers[name](job)
+            except Exception:
+                job.setdefault("t0", time.perf_counter())
+                job["log"].append(f"[ERROR] {name} stage failed for {job['path']}\n" + traceback.format_exc())
+                _finish(job, "failed")
+                continue
+            if forward:
+                job["queued_at"] = time.perf_counter()
+                await outq.put(job)  # 다음 큐가 가득 차 있으면 여기서 대기 (backpressure)
+
+    async def _stage(i, name):
+        nxt = _ASYNC_STAGES[i + 1] if i + 1 < len(_ASYNC_STAGES) else None
+        outq = queues[nxt] if nxt else None
+        await asyncio.gather(*(_worker(name, outq) for _ in range(limits[name])))
+        if nxt:
+            # 이 단계 워커가 모두 끝나면 다음 단계 워커 수만큼 종료 신호(None)를 보냄
+            for _ in range(limits[nxt]):
+                await outq.put(None)
+
+    async def _feed():
+        for p in targets:
+            await queues["fetch"].put({"path": p, "log": [], "queued_at": time.perf_counter()})
+        for _ in range(limits["fetch"]):
+            await queues["fetch"].put(None)
+
+    tasks = [asyncio.create_task(_feed())]
+    tasks += [asyncio.create_task(_stage(i, name)) for i, name in enumerate(_ASYNC_STAGES)]
+    sys.stdout = proxy
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # 취소(Ctrl+C 등)나 예기치 못한 오류: 남은 단계를 모두 취소하고 정리한 뒤 전달
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        sys.stdout = real_stdout
+    order = {p: i for i, p in enumerate(targets)}
+    results.sort(key=lambda r: order.get(r["path"], 0))
+    return results
+
+def prefetch_bulk(ctx: dict, targets: List[str]):
+    """
+    API 모드에서 대상이 BULK_FETCH_THRESHOLD 개 이상이면 커밋 tarball 을 한 번 받아
+    소스와 같은 폴더 README 를 ctx["prefetched"] 에 미리 채움 (fetch_content 가 먼저 확인)
+    tarball 을 끝까지 읽었으면 못 찾은 경로도 None 으로 넣어서 없는 README 를 API 로 다시 묻지 않음
+    """
+    if ctx.get("use_local") or BULK_FETCH_THRESHOLD <= 0 or len(targets) < BULK_FETCH_THRESHOLD:
+        return
+    wanted = set(targets)
+    folders = {os.path.dirname(p) for p in targets if os.path.dirname(p)}
+    wanted |= {ctx["readmes"].path_for(folder) for folder in folders}
+    ref = ctx.get("commit") or ctx["ref"]
+    started = time.perf_counter()
+    with METRICS.span("bulk.fetch"):
+        found, complete = fetch_tarball_entries(ctx["owner"], ctx["repo"], ref, wanted)
+    if complete:
+        found = {p: found.get(p) for p in wanted}
+    ctx.setdefault("prefetched", {}).update(found)
+    hits = sum(1 for v in found.values() if v is not None)
+    METRICS.incr("bulk_fetch_entries", hits)
+    print(f"[BULK] tarball {ref[:12]}: {hits}/{len(wanted)} entries in {time.perf_counter() - started:.2f}s "
+          f"for {len(targets)} file(s) ({'complete' if complete else 'partial -> API fallback for the rest'})")
+
+def process_targets(ctx: dict, targets: List[str], handler=None) -> List[dict]:
+    """
+    targets 를 (배치 모드면 먼저 묶어서 분류한 뒤) 워커 풀로 처리. handler 기본값은 process_file
+    CLASSIFY_ENGINE=asyncio 면 단계별 파이프라인으로 처리 (파일별 예외는 안에서 격리되므로 handler 는 쓰지 않음)
+    대상이 많으면 먼저 tarball 한 번으로 내용을 미리 읽음 (prefetch_bulk)
+    """
+    prefetch_bulk(ctx, targets)
+    if OPENAI_BATCH_SIZE > 1 and len(targets) > 1:
+        # 배치 모드: 내용을 먼저 모두 읽고, 캐시에 없는 것들을 묶어서 분류
+        with ThreadPoolExecutor(max_workers=CLASSIFY_CONCURRENCY) as pool:
+            contents = dict(zip(targets, pool.map(lambda p: fetch_content(ctx, p), targets)))
+        ctx["contents"] = {p: c for p, c in contents.items() if c}
+        items = [(p, c, problem_text_for_prompt(ctx["readmes"].get(os.path.dirname(p))))
+                 for p, c in ctx["contents"].items()
+                 if _ROUTER.route(p) != "sql" and not unchanged_since_sync(ctx, p, c, ctx["readmes"].get(os.path.dirname(p)))]
+        with METRICS.span("stage.classify_batched"):
+            ctx["classifications"] = classify_targets_batched(items, CLASSIFY_CONCURRENCY)
+    if CLASSIFY_ENGINE == "asyncio":
+        return asyncio.run(run_async_pipeline(ctx, targets))
+    if handler is None:
+        handler = lambda p: process_file(ctx, p)  # noqa: E731
+    return NotionPublisher.collect(run_file_pool(targets, handler, CLASSIFY_CONCURRENCY))
+
+def finish_run(ctx: dict, results: List[dict], elapsed: float):
+    """실행 요약 출력 + 게시 워커 정리 + 캐시 정리"""
+    print_run_summary(results, elapsed, CLASSIFY_CONCURRENCY)
+    print_publish_summary(ctx["publisher"].close())
+    print_openai_summary()
+    print_batch_summary()
+    if _LOCAL_STATS["local"]:
+        print(f"[LOCAL] classified locally (LLM skipped): {_LOCAL_STATS['local']}")
+    if CLASSIFY_CACHE_DIR:
+        print(f"[CACHE] classify hits: {_CACHE_STATS['hits']} misses: {_CACHE_STATS['misses']} "
+              f"stores: {_CACHE_STATS['stores']}")
+        prune_classification_cache()
+
+# -------------------
+# 전체 아카이브 백필 (--backfill): 체크포인트로 중단된 지점부터 이어서 처리
+# -------------------
+def iter_archive_files(roots: List[str]) -> Iterator[str]:
+    """아카이브 폴더를 정렬된 순서로 걸으면서 게시 대상(classify/sql) 경로를 하나씩 돌려줌 (전체 목록을 만들지 않음)"""
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(GITHUB_WORKSPACE, root)):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.relpath(os.path.join(dirpath, name), GITHUB_WORKSPACE).replace(os.sep, "/")
+                if is_publish_target(path):
+                    yield path
+
+class BackfillCheckpoint:
+    """
+    처리를 마친 경로를 JSON Lines 파일에 한 줄씩 덧붙입니다.
+    다시 실행하면 status 가 ok 인 경로는 건너뛰고, 실패했거나 아직 안 한 파일부터 이어서 처리합니다.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # 중간에 끊긴 마지막 줄
+                    if rec.get("status") in ("ok", "unchanged"):
+                        self.done.add(rec.get("path"))
+        print(f"[BACKFILL] checkpoint {path}: {len(self.done)} file(s) already done")
+
+    def record(self, results: List[dict]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps({"path": r["path"], "status": r.get("status"), "page_id": r.get("page_id"),
+                                    "at": int(time.time())}, ensure_ascii=False) + "\n")
+                if r.get("status") in ("ok", "unchanged"):
+                    self.done.add(r["path"])
+
+def _repo_from_git() -> tuple:
+    """GITHUB_REPOSITORY 또는 origin remote 에서 (owner, repo) 추출"""
+    full = os.getenv("GITHUB_REPOSITORY", "")
+    if not full:
+        remote = (_git("remote", "get-url", "origin") or "").strip()
+        m = re.search(r'github\.com[:/]([^/]+/[^/]+?)(?:\.git)?$', remote)
+        full = m.group(1) if m else ""
+    owner, _, repo = full.partition("/")
+    return owner, repo
+
+def run_backfill(args):
+    owner, repo = _repo_from_git()
+    ref = os.getenv("GITHUB_REF_NAME") or (_git("rev-parse", "--abbrev-ref", "HEAD") or "main").strip()
+    print(f"[BACKFILL] repo: {owner}/{repo} ref: {ref} roots: {args.roots}")
+    ctx = {"owner": owner, "repo": repo, "ref": ref, "use_local": True, "force": args.force}
+    ctx["readmes"] = ReadmeResolver(ctx)
+    ctx["publisher"] = NotionPublisher(NOTION_WORKERS)
+    checkpoint = BackfillCheckpoint(args.checkpoint)
+
+    def _handle(path):
+        # 파일 하나가 실패해도 백필 전체가 멈추지 않도록 여기서 잡고, 체크포인트에는 failed 로 남김
+        try:
+            return process_file(ctx, path)
+        except Exception as e:
+            print("[ERROR] backfill failed for", path, e)
+            traceback.print_exc(file=sys.stdout)
+            return {"path": path, "status": "failed", "page_id": None}
+
+    pending = (p for p in iter_archive_files(args.roots) if p not in checkpoint.done)
+    if args.limit:
+        pending = itertools.islice(pending, args.limit)
+    started = time.perf_counter()
+    results: List[dict] = []
+    chunk_size = max(1, CLASSIFY_CONCURRENCY * 4)
+    while True:
+        chunk = list(itertools.islice(pending, chunk_size))
+        if not chunk:
+            break
+        chunk_results = process_targets(ctx, chunk, _handle)
+        chunk_results += process_variants(ctx, [], chunk_results)
+        checkpoint.record(chunk_results)
+        results += chunk_results
+        ctx.pop("contents", None)
+        ctx.pop("classifications", None)
+        print(f"[BACKFILL] progress: {len(results)} processed this run, {len(checkpoint.done)} done in total")
+    finish_run(ctx, results, time.perf_counter() - started)
+
+# -------------------
+# 아카이브 로컬 분석 (--analyze): OpenAI/Notion 없이 ast 분석만 프로세스 풀로 돌려서 분포를 봄
+# -------------------
+def _analyze_archive_file(path: str) -> dict:
+    """프로세스 풀 작업 단위 (pickle 되도록 모듈 최상위 함수)"""
+    with open(os.path.join(GITHUB_WORKSPACE, path), "r", encoding="utf-8", errors="replace") as f:
+        info = analyze_python_source(f.read())
+    if info is None:
+        return {"path": path, "status": "syntax_error"}
+    local = 0 < LOCAL_CLASSIFY_MAX_SCORE and info["bounded"] and info["score"] <= LOCAL_CLASSIFY_MAX_SCORE
+    return dict(info, path=path, status="local" if local else "llm")
+
+def run_analyze(args):
+    paths = [p for p in iter_archive_files(args.roots) if ext_to_language(p) == "python"]
+    if args.limit:
+        paths = paths[:args.limit]
+    workers = args.workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    # CPU 작업이라 스레드 대신 프로세스 풀. 파일이 작으므로 몇 개씩 묶어서 넘김
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(_analyze_archive_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    elapsed = time.perf_counter() - started
+
+    status_counts, tag_counts, complexity_counts = {}, {}, {}
+    for row in rows:
+        status_counts[row["status"]] = status_counts.get(row["status"], 0) + 1
+        if row["status"] == "syntax_error":
+            continue
+        for tag in row["tags"]:
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+        complexity_counts[row["time_complexity"]] = complexity_counts.get(row["time_complexity"], 0) + 1
+    print(f"[ANALYZE] python files: {len(rows)} workers: {workers} elapsed: {elapsed:.2f}s "
+          f"threshold: {LOCAL_CLASSIFY_MAX_SCORE}")
+    print("[ANALYZE] status:", " ".join(f"{k}={v}" for k, v in sorted(status_counts.items())))
+    top = sorted(tag_counts.items(), key=lambda kv: (-kv[1], kv[0]))[:10]
+    print("[ANALYZE] tags:", ", ".join(f"{k}({v})" for k, v in top))
+    print("[ANALYZE] complexity:", ", ".join(f"{k}({v})" for k, v in sorted(complexity_counts.items())))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        print("[ANALYZE] wrote", args.output)
+
+# -------------------
+# 동기화 상태 조회 (--state-query): 아직 게시 안 된 파일 / 마지막 게시 뒤 README 가 바뀐 파일
+# -------------------
+def run_state_query(args):
+    synced = _STATE.synced_paths()
+    if args.state_query == "never-synced":
+        paths = [p for p in iter_archive_files(args.roots) if p not in synced]
+    else:
+        # README 는 체크아웃된 작업 트리에서 다시 파싱해서 게시 당시 해시와 비교 (폴더마다 한 번)
+        current = {}
+        paths = []
+        for path, row in sorted(synced.items()):
+            folder = os.path.dirname(path)
+            if folder not in current:
+                text = read_local_file(f"{folder}/README.md") if folder else None
+                current[folder] = readme_hash(parse_readme(text) if text else {})
+            if current[folder] != row["readme_hash"]:
+                paths.append(path)
+    for path in paths:
+        print(path)
+    print(f"[STATE] {args.state_query}: {len(paths)} file(s) (synced: {len(synced)}, db: {STATE_DB_PATH})")
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="분류 후 Notion 에 게시 (기본: push 이벤트의 변경 파일)")
+    parser.add_argument("--backfill", action="store_true", help="push 이벤트 대신 아카이브 전체를 처리")
+    parser.add_argument("--roots", nargs="+", default=ARCHIVE_ROOTS, help="백필할 최상위 폴더")
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT, help="백필 진행 상황 파일 (JSON Lines)")
+    parser.add_argument("--limit", type=int, default=0, help="이번 실행에서 처리할 최대 파일 수 (0 = 전부)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="아카이브의 파이썬 풀이를 로컬(ast)로만 분석해서 LLM 생략 가능 비율을 출력")
+    parser.add_argument("--workers", type=int, default=0, help="--analyze 프로세스 수 (0 = CPU 수)")
+    parser.add_argument("--output", default="", help="--analyze 결과를 저장할 JSON Lines 경로")
+    parser.add_argument("--force", action="store_true", help="동기화 상태와 상관없이 모든 대상 파일을 다시 게시")
+    parser.add_argument("--state-query", choices=["never-synced", "readme-changed"],
+                        help="동기화 상태 저장소 조회만 하고 종료")
+    return parser.parse_args(argv)
+
+def collect_change_set(event: dict, owner: str, repo: str, use_local: bool) -> dict:
+    """변경 집합: 로컬 git diff -> 이벤트 payload -> commit API 순서로 시도"""
+    changes: dict = {}
+    if use_local:
+        # 로컬 모드: 변경 목록도 체크아웃된 git 히스토리에서 구함
+        changes = get_change_set_from_git(event.get("before"))
+    if not changes and event.get("commits"):
+        changes = get_change_set_from_event(event)
+
+    # 폴백: payload 에 커밋 목록이 없으면 commit API로 조회
+    elif not changes:
+        commit_id = event.get("after") or event.get("head_commit", {}).get("id")
+        if commit_id:
+            print("[INFO] no commits in event payload -> fetching commit details for", commit_id)
+            changes = fetch_change_set_from_commit(owner, repo, commit_id)
+        else:
+            print("[WARN] no commit id available")
+    return changes
+
+def handle_removed_sources(changes: dict):
+    """
+    삭제된 풀이는 처리하지 않고 건너뜀. NOTION_ARCHIVE_REMOVED(+ NOTION_UPSERT)면 인덱스로 찾은 페이지를 보관.
+    이름이 바뀐 풀이는 인덱스의 예전 경로 기록만 지움 (페이지는 새 경로를 처리할 때 같은 문제 키로 갱신됨)
+    """
+    upsert = NOTION_UPSERT and NOTION_TOKEN and NOTION_DB_ID
+    for path, info in changes.items():
+        if not is_publish_target(path):
+            continue
+        if info["status"] == "renamed" and upsert and _PAGE_INDEX.key_for_path(info["previous"]):
+            _PAGE_INDEX.set_path(info["previous"], None)
+        elif info["status"] == "removed":
+            _STATE.record(path, "", "", None, None, "removed")
+            if NOTION_ARCHIVE_REMOVED and upsert:
+                archive_notion_page_for_path(path)
+            else:
+                print("[INFO] skipping removed file:", path)
+
 # -------------------
 # main
 # -------------------
-def main():
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
     try:
         print_envs()
+        if args.backfill:
+            run_backfill(args)
+            return
+        if args.analyze:
+            run_analyze(args)
+            return
+        if args.state_query:
+            run_state_query(args)
+            return
         event = read_event()
         if not event:
             print("[ERR] no event payload -> exiting")
@@ -657,107 +3896,51 @@ def main():
         owner, repo = owner_repo.split("/")
 
         ref = event.get("ref", "main").split("/")[-1]
-        changed_files = get_changed_files_from_event(event)
-
-        # 폴백: event에서 파일을 못 가져오면 commit API로 조회
-        if not changed_files:
-            commit_id = event.get("after") or event.get("head_commit", {}).get("id")
-            if commit_id:
-                print("[INFO] changed_files empty -> fetching commit details for", commit_id)
-                changed_files = fetch_files_from_commit(owner, repo, commit_id)
-            else:
-                print("[WARN] no commit id available")
+        use_local = resolve_source_mode(event)
+        ctx = {"owner": owner, "repo": repo, "ref": ref, "use_local": use_local, "force": args.force,
+               "commit": event.get("after") or event.get("head_commit", {}).get("id")}
+        ctx["readmes"] = ReadmeResolver(ctx)
 
-        if not changed_files:
+        with METRICS.span("event.changed_files"):
+            changes = collect_change_set(event, owner, repo, use_local)
+        changed_files = [p for p, info in changes.items() if info["status"] != "removed"]
+
+        if not changes:
             print("[INFO] No changed files to process. Exiting.")
             test_openai_connectivity()
             test_notion_connectivity()
             return
 
-        # README 파싱 (같은 폴더에 README가 있으면 붙여넣기)
-        attach_map = {}
+        # README 는 풀이 파일을 처리할 때 폴더별로 한 번만 읽음 (이번 push 에 있는 README 는 그 경로를 사용)
+        readmes = ctx["readmes"]
         for fpath in changed_files:
-            if fpath.endswith("README.md") or fpath.lower().endswith("readme.md"):
-                content = get_file_raw(owner, repo, fpath, ref)
-                if content:
-                    parsed_md = parse_readme(content)
-                    folder = os.path.dirname(fpath)
-                    attach_map[folder] = parsed_md
-                    print(f"[INFO] parsed README for folder {folder}: {parsed_md}")
-
-        # 처리할 확장자
-        exts = [".py", ".cpp", ".c", ".java", ".js"]
-        for path in changed_files:
-            if not any(path.endswith(ext) for ext in exts):
-                continue
-            print("[PROCESS] handling:", path)
-            content = get_file_raw(owner, repo, path, ref)
-            if not content:
-                print("[WARN] content not fetched for", path)
-                continue
-
-            folder = os.path.dirname(path)
-            readme_info = attach_map.get(folder, {})
-            problem_text = readme_info.get("problem_text", "") if readme_info else ""
-            problem_url = readme_info.get("problem_url", "") if readme_info else ""
-            perf_memory = readme_info.get("perf_memory", "") if readme_info else ""
-            perf_time = readme_info.get("perf_time", "") if readme_info else ""
-            difficulty = readme_info.get("difficulty", "") if readme_info else ""
-            classification_text = readme_info.get("classification_text", "") if readme_info else ""
-            classification_tags = readme_info.get("classification_tags", []) if readme_info else []
-
-            # LLM 분류 (문제 설명 포함)
-            parsed = classify_with_openai(content, problem_text=problem_text)
-
-            # tags 병합: README 분류 우선, LLM 태그 추가, 중복 제거
-            llm_tags = parsed.get("tags", []) or []
-            tags = []
-            # 우선 README tags (원문) 넣고, LLM 태그 추가
-            for t in classification_tags + llm_tags:
-                if isinstance(t, str) and t.strip():
-                    tt = t.strip()
-                    if tt not in tags:
-                        tags.append(tt)
-
-            # language 결정
-            language = ext_to_language(path)
-
-            # --- 파일명에서 확장자 제거하고 '제목' 만들기 ---
-            filename = os.path.basename(path)            # "이어 붙인 수.py" 또는 "이어 붙인 수.py"
-            name_no_ext, _ext = os.path.splitext(filename)  # ("이어 붙인 수", ".py")
-            
-            # 정제: 유니코드 공백(넓은 공백, NBSP 등)들을 일반 공백으로 바꾸고 중복 공백은 하나로 축소
-            # 주요 유니코드 공백들: \u00A0 (NBSP), \u2000-\u200A (various spaces), \u202F, \u2005, BOM \uFEFF 등
-            title = re.sub(r'[\u00A0\u2000-\u200A\u202F\u2005\uFEFF]', ' ', name_no_ext)  # 특수 공백 정리
-            title = unescape(title)                          # 혹시 HTML 이스케이프가 있으면 되돌리기
-            title = re.sub(r'\s+', ' ', title).strip()       # 연속 공백 -> 하나, 앞뒤 공백 제거
-
-            # --- platform 추출 ---
-            raw_platform = path.split('/', 1)[0] if '/' in path else path
-            # 정리: 유니코드 공백 정리 및 앞뒤 공백 제거
-            platform = re.sub(r'[\u00A0\u2000-\u200A\u202F]', ' ', raw_platform).strip()
-
-            meta = {
-                "title": title,
-                "platform": platform,
-                "tags": tags,
-                "difficulty": difficulty,
-                "language": language,
-                "url": problem_url or f"https://github.com/{owner}/{repo}/blob/{ref}/{path}",
-                "problem_text": problem_text,
-                "classification_text": classification_text,
-                "review": parsed.get("review", "")[:2000],
-                "time_complexity": parsed.get("time_complexity", ""),
-                "perf_memory": perf_memory,
-                "perf_time": perf_time,
-                "code_snippet": content[:1500]
-            }
-            create_notion_page(meta)
+            if fpath.lower().endswith("readme.md"):
+                readmes.register(fpath)
+
+        # 규칙은 모듈 로드 때 한 번 컴파일, 경로마다 한 번만 판정
+        routes = _ROUTER.split([p for p in changed_files if not p.lower().endswith("readme.md")])
+        print("[ROUTE]", " ".join(f"{action}={len(paths)}" for action, paths in routes.items()))
+        for p in routes["skip"]:
+            METRICS.incr("route_skipped")
+            print("[ROUTE] skip:", p)
+        ctx["changed"] = changed_files
+        targets = routes["classify"] + routes["sql"]
+        handle_removed_sources(changes)
+        started = time.perf_counter()
+        ctx["publisher"] = NotionPublisher(NOTION_WORKERS)
+        results = process_targets(ctx, targets)
+        results += process_variants(ctx, routes["variant"], results)
+        finish_run(ctx, results, time.perf_counter() - started)
 
     except Exception as e:
         print("=== UNCAUGHT EXCEPTION ===", e)
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        # 실패해도 이미 만든 페이지는 인덱스에 남겨야 다음 실행에서 중복 생성하지 않음
+        _PAGE_INDEX.save()
+        _STATE.close()
+        write_metrics_report()
 
 if __name__ == "__main__":
     main()
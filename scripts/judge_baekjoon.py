@@ -0,0 +1,213 @@
+# scripts/judge_baekjoon.py
+# 백준 풀이 로컬 채점기: 문제 폴더마다 예제 입력/출력을 모아서 각 풀이(*.py, CodeReview.py 제외)를 자식 프로세스로 실행하고
+# 공백을 정규화한 출력이 같은지, 실행 시간(wall)과 최대 메모리(RSS)를 케이스별로 출력합니다.
+#
+# 예제는 다음 순서로 모읍니다.
+#   1) README.md 의 "예제 입력 N" / "예제 출력 N" 섹션 (<pre>, ``` 코드블럭, 또는 다음 헤딩까지의 본문)
+#   2) 같은 폴더 또는 폴더/tests 의 짝 파일: <이름>.in + <이름>.out
+#
+# 사용법: python scripts/judge_baekjoon.py [--roots 백준] [--timeout 5] [--workers 0] [--filter 1000.]
+#                                         [--json 결과.json]
+# 문제 폴더 단위로 CPU 수만큼의 프로세스 풀에 나눠서 실행합니다.
+# 실패한 케이스가 있거나, 예제를 하나도 못 찾아서 실행한 케이스가 0개면 종료 코드 1.
+# (BaekjoonHub 가 올린 README 에는 예제가 없으므로, 채점하려면 README 에 예제 섹션을 넣거나 .in/.out 짝을 두어야 함)
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from typing import List, Optional
+
+from archive_paths import REPO_ROOT, problem_folders, solution_files
+
+_SAMPLE_HEADING_RE = re.compile(r'^#{1,6}[ \t]*예제[ \t]*(입력|출력)[ \t]*(\d+)[ \t]*$', re.MULTILINE)
+_PRE_RE = re.compile(r'\s*<pre[^>]*>(.*?)</pre>', re.DOTALL | re.IGNORECASE)
+_FENCE_RE = re.compile(r'\s*```[^\n]*\n(.*?)```', re.DOTALL)
+_NEXT_HEADING_RE = re.compile(r'\n#{1,6}[ \t]')
+
+
+# -------------------
+# 예제 수집
+# -------------------
+def readme_samples(text: str) -> List[dict]:
+    """README 의 예제 입력/출력 섹션 -> [{"name", "input", "output"}] (번호순, 짝이 맞는 것만)"""
+    found = {}
+    for m in _SAMPLE_HEADING_RE.finditer(text):
+        rest = text[m.end():]
+        block = _PRE_RE.match(rest) or _FENCE_RE.match(rest)
+        if block:
+            body = block.group(1)
+        else:
+            end = _NEXT_HEADING_RE.search(rest)
+            body = rest[:end.start()] if end else rest
+        kind = "input" if m.group(1) == "입력" else "output"
+        found.setdefault(int(m.group(2)), {})[kind] = unescape(body).strip("\r\n") + "\n"
+    return [{"name": f"예제 {n}", "input": case["input"], "output": case["output"]}
+            for n, case in sorted(found.items()) if "input" in case and "output" in case]
+
+
+def sidecar_samples(folder: str) -> List[dict]:
+    """folder 와 folder/tests 의 <이름>.in / <이름>.out 짝"""
+    cases = []
+    for d in (folder, os.path.join(folder, "tests")):
+        if not os.path.isdir(d):
+            continue
+        for name in sorted(os.listdir(d)):
+            stem, ext = os.path.splitext(name)
+            out_path = os.path.join(d, stem + ".out")
+            if ext != ".in" or not os.path.isfile(out_path):
+                continue
+            with open(os.path.join(d, name), "r", encoding="utf-8") as f_in, \
+                    open(out_path, "r", encoding="utf-8") as f_out:
+                cases.append({"name": os.path.relpath(os.path.join(d, stem), folder),
+                              "input": f_in.read(), "output": f_out.read()})
+    return cases
+
+
+def collect_samples(folder: str) -> List[dict]:
+    cases = []
+    readme = os.path.join(folder, "README.md")
+    if os.path.isfile(readme):
+        with open(readme, "r", encoding="utf-8") as f:
+            cases += readme_samples(f.read())
+    return cases + sidecar_samples(folder)
+
+
+# -------------------
+# 실행 / 비교
+# -------------------
+def normalize_output(text: str) -> List[str]:
+    """줄 끝 공백과 끝의 빈 줄을 무시 (백준 채점 기준과 같게)"""
+    lines = [ln.rstrip() for ln in text.replace("\r\n", "\n").split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def run_case(solution: str, stdin_text: str, timeout: float) -> dict:
+    """
+    풀이 하나를 입력 하나로 실행. 출력/오류는 임시 파일로 받아서 파이프가 막히지 않게 하고,
+    os.wait4 로 직접 거둬서 그 자식의 최대 RSS 를 얻습니다 (시간 초과면 타이머가 kill)
+    """
+    with tempfile.TemporaryFile() as f_in, tempfile.TemporaryFile() as f_out, tempfile.TemporaryFile() as f_err:
+        f_in.write(stdin_text.encode("utf-8"))
+        f_in.seek(0)
+        started = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, os.path.basename(solution)], cwd=os.path.dirname(solution),
+                                stdin=f_in, stdout=f_out, stderr=f_err)
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+        wall = time.perf_counter() - started
+        proc.returncode = os.waitstatus_to_exitcode(status)  # 이미 거뒀으므로 Popen 이 다시 기다리지 않게
+        f_out.seek(0)
+        f_err.seek(0)
+        stdout = f_out.read().decode("utf-8", errors="replace")
+        stderr = f_err.read().decode("utf-8", errors="replace")
+    # ru_maxrss 단위: Linux 는 KB, macOS 는 바이트
+    rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {"stdout": stdout, "stderr": stderr, "returncode": proc.returncode,
+            "timed_out": timed_out.is_set(), "wall": wall, "rss_kb": rss_kb}
+
+
+def judge_folder(folder: str, timeout: float) -> List[dict]:
+    """프로세스 풀 작업 단위: 폴더 안의 풀이들 x 예제들 (pickle 되도록 모듈 최상위 함수)"""
+    rel = os.path.relpath(folder, REPO_ROOT) if folder.startswith(REPO_ROOT + os.sep) else folder
+    cases = collect_samples(folder)
+    solutions = [os.path.join(folder, n) for n in solution_files(folder)]
+    if not cases:
+        return [{"folder": rel, "solution": os.path.basename(s), "case": "", "status": "no_samples"}
+                for s in solutions]
+    rows = []
+    for solution in solutions:
+        for case in cases:
+            res = run_case(solution, case["input"], timeout)
+            if res["timed_out"]:
+                status = "timeout"
+            elif res["returncode"] != 0:
+                status = "error"
+            elif normalize_output(res["stdout"]) == normalize_output(case["output"]):
+                status = "pass"
+            else:
+                status = "fail"
+            row = {"folder": rel, "solution": os.path.basename(solution), "case": case["name"], "status": status,
+                   "wall_ms": round(res["wall"] * 1000, 2), "rss_kb": res["rss_kb"]}
+            if status == "fail":
+                row["expected"] = case["output"][:500]
+                row["actual"] = res["stdout"][:500]
+            elif status == "error":
+                row["stderr"] = res["stderr"][-500:]
+            rows.append(row)
+    return rows
+
+
+# -------------------
+# main
+# -------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="백준 풀이를 예제 입력으로 로컬 채점")
+    parser.add_argument("--roots", nargs="+", default=["백준"], help="채점할 최상위 폴더")
+    parser.add_argument("--timeout", type=float, default=5.0, help="케이스당 제한 시간(초)")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 수 (0 = CPU 수)")
+    parser.add_argument("--filter", default="", help="경로에 이 문자열이 들어간 문제만")
+    parser.add_argument("--json", help="케이스별 결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args(argv)
+
+    folders = problem_folders(args.roots, args.filter)
+    workers = args.workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for folder_rows in pool.map(judge_folder, folders, [args.timeout] * len(folders)):
+            for r in folder_rows:
+                label = f"{r['folder']}/{r['solution']}"
+                if r["status"] == "no_samples":
+                    print(f"[JUDGE] {'SKIP':<7} {label} (no samples)")
+                    continue
+                print(f"[JUDGE] {r['status'].upper():<7} {label} [{r['case']}] "
+                      f"{r['wall_ms']:.1f}ms {r['rss_kb'] / 1024:.1f}MB")
+                if r["status"] == "fail":
+                    print(f"        expected: {r['expected'].strip()[:120]!r}")
+                    print(f"        actual:   {r['actual'].strip()[:120]!r}")
+                elif r["status"] == "error":
+                    print(f"        {r['stderr'].strip().splitlines()[-1] if r['stderr'].strip() else ''}")
+            rows += folder_rows
+    elapsed = time.perf_counter() - started
+
+    counts = {}
+    for r in rows:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    ran = sum(v for k, v in counts.items() if k != "no_samples")
+    print(f"[JUDGE] problems: {len(folders)} cases: {ran} workers: {workers} elapsed: {elapsed:.2f}s")
+    print("[JUDGE] " + " ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    unsampled = len({r["folder"] for r in rows if r["status"] == "no_samples"})
+    if unsampled:
+        print(f"[WARN] {unsampled}/{len(folders)} problem(s) have no samples "
+              f"(README 의 '예제 입력 N'/'예제 출력 N' 섹션 또는 <이름>.in + <이름>.out 을 추가하세요)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    if ran == 0:
+        print("[ERROR] no sample cases ran -> nothing was judged")
+        return 1
+    return 1 if any(r["status"] in ("fail", "error", "timeout") for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
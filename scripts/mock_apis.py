@@ -0,0 +1,536 @@
+# scripts/mock_apis.py
+# GitHub / OpenAI / Notion API 로컬 대체 서버 (벤치마크용, 실제 자격증명 없이 파이프라인 실행)
+# 서버마다 응답 지연(latency), 오류율(error_rate), 초당 요청 한도(rate_limit)를 설정할 수 있습니다.
+# quota 를 주면 quota_window 초마다 채워지는 요청 예산을 실제 API 처럼 응답 헤더로 알려 줍니다
+# (GitHub: X-RateLimit-*, 소진 시 403 / OpenAI: x-ratelimit-*-requests/tokens, 소진 시 429).
+#
+# 단독 실행: python scripts/mock_apis.py [--latency 0.05] [--error-rate 0.0] [--notion-rate 3]
+#   -> 세 서버를 띄우고 classify_and_push.py 에 넘길 환경변수를 출력한 뒤 Ctrl+C 까지 대기
+
+import argparse
+import io
+import json
+import random
+import re
+import tarfile
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Notion 실제 제한: rich_text 한 조각 2000자, 블록당 rich_text 100조각, 요청당 children 100개
+NOTION_TEXT_LIMIT = 2000
+NOTION_RICH_TEXT_ITEMS = 100
+NOTION_CHILDREN_LIMIT = 100
+
+NOTION_SCHEMA = {
+    "Name": {"type": "title"},
+    "Platform": {"type": "select"},
+    "Algorithm": {"type": "multi_select"},
+    "Difficulty": {"type": "select"},
+    "Language": {"type": "select"},
+    "URL": {"type": "url"},
+}
+
+
+class MockAPIServer(ThreadingHTTPServer):
+    """
+    routes: [(method, 경로 정규식, fn(server, match, query, body) -> (status, payload[, headers]))]
+    stats 에 요청/연결/오류/429 수를 셉니다.
+    """
+    daemon_threads = True
+
+    def __init__(self, name: str, routes: list, latency: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, seed: Optional[int] = None, quota: int = 0,
+                 quota_window: float = 60.0, quota_style: str = ""):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.name = name
+        self.routes = [(m, re.compile(p), fn) for m, p, fn in routes]
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.quota = quota
+        self.quota_window = quota_window
+        self.quota_style = quota_style or name
+        self.quota_reset_at = 0.0   # epoch 초
+        self.quota_used = 0
+        self.tokens_used = 0
+        self.state = {}
+        self.reset_stats()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "MockAPIServer":
+        threading.Thread(target=self.serve_forever, name=f"mock-{self.name}", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"requests": 0, "connections": 0, "errors": 0, "throttled": 0, "bytes_out": 0}
+
+    def get_request(self):
+        conn = super().get_request()
+        with self.lock:
+            self.stats["connections"] += 1
+        return conn
+
+    def admit(self) -> Optional[float]:
+        """최근 1초 요청 수가 rate_limit 이상이면 다시 시도할 때까지의 초를, 아니면 None"""
+        if self.rate_limit <= 0:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            while self.window and now - self.window[0] >= 1.0:
+                self.window.popleft()
+            if len(self.window) >= self.rate_limit:
+                return max(0.01, 1.0 - (now - self.window[0]))
+            self.window.append(now)
+        return None
+
+    def take_quota(self, body_bytes: int) -> tuple:
+        """예산에서 요청 하나를 뺌 -> (응답 헤더, 소진 여부). quota 가 없으면 ({}, False)"""
+        if self.quota <= 0:
+            return {}, False
+        now = time.time()
+        token_limit = self.quota * 1000
+        with self.lock:
+            if now >= self.quota_reset_at:
+                self.quota_reset_at = now + self.quota_window
+                self.quota_used = self.tokens_used = 0
+            exhausted = self.quota_used >= self.quota
+            if exhausted:
+                self.stats["throttled"] += 1
+            else:
+                self.quota_used += 1
+                self.tokens_used = min(token_limit, self.tokens_used + body_bytes // 4)
+            remaining = self.quota - self.quota_used
+            reset_in = max(0.0, self.quota_reset_at - now)
+            if self.quota_style == "github":
+                return {
+                    "X-RateLimit-Limit": str(self.quota),
+                    "X-RateLimit-Remaining": str(remaining),
+                    "X-RateLimit-Reset": str(int(self.quota_reset_at + 0.999)),
+                    "X-RateLimit-Used": str(self.quota_used),
+                }, exhausted
+            duration = f"{int(reset_in * 1000)}ms" if reset_in < 1 else f"{int(reset_in // 60)}m{reset_in % 60:.3f}s"
+            return {
+                "x-ratelimit-limit-requests": str(self.quota),
+                "x-ratelimit-remaining-requests": str(remaining),
+                "x-ratelimit-reset-requests": duration,
+                "x-ratelimit-limit-tokens": str(token_limit),
+                "x-ratelimit-remaining-tokens": str(token_limit - self.tokens_used),
+                "x-ratelimit-reset-tokens": duration,
+            }, exhausted
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive 허용
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, payload, headers: Optional[dict] = None):
+        if isinstance(payload, bytes):
+            body, ctype = payload, "application/octet-stream"
+        elif isinstance(payload, str):
+            body, ctype = payload.encode("utf-8"), "text/plain; charset=utf-8"
+        else:
+            body, ctype = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+        headers = dict(headers or {})
+        ctype = headers.pop("Content-Type", ctype)
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.stats["bytes_out"] += len(body)
+
+    def _dispatch(self, method: str):
+        srv = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        with srv.lock:
+            srv.stats["requests"] += 1
+
+        retry_after = srv.admit()
+        if retry_after is not None:
+            with srv.lock:
+                srv.stats["throttled"] += 1
+            self._send(429, {"object": "error", "code": "rate_limited", "message": "rate limited"},
+                       {"Retry-After": f"{retry_after:.2f}"})
+            return
+        quota_headers, exhausted = srv.take_quota(len(raw))
+        if exhausted:
+            status = 403 if srv.quota_style == "github" else 429
+            self._send(status, {"message": "API rate limit exceeded"}, quota_headers)
+            return
+        if srv.latency:
+            time.sleep(srv.latency * srv.random.uniform(0.5, 1.5))
+        if srv.error_rate and srv.random.random() < srv.error_rate:
+            with srv.lock:
+                srv.stats["errors"] += 1
+            self._send(503, {"message": "injected error"})
+            return
+
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            self._send(400, {"message": "invalid json"})
+            return
+        for m, pattern, fn in srv.routes:
+            match = pattern.fullmatch(parts.path)
+            if m == method and match:
+                status, payload, *rest = fn(srv, match, query, body)
+                headers = dict(quota_headers)
+                headers.update(rest[0] if rest and rest[0] else {})
+                self._send(status, payload, headers)
+                return
+        self._send(404, {"message": f"no route for {method} {parts.path}"})
+
+
+# -------------------
+# GitHub
+# -------------------
+def _gh_contents(srv, match, query, body):
+    path = unquote(match.group(3))
+    files = srv.state["files"]
+    if path not in files:
+        return 404, {"message": "Not Found"}
+    return 200, files[path]
+
+
+def _gh_tarball_redirect(srv, match, query, body):
+    # 실제 API 처럼 codeload 로 302 (여기서는 같은 서버의 다른 경로)
+    return 302, "", {"Location": f"/codeload/{match.group(1)}/{match.group(2)}/legacy.tar.gz/{match.group(3)}"}
+
+
+def _gh_tarball(srv, match, query, body):
+    """files 전체를 "{owner}-{repo}-{ref}/" 아래에 담은 tar.gz"""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for path, content in sorted(srv.state["files"].items()):
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(f"{match.group(1)}-{match.group(2)}-{match.group(3)[:7]}/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return 200, buf.getvalue(), {"Content-Type": "application/x-gzip"}
+
+
+def _gh_commit(srv, match, query, body):
+    paths = srv.state["commits"].get(match.group(3), [])
+    return 200, {"sha": match.group(3), "files": [{"filename": p, "status": "added"} for p in paths]}
+
+
+def github_server(files: Optional[dict] = None, commits: Optional[dict] = None, **opts) -> MockAPIServer:
+    """files: {경로: 내용}, commits: {sha: [경로, ...]}"""
+    srv = MockAPIServer("github", [
+        ("GET", r"/repos/([^/]+)/([^/]+)/contents/(.+)", _gh_contents),
+        ("GET", r"/repos/([^/]+)/([^/]+)/commits/([^/]+)", _gh_commit),
+        ("GET", r"/repos/([^/]+)/([^/]+)/tarball/([^/]+)", _gh_tarball_redirect),
+        ("GET", r"/codeload/([^/]+)/([^/]+)/legacy\.tar\.gz/([^/]+)", _gh_tarball),
+    ], **opts)
+    srv.state.update(files=files or {}, commits=commits or {})
+    return srv
+
+
+# -------------------
+# OpenAI
+# -------------------
+_SAMPLE_TAGS = ["구현", "수학", "그리디", "정렬", "DP", "BFS", "문자열", "해시"]
+
+
+def _fake_classification(seed_text: str) -> dict:
+    h = sum(seed_text.encode("utf-8")) % len(_SAMPLE_TAGS)
+    return {"tags": [_SAMPLE_TAGS[h]], "review": "목업 리뷰: 입력 처리 후 바로 계산합니다.", "time_complexity": "O(n)"}
+
+
+def _openai_chat(srv, match, query, body):
+    messages = body.get("messages") or [{}]
+    prompt = messages[-1].get("content", "")
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 2
+    # 프롬프트 캐시 흉내: 1024 토큰 이상 요청에서 전에 본 system prefix 는 128 토큰 단위로 cached_tokens 에 잡힘
+    prefix = messages[0].get("content", "") if len(messages) > 1 and messages[0].get("role") == "system" else ""
+    with srv.lock:
+        seen = prefix in srv.state.setdefault("prefixes", set())
+        srv.state["prefixes"].add(prefix)
+    cached = (len(prefix) // 2 // 128) * 128 if prefix and seen and prompt_tokens >= 1024 else 0
+    paths = re.findall(r"^=== path: (.+)$", prompt, flags=re.MULTILINE)
+    if paths:
+        items = [dict(path=p, **_fake_classification(p)) for p in paths]
+        # 구조화 출력이면 배치 스키마(최상위 객체의 items 배열)에 맞춰 돌려줌
+        content = json.dumps({"items": items} if body.get("response_format") else items, ensure_ascii=False)
+    else:
+        content = json.dumps(_fake_classification(prompt[-200:]), ensure_ascii=False)
+        # 스키마 고정(response_format)이 아니면 wander_rate 확률로 JSON 밖으로 새는 응답
+        if not body.get("response_format") and srv.random.random() < srv.state.get("wander_rate", 0.0):
+            if srv.random.random() < 0.5:
+                content = f"분류 결과입니다.\n```json\n{content}\n```\n참고로 입력이 작습니다."
+            else:
+                content = "결과: " + repr(json.loads(content))  # 파이썬 dict 표기 -> JSON 해석 실패
+    if body.get("stream"):
+        # SSE: 16자씩 delta 로 나눠 보내고 [DONE] 으로 끝냄
+        events = []
+        for i in range(0, len(content), 16):
+            chunk = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": content[i:i + 16]}}]}
+            events.append("data: " + json.dumps(chunk, ensure_ascii=False) + "\n\n")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append("data: " + json.dumps({"object": "chat.completion.chunk", "choices": [],
+                                                 "usage": _usage(prompt_tokens, cached, content)}) + "\n\n")
+        events.append("data: [DONE]\n\n")
+        return 200, "".join(events), {"Content-Type": "text/event-stream"}
+    return 200, {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "model": body.get("model", ""),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": _usage(prompt_tokens, cached, content),
+    }
+
+
+def _usage(prompt_tokens: int, cached: int, content: str) -> dict:
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 2,
+            "total_tokens": prompt_tokens + len(content) // 2,
+            "prompt_tokens_details": {"cached_tokens": cached}}
+
+
+def openai_server(wander_rate: float = 0.0, **opts) -> MockAPIServer:
+    srv = MockAPIServer("openai", [
+        ("POST", r"/chat/completions", _openai_chat),
+        ("GET", r"/models", lambda srv, m, q, b: (200, {"object": "list", "data": []})),
+    ], **opts)
+    srv.state["wander_rate"] = wander_rate
+    return srv
+
+
+# -------------------
+# Notion
+# -------------------
+def _notion_error(status: int, code: str, message: str):
+    return status, {"object": "error", "status": status, "code": code, "message": message}
+
+
+def _validate_children(children: list) -> Optional[tuple]:
+    if len(children) > NOTION_CHILDREN_LIMIT:
+        return _notion_error(400, "validation_error",
+                             f"body.children.length should be ≤ {NOTION_CHILDREN_LIMIT}, instead was {len(children)}.")
+    for block in children:
+        inner = block.get(block.get("type", ""), {})
+        if len(inner.get("rich_text", [])) > NOTION_RICH_TEXT_ITEMS:
+            return _notion_error(400, "validation_error",
+                                 f"body.children.rich_text.length should be ≤ {NOTION_RICH_TEXT_ITEMS}, "
+                                 f"instead was {len(inner['rich_text'])}.")
+        for rt in inner.get("rich_text", []):
+            content = rt.get("text", {}).get("content", "")
+            if len(content) > NOTION_TEXT_LIMIT:
+                return _notion_error(400, "validation_error",
+                                     f"body.children.rich_text.text.content.length should be ≤ {NOTION_TEXT_LIMIT}, "
+                                     f"instead was {len(content)}.")
+    return None
+
+
+def _validate_properties(srv, properties: dict) -> Optional[tuple]:
+    schema = srv.state["schema"]
+    for name in properties:
+        if name not in schema:
+            return _notion_error(400, "validation_error", f"{name} is not a property that exists.")
+    return None
+
+
+def _new_blocks(srv, children: list) -> list:
+    ids = []
+    for block in children:
+        bid = str(uuid.uuid4())
+        srv.state["blocks"][bid] = block
+        ids.append(bid)
+    return ids
+
+
+def _notion_db(srv, match, query, body):
+    return 200, {"object": "database", "id": match.group(1), "properties": srv.state["schema"]}
+
+
+def _notion_query(srv, match, query, body):
+    with srv.lock:
+        pages = [p for p in srv.state["pages"].values() if not p.get("archived")]
+    start = int(body.get("start_cursor") or 0)
+    size = int(body.get("page_size") or 100)
+    chunk = pages[start:start + size]
+    has_more = start + size < len(pages)
+    return 200, {"object": "list", "results": chunk, "has_more": has_more,
+                 "next_cursor": str(start + size) if has_more else None}
+
+
+def _plain_property(value: dict) -> dict:
+    """요청 형식의 property 값을 응답 형식(plain_text 포함)으로"""
+    out = dict(value)
+    for key in ("title", "rich_text"):
+        if key in value:
+            out["type"] = key
+            out[key] = [dict(t, plain_text=t.get("text", {}).get("content", "")) for t in value[key]]
+    for key in ("url", "select", "multi_select"):
+        if key in value:
+            out["type"] = key
+    return out
+
+
+def _notion_create(srv, match, query, body):
+    err = _validate_properties(srv, body.get("properties", {})) or _validate_children(body.get("children", []))
+    if err:
+        return err
+    pid = str(uuid.uuid4())
+    with srv.lock:
+        srv.state["pages"][pid] = {
+            "object": "page", "id": pid, "archived": False,
+            "properties": {k: _plain_property(v) for k, v in body.get("properties", {}).items()},
+        }
+        srv.state["children"][pid] = _new_blocks(srv, body.get("children", []))
+    return 200, srv.state["pages"][pid]
+
+
+def _notion_update(srv, match, query, body):
+    pid = match.group(1)
+    page = srv.state["pages"].get(pid)
+    if page is None:
+        return _notion_error(404, "object_not_found", f"Could not find page with ID: {pid}.")
+    err = _validate_properties(srv, body.get("properties", {}))
+    if err:
+        return err
+    with srv.lock:
+        page["properties"].update({k: _plain_property(v) for k, v in body.get("properties", {}).items()})
+        if "archived" in body:
+            page["archived"] = bool(body["archived"])
+    return 200, page
+
+
+def _notion_children_list(srv, match, query, body):
+    ids = srv.state["children"].get(match.group(1))
+    if ids is None:
+        return _notion_error(404, "object_not_found", "Could not find block.")
+    start = int(query.get("start_cursor") or 0)
+    size = int(query.get("page_size") or 100)
+    chunk = ids[start:start + size]
+    has_more = start + size < len(ids)
+    return 200, {"object": "list", "results": [{"object": "block", "id": b} for b in chunk],
+                 "has_more": has_more, "next_cursor": str(start + size) if has_more else None}
+
+
+def _notion_children_append(srv, match, query, body):
+    ids = srv.state["children"].get(match.group(1))
+    if ids is None:
+        return _notion_error(404, "object_not_found", "Could not find block.")
+    err = _validate_children(body.get("children", []))
+    if err:
+        return err
+    with srv.lock:
+        new_ids = _new_blocks(srv, body.get("children", []))
+        ids.extend(new_ids)
+    return 200, {"object": "list", "results": [{"object": "block", "id": b} for b in new_ids]}
+
+
+def _notion_block_delete(srv, match, query, body):
+    bid = match.group(1)
+    with srv.lock:
+        if srv.state["blocks"].pop(bid, None) is None:
+            return _notion_error(404, "object_not_found", "Could not find block.")
+        for ids in srv.state["children"].values():
+            if bid in ids:
+                ids.remove(bid)
+    return 200, {"object": "block", "id": bid, "archived": True}
+
+
+def notion_server(schema: Optional[dict] = None, **opts) -> MockAPIServer:
+    srv = MockAPIServer("notion", [
+        ("GET", r"/databases/([^/]+)", _notion_db),
+        ("POST", r"/databases/([^/]+)/query", _notion_query),
+        ("POST", r"/pages", _notion_create),
+        ("PATCH", r"/pages/([^/]+)", _notion_update),
+        ("GET", r"/blocks/([^/]+)/children", _notion_children_list),
+        ("PATCH", r"/blocks/([^/]+)/children", _notion_children_append),
+        ("DELETE", r"/blocks/([^/]+)", _notion_block_delete),
+    ], **opts)
+    srv.state.update(schema=dict(schema or NOTION_SCHEMA), pages={}, children={}, blocks={})
+    return srv
+
+
+# -------------------
+# 세 서버를 한 번에
+# -------------------
+def start_all(files: Optional[dict] = None, latency: float = 0.0, error_rate: float = 0.0,
+              github_rate: float = 0.0, openai_rate: float = 0.0, notion_rate: float = 3.0,
+              openai_latency: Optional[float] = None, openai_wander: float = 0.0,
+              github_quota: int = 0, openai_quota: int = 0, quota_window: float = 60.0,
+              seed: Optional[int] = None) -> dict:
+    """{"github": server, "openai": server, "notion": server} (모두 시작된 상태)"""
+    return {
+        "github": github_server(files, latency=latency, error_rate=error_rate, rate_limit=github_rate,
+                                quota=github_quota, quota_window=quota_window, seed=seed).start(),
+        "openai": openai_server(latency=latency if openai_latency is None else openai_latency,
+                                error_rate=error_rate, rate_limit=openai_rate, wander_rate=openai_wander,
+                                quota=openai_quota, quota_window=quota_window, seed=seed).start(),
+        "notion": notion_server(latency=latency, error_rate=error_rate, rate_limit=notion_rate,
+                                seed=seed).start(),
+    }
+
+
+def env_for(servers: dict) -> dict:
+    """classify_and_push.py 가 대체 서버를 보도록 하는 환경변수"""
+    return {
+        "GITHUB_API_URL": servers["github"].url,
+        "OPENAI_BASE_URL": servers["openai"].url,
+        "NOTION_API_URL": servers["notion"].url,
+        "GITHUB_TOKEN": "mock-github-token",
+        "OPENAI_API_KEY": "mock-openai-key",
+        "NOTION_TOKEN": "mock-notion-token",
+        "NOTION_DB_ID": "mock-db",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub/OpenAI/Notion 로컬 대체 서버")
+    parser.add_argument("--latency", type=float, default=0.05, help="평균 응답 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 을 돌려줄 확률")
+    parser.add_argument("--notion-rate", type=float, default=3.0, help="Notion 초당 요청 한도 (0 = 무제한)")
+    args = parser.parse_args()
+    servers = start_all(latency=args.latency, error_rate=args.error_rate, notion_rate=args.notion_rate)
+    for k, v in env_for(servers).items():
+        print(f"export {k}={v}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for srv in servers.values():
+            srv.stop()
+
+
+if __name__ == "__main__":
+    main()
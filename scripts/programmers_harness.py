@@ -0,0 +1,364 @@
+# scripts/programmers_harness.py
+# 프로그래머스 solution() 하네스: README 의 "입출력 예" 표를 인자 튜플로 바꿔서 각 풀이 모듈을 한 번만 import 하고,
+# solution 을 timeit 처럼 반복 횟수를 스스로 정해(autorange) 호출해서 정답 여부와 호출당 시간을 기록합니다.
+#
+# - 표는 마지막 열이 기대값(result), 나머지 열이 순서대로 인자입니다.
+# - 파싱한 예제는 README 내용 해시를 키로 CASE_CACHE_DIR 에 저장해서 README 가 그대로면 다시 파싱하지 않습니다.
+# - 문제 폴더 단위로 프로세스 풀에 나눠서 실행하고, 결과를 JSON 또는 CSV 로 저장합니다 (추이 비교용).
+#
+# 사용법: python scripts/programmers_harness.py [--roots 프로그래머스] [--workers 0] [--timeout 5]
+#                                              [--min-time 0.2] [--filter 120805.] [--format json|csv]
+#                                              [--output 결과.json]
+# 환경변수: CASE_CACHE_DIR (기본 .cache/programmers_cases, 빈 값이면 캐시 안 함)
+
+import argparse
+import ast
+import contextlib
+import copy
+import csv
+import gc
+import hashlib
+import importlib.util
+import inspect
+import io
+import json
+import math
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from archive_paths import REPO_ROOT, problem_folders, solution_files
+
+# 파싱한 예제 캐시 디렉터리 (README 해시별 JSON 파일)
+CASE_CACHE_DIR = os.getenv("CASE_CACHE_DIR", os.path.join(REPO_ROOT, ".cache", "programmers_cases"))
+
+_IO_HEADING_RE = re.compile(r'입출력\s*예(?!\s*설명)')
+_THOUSANDS_RE = re.compile(r'-?\d{1,3}(?:,\d{3})+')
+
+CSV_FIELDS = ["folder", "solution", "case", "status", "loops", "per_call_us", "expected", "actual", "error"]
+# 이 중 하나라도 있으면 종료 코드 1 (no_cases 는 예제가 없는 문제라 제외)
+FAILING_STATUSES = ("fail", "error", "timeout", "import_error", "no_solution", "bad_case")
+
+
+# -------------------
+# 입출력 예 표 파싱 (README 해시로 캐시)
+# -------------------
+class _TableParser(HTMLParser):
+    """첫 번째 <table> 의 행들을 [[셀 텍스트, ...], ...] 로 (th/td 모두)"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._row = None
+        self._cell = None
+        self._depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self._depth += 1
+        elif tag == "tr" and self._depth:
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+        elif tag == "br" and self._cell is not None:
+            self._cell.append("\n")
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag in ("td", "th") and self._cell is not None:
+            self._row.append("".join(self._cell).strip())
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._row:
+                self.rows.append(self._row)
+            self._row = None
+        elif tag == "table" and self._depth:
+            self._depth -= 1
+            self.done = self._depth == 0
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def parse_cell(text: str):
+    """셀 텍스트 -> 파이썬 값 ("abc" -> 'abc', [1, 2] -> [1, 2], true -> True, 464,000 -> 464000)"""
+    text = unescape(text).strip()
+    if _THOUSANDS_RE.fullmatch(text):
+        return int(text.replace(",", ""))
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return text
+
+
+def parse_io_table(readme: str) -> Optional[dict]:
+    """
+    "입출력 예" 헤딩 다음의 첫 표 -> {"params": [열 이름, ...], "cases": [{"args": [...], "expected": ...}]}
+    표가 없으면 None (SQL 문제 등)
+    """
+    m = _IO_HEADING_RE.search(readme)
+    if not m:
+        return None
+    start = readme.find("<table", m.end())
+    if start == -1:
+        return None
+    parser = _TableParser()
+    parser.feed(readme[start:])
+    if len(parser.rows) < 2:
+        return None
+    header, body = parser.rows[0], parser.rows[1:]
+    cases = [{"args": [parse_cell(c) for c in row[:-1]], "expected": parse_cell(row[-1])}
+             for row in body if len(row) == len(header)]
+    return {"params": header[:-1], "cases": cases}
+
+
+def load_cases(folder: str) -> Optional[dict]:
+    """폴더 README 의 예제 (README 해시가 같으면 캐시에서)"""
+    readme_path = os.path.join(folder, "README.md")
+    if not os.path.isfile(readme_path):
+        return None
+    with open(readme_path, "r", encoding="utf-8") as f:
+        readme = f.read()
+    key = hashlib.sha256(readme.encode("utf-8")).hexdigest()
+    cache_path = os.path.join(CASE_CACHE_DIR, key + ".json") if CASE_CACHE_DIR else ""
+    if cache_path and os.path.isfile(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    table = parse_io_table(readme)
+    if cache_path:
+        try:
+            encoded = json.dumps(table, ensure_ascii=False)  # literal_eval 결과 중 JSON 이 안 되는 값이면 캐시 생략
+        except TypeError:
+            encoded = None
+        if encoded is not None:
+            os.makedirs(CASE_CACHE_DIR, exist_ok=True)
+            tmp = cache_path + f".{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(encoded)
+            os.replace(tmp, cache_path)
+    return table
+
+
+# -------------------
+# 실행 / 비교
+# -------------------
+class _Timeout(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def time_limit(seconds: float):
+    """워커 프로세스의 메인 스레드에서 SIGALRM 으로 무한 루프를 끊음 (0 이면 제한 없음)"""
+    if seconds <= 0 or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def _raise(signum, frame):
+        raise _Timeout()
+
+    previous = signal.signal(signal.SIGALRM, _raise)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _normalize(value):
+    """튜플은 리스트로 (표에는 [..] 로 적혀 있음)"""
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def same_result(actual, expected) -> bool:
+    actual, expected = _normalize(actual), _normalize(expected)
+    if isinstance(actual, float) or isinstance(expected, float):
+        try:
+            return math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9)
+        except TypeError:
+            return False
+    if isinstance(actual, list) and isinstance(expected, list):
+        return len(actual) == len(expected) and all(same_result(a, e) for a, e in zip(actual, expected))
+    return actual == expected
+
+
+def import_solution(path: str):
+    """풀이 파일을 모듈로 한 번 import (모듈 수준 print 는 버림)"""
+    name = "programmers_" + hashlib.md5(path.encode("utf-8")).hexdigest()[:12]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+    return module
+
+
+_CONTAINERS = (list, tuple, dict, set)
+
+
+def _fresh(value):
+    """호출마다 쓸 인자 복사본. 예제 인자는 리스트/딕셔너리/집합과 스칼라뿐이라 컨테이너만 새로 만듦"""
+    if isinstance(value, list):
+        return [_fresh(v) if isinstance(v, _CONTAINERS) else v for v in value]
+    if isinstance(value, tuple):
+        return tuple(_fresh(v) if isinstance(v, _CONTAINERS) else v for v in value)
+    if isinstance(value, dict):
+        return {k: _fresh(v) if isinstance(v, _CONTAINERS) else v for k, v in value.items()}
+    if isinstance(value, set):
+        return set(value)  # 집합 원소는 해시 가능한 값뿐
+    return value
+
+
+def autorange(fn, args: tuple, min_time: float, fresh: bool = False) -> tuple:
+    """
+    timeit.Timer.autorange 와 같은 순서(1, 2, 5, 10, 20, 50, ...)로 반복 횟수를 늘려 min_time 이상 걸릴 때의 (횟수, 초).
+    fresh 면(풀이가 인자를 제자리에서 바꿈) 호출마다 새 복사본을 측정 전에 만들어 두고 그것으로 호출.
+    복사가 호출보다 훨씬 오래 걸릴 수 있으므로 그때는 복사 포함 경과 시간이 10 * min_time 을 넘으면 거기서 멈춤.
+    timeit 처럼 측정 중에는 gc 를 끔
+    """
+    started_all = time.perf_counter()
+    i = 1
+    while True:
+        for j in (1, 2, 5):
+            loops = i * j
+            calls = [_fresh(args) for _ in range(loops)] if fresh else [args] * loops
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                for call_args in calls:
+                    fn(*call_args)
+                total = time.perf_counter() - started
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            if total >= min_time or (fresh and time.perf_counter() - started_all >= 10 * min_time):
+                return loops, total
+        i *= 10
+
+
+def run_folder(folder: str, timeout: float, min_time: float) -> List[dict]:
+    """프로세스 풀 작업 단위: 폴더의 풀이들(CodeReview.py 제외) x 입출력 예 (pickle 되도록 모듈 최상위 함수)"""
+    rel = os.path.relpath(folder, REPO_ROOT) if folder.startswith(REPO_ROOT + os.sep) else folder
+    table = load_cases(folder)
+    rows = []
+    for name in solution_files(folder):
+        base = {"folder": rel, "solution": name}
+        if not table or not table["cases"]:
+            rows.append(dict(base, case="", status="no_cases"))
+            continue
+        try:
+            with time_limit(timeout):
+                module = import_solution(os.path.join(folder, name))
+        except _Timeout:
+            rows.append(dict(base, case="", status="timeout", error="import"))
+            continue
+        except Exception as e:  # 풀이 파일마다 다른 오류 (없는 패키지 등) -> 결과 행으로 남기고 다음 파일
+            rows.append(dict(base, case="", status="import_error", error=f"{type(e).__name__}: {e}"))
+            continue
+        solution = getattr(module, "solution", None)
+        if not callable(solution):
+            rows.append(dict(base, case="", status="no_solution"))
+            continue
+        try:
+            arity_ok = len(inspect.signature(solution).parameters) == len(table["params"])
+        except (TypeError, ValueError):
+            arity_ok = True
+        for i, case in enumerate(table["cases"], 1):
+            row = dict(base, case=i, expected=json.dumps(case["expected"], ensure_ascii=False))
+            if not arity_ok:
+                rows.append(dict(row, status="bad_case", error=f"params {table['params']}"))
+                continue
+            try:
+                with time_limit(timeout), contextlib.redirect_stdout(io.StringIO()):
+                    call_args = copy.deepcopy(case["args"])
+                    actual = solution(*call_args)
+                    # 정답 확인 호출에서 인자가 바뀌었으면(sort/pop 등) 측정도 호출마다 원래 인자의 복사본으로
+                    mutates = call_args != case["args"]
+                    loops, total = autorange(solution, tuple(case["args"]), min_time, fresh=mutates)
+            except _Timeout:
+                rows.append(dict(row, status="timeout", error=f"over {timeout}s"))
+                continue
+            except Exception as e:
+                rows.append(dict(row, status="error", error=f"{type(e).__name__}: {e}"))
+                continue
+            rows.append(dict(row, status="pass" if same_result(actual, case["expected"]) else "fail",
+                             actual=json.dumps(_normalize(actual), ensure_ascii=False, default=repr),
+                             loops=loops, per_call_us=round(total / loops * 1e6, 3)))
+    return rows
+
+
+# -------------------
+# main
+# -------------------
+def write_rows(rows: List[dict], fmt: str, out):
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        json.dump(rows, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="프로그래머스 solution() 정답/호출 시간 측정")
+    parser.add_argument("--roots", nargs="+", default=["프로그래머스"], help="실행할 최상위 폴더")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 수 (0 = CPU 수)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="호출(측정 포함) 하나의 제한 시간(초)")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="예제 하나를 잴 최소 시간(초). timeit.autorange 기본값과 같은 0.2")
+    parser.add_argument("--filter", default="", help="경로에 이 문자열이 들어간 문제만")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--output", default="", help="결과 파일 경로 (없으면 요약만 출력)")
+    args = parser.parse_args(argv)
+
+    folders = problem_folders(args.roots, args.filter)
+    workers = args.workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for folder_rows in pool.map(run_folder, folders, [args.timeout] * len(folders),
+                                    [args.min_time] * len(folders)):
+            for r in folder_rows:
+                if r["status"] in FAILING_STATUSES:
+                    detail = r.get("error") or f"expected {r.get('expected')} got {r.get('actual')}"
+                    print(f"[HARNESS] {r['status'].upper():<11} {r['folder']}/{r['solution']} #{r['case']} {detail[:160]}")
+            rows += folder_rows
+    elapsed = time.perf_counter() - started
+
+    counts = {}
+    for r in rows:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    timed = sorted((r for r in rows if "per_call_us" in r), key=lambda r: -r["per_call_us"])
+    print(f"[HARNESS] problems: {len(folders)} workers: {workers} elapsed: {elapsed:.2f}s")
+    print("[HARNESS] " + " ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    for r in timed[:5]:
+        print(f"[HARNESS] slowest {r['per_call_us']:>10.1f}us/call {r['folder']}/{r['solution']} #{r['case']}")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            write_rows(rows, args.format, f)
+    return 1 if any(counts.get(s) for s in FAILING_STATUSES) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# scripts/test_parse_readme.py
+# parse_readme() 가 돌려주는 dict 를 저장소에 있는 README 몇 개로 고정해 두는 테스트
+# (파서를 고칠 때 결과가 조용히 바뀌지 않도록. 바뀌어야 하면 여기 기대값도 같이 고침)
+#
+# 사용법: python scripts/test_parse_readme.py   (또는 python -m pytest scripts/test_parse_readme.py)
+
+import os
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from archive_paths import REPO_ROOT  # noqa: E402
+from classify_and_push import parse_readme  # noqa: E402
+
+EXPECTED = {
+    "백준/Bronze/1000.\u2005A＋B/README.md": {
+        "problem_url": "https://www.acmicpc.net/problem/1000",
+        "perf_memory": "",
+        "perf_time": "36 ms",
+        "difficulty": "Bronze V",
+        "problem_text": "두 정수 A와 B를 입력받은 다음, A+B를 출력하는 프로그램을 작성하시오.",
+        "problem_detail": "두 정수 A와 B를 입력받은 다음, A+B를 출력하는 프로그램을 작성하시오.",
+        "classification_text": "구현, 사칙연산, 수학",
+        "classification_tags": ["구현", "사칙연산", "수학"],
+    },
+    "백준/Silver/11659.\u2005구간\u2005합\u2005구하기\u20054/README.md": {
+        "problem_url": "https://www.acmicpc.net/problem/11659",
+        "perf_memory": "",
+        "perf_time": "2896 ms",
+        "difficulty": "Silver III",
+        "problem_text": "수 N개가 주어졌을 때, i번째 수부터 j번째 수까지 합을 구하는 프로그램을 작성하시오.",
+        "problem_detail": "수 N개가 주어졌을 때, i번째 수부터 j번째 수까지 합을 구하는 프로그램을 작성하시오.",
+        "classification_text": "누적 합",
+        "classification_tags": ["누적"],
+    },
+    "프로그래머스/0/120844.\u2005배열\u2005회전시키기/README.md": {
+        "problem_url": "https://school.programmers.co.kr/learn/courses/30/lessons/120844",
+        "perf_memory": "10.2 MB",
+        "perf_time": "0.00 ms",
+        "difficulty": "level 0",
+        "problem_text": "정수가 담긴 배열 numbers와 문자열\xa0direction가 매개변수로 주어집니다. 배열 numbers의 원소를 direction방향으로 한 칸씩 회전시킨 "
+                        "배열을 return하도록 solution 함수를 완성해주세요. 제한사항 3 ≤ numbers의 길이 ≤ 20 direction은 \"left\" 와 \"right\" "
+                        "둘 중 하나입니다. 입출력 예 numbers",
+        "problem_detail": "정수가 담긴 배열 numbers와 문자열\xa0direction가 매개변수로 주어집니다. 배열 numbers의 원소를 direction방향으로 한 칸씩 회전시킨 "
+                          "배열을 return하도록 solution 함수를 완성해주세요. 제한사항 3 ≤ numbers의 길이 ≤ 20 direction은 \"left\" 와 \"right\" "
+                          "둘 중 하나입니다. 입출력 예 [표 2행: numbers, direction, result] 입출력 예 설명 입출력 예 #1 numbers 가 [1, 2, "
+                          "3]이고 direction이 \"right\" 이므로 오른쪽으로 한 칸씩 회전시킨 [3, 1, 2]를 return합니다. 입출력 예 #2 numbers 가 [4, "
+                          "455, 6, 4, -1, 45, 6]이고 direction이 \"left\" 이므로 왼쪽으로 한 칸씩 회전시킨 [455, 6, 4, -1, 45, 6, 4]를 "
+                          "return합니다. > 출처: 프로그래머스 코딩 테스트 연습, https://school.programmers.co.kr/learn/challenges",
+        "classification_text": "코딩테스트 연습 > 코딩테스트 입문",
+        "classification_tags": ["코딩테스트 연습", "코딩테스트 입문"],
+    },
+}
+
+
+class ParseReadmeTest(unittest.TestCase):
+    def test_readmes_in_tree(self):
+        for rel, expected in EXPECTED.items():
+            with self.subTest(readme=rel):
+                with open(os.path.join(REPO_ROOT, rel), "r", encoding="utf-8") as f:
+                    self.assertEqual(parse_readme(f.read()), expected)
+
+    def test_empty(self):
+        self.assertEqual(parse_readme(""), {
+            "problem_url": "", "perf_memory": "", "perf_time": "", "difficulty": "", "problem_text": "",
+            "problem_detail": "", "classification_text": "", "classification_tags": [],
+        })
+
+    def test_perf_searched_in_whole_text(self):
+        """성능 요약 섹션보다 앞에 나온 값도 (기존 파서와 같이) 처음 나온 것을 사용"""
+        text = "# [Bronze I] 문제\n\n시간: 12 ms\n\n### 성능 요약\n\n메모리: 3.1 MB, 시간: 40 ms\n"
+        info = parse_readme(text)
+        self.assertEqual((info["perf_memory"], info["perf_time"]), ("3.1 MB", "12 ms"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# scripts/test_rate_limits.py
+# mock_apis 대체 서버를 상대로 classify_and_push.py 의 요청 속도 제한을 확인하는 테스트
+#
+# 사용법: python scripts/test_rate_limits.py   (또는 python -m pytest scripts/test_rate_limits.py)
+# classify_and_push 는 API 주소/설정을 import 할 때 읽으므로, 서버를 먼저 띄우고 환경변수를 맞춘 뒤 import 합니다.
+
+import importlib
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import mock_apis  # noqa: E402
+
+SERVERS = {}
+cap = None
+
+
+def setUpModule():
+    global cap
+    SERVERS.update(mock_apis.start_all(notion_rate=3.0, seed=1))
+    os.environ.update(mock_apis.env_for(SERVERS))
+    os.environ.update({
+        "NOTION_RATE_LIMIT": "3",
+        "NOTION_WORKERS": "3",
+        "HTTP_MAX_RETRIES": "3",
+        "ADAPTIVE_RATE_LIMIT": "1",
+        "ADAPTIVE_MAX_CONCURRENCY": "8",
+        # 로컬 상태/캐시 파일을 건드리지 않도록 모두 끔
+        "STATE_DB_PATH": "",
+        "NOTION_INDEX_PATH": "",
+        "NOTION_SCHEMA_CACHE_PATH": "",
+        "CLASSIFY_CACHE_DIR": "",
+    })
+    # 다른 테스트가 이미 (다른 환경변수로) import 했을 수 있으므로 새로 읽음
+    sys.modules.pop("classify_and_push", None)
+    cap = importlib.import_module("classify_and_push")
+
+
+def tearDownModule():
+    for srv in SERVERS.values():
+        srv.stop()
+
+
+def _page_meta(i: int) -> dict:
+    return {"title": f"문제 {i}", "platform": "백준", "tags": ["구현"], "language": "python",
+            "url": f"https://www.acmicpc.net/problem/{1000 + i}", "code_snippet": f"print({i})\n"}
+
+
+class NotionRateLimitTest(unittest.TestCase):
+    def test_publisher_stays_under_notion_rate(self):
+        """워커 3개가 동시에 게시해도 3 req/s 한도에서 429 가 한 번도 나오지 않고, submit 은 기다리지 않음"""
+        notion = SERVERS["notion"]
+        before = dict(notion.stats)
+        publisher = cap.NotionPublisher(3)
+        t0 = time.perf_counter()
+        futures = [publisher.submit(_page_meta(i)) for i in range(12)]
+        submitted = time.perf_counter() - t0
+        results = [f.result() for f in futures]
+        publisher.close()
+
+        self.assertLess(submitted, 0.5)
+        self.assertTrue(all(r["status"] == "ok" for r in results), results)
+        self.assertEqual(notion.stats["throttled"] - before["throttled"], 0)
+        self.assertGreaterEqual(notion.stats["requests"] - before["requests"], 12)
+
+
+class AdaptiveQuotaTest(unittest.TestCase):
+    def test_limiter_shrinks_and_waits_for_reset(self):
+        """예산 5회/1초인 OpenAI 대체 서버에 8개 스레드로 20번 요청 -> 429 없이, 동시 요청은 예산 이하로"""
+        srv = mock_apis.openai_server(quota=5, quota_window=1.0, seed=1).start()
+        self.addCleanup(srv.stop)
+        url = srv.url + "/chat/completions"
+        limiter = cap.adaptive_limiter(srv.url.split("://", 1)[1])
+        peaks, limits = [], []
+        acquire, observe = limiter.acquire, limiter.observe
+
+        def _acquire():
+            acquire()
+            peaks.append(limiter.in_flight)
+
+        def _observe(r):
+            observe(r)
+            limits.append(limiter.limit)
+
+        limiter.acquire, limiter.observe = _acquire, _observe
+        sleeps_before = cap.METRICS.counters.get(("ratelimit_preemptive_sleeps", (("host", limiter.host),)), 0)
+
+        def _one(i):
+            body = {"model": "mock", "messages": [{"role": "user", "content": f"문제 {i}"}]}
+            return cap.http_request("POST", url, json=body, timeout=10).status_code
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(8) as pool:
+            codes = list(pool.map(_one, range(20)))
+        elapsed = time.perf_counter() - t0
+
+        self.assertEqual(codes, [200] * 20)
+        self.assertEqual(srv.stats["throttled"], 0)
+        self.assertLessEqual(max(peaks), 5)
+        self.assertLess(min(limits[1:]), 8)
+        # 20 요청 / 초당 5 -> 적어도 세 번은 리셋을 기다려야 함
+        self.assertGreaterEqual(elapsed, 3.0)
+        sleeps = cap.METRICS.counters.get(("ratelimit_preemptive_sleeps", (("host", limiter.host),)), 0)
+        self.assertGreater(sleeps - sleeps_before, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()